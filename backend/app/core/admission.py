@@ -0,0 +1,247 @@
+"""
+Admission Control
+Per-endpoint concurrency limits with bounded wait queues and memory-aware
+admission for expensive (Whisper / GPT-4o) endpoints
+"""
+import asyncio
+import json
+import math
+import time
+from typing import Dict, Optional
+
+from starlette.exceptions import HTTPException
+
+from .config import settings
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class UploadTooLarge(HTTPException):
+    """
+    Raised from the request body stream once an upload outgrows its limit
+
+    An HTTPException, so FastAPI's body parsing re-raises it (rather than
+    turning it into a 400) and the client gets a 413.
+    """
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=413, detail=detail)
+
+
+class AdmissionLimiter:
+    """
+    At most `max_concurrent` requests run at once; up to `max_queue` more may
+    wait (for at most `queue_timeout` seconds). Anything beyond that is
+    rejected immediately so the caller can back off.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._avg_seconds = 1.0
+        self.stats = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    def retry_after(self) -> int:
+        """Estimated seconds until a slot frees up for a new arrival"""
+        return max(1, math.ceil(self._avg_seconds * (self.waiting + 1) / self.max_concurrent))
+
+    async def acquire(self):
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.stats["rejected_queue_full"] += 1
+                raise AdmissionRejected(f"{self.name} is at capacity", self.retry_after())
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.stats["rejected_timeout"] += 1
+                raise AdmissionRejected(f"{self.name} is overloaded", self.retry_after())
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        self.stats["admitted"] += 1
+
+    def release(self, elapsed: float):
+        self.active -= 1
+        self._avg_seconds = 0.9 * self._avg_seconds + 0.1 * elapsed
+        self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "avg_seconds": round(self._avg_seconds, 3),
+            **self.stats,
+        }
+
+
+class MemoryBudget:
+    """Process-wide budget for request bodies held in memory (declared size, grown as chunked bodies arrive)"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.reserved = 0
+        self.rejected = 0
+
+    def reserve(self, size: int) -> bool:
+        if self.reserved + size > self.max_bytes and self.reserved > 0:
+            self.rejected += 1
+            return False
+        self.reserved += size
+        return True
+
+    def release(self, size: int):
+        self.reserved -= size
+
+    def snapshot(self) -> dict:
+        return {"max_bytes": self.max_bytes, "reserved": self.reserved, "rejected": self.rejected}
+
+
+voice_limiter = AdmissionLimiter(
+    "voice",
+    max_concurrent=settings.admission_voice_max_concurrent,
+    max_queue=settings.admission_voice_max_queue,
+    queue_timeout=settings.admission_queue_timeout_seconds
+)
+agent_limiter = AdmissionLimiter(
+    "agent",
+    max_concurrent=settings.admission_agent_max_concurrent,
+    max_queue=settings.admission_agent_max_queue,
+    queue_timeout=settings.admission_queue_timeout_seconds
+)
+memory_budget = MemoryBudget(settings.admission_memory_budget_bytes)
+
+# Path -> limiter. Voice endpoints share one limiter since they share the Whisper upstream.
+ADMISSION_POLICIES: Dict[str, AdmissionLimiter] = {
+    "/api/voice/process": voice_limiter,
+    "/api/voice/transcribe": voice_limiter,
+    "/api/agent/classify": agent_limiter,
+    "/api/agent/classify-with-context": agent_limiter,
+    "/api/agent/classify-batch": agent_limiter,
+}
+
+
+def _has_bearer_token(authorization: bytes) -> bool:
+    """Whether the Authorization header carries something shaped like a JWT (header.payload.signature)"""
+    scheme, _, token = authorization.partition(b" ")
+    return scheme.lower() == b"bearer" and token.strip().count(b".") == 2
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying admission control before the request body is read,
+    so rejected uploads are never buffered.
+
+    The body stream is counted as it is received: a body larger than its
+    Content-Length, or a chunked body that passes max_upload_bytes or can no
+    longer grow its memory reservation, is cut off with a 413.
+    """
+
+    def __init__(self, app, policies: Optional[Dict[str, AdmissionLimiter]] = None, budget: Optional[MemoryBudget] = None):
+        self.app = app
+        self.policies = policies if policies is not None else ADMISSION_POLICIES
+        self.budget = budget or memory_budget
+
+    async def __call__(self, scope, receive, send):
+        limiter = self.policies.get(scope.get("path", "").rstrip("/")) if scope["type"] == "http" else None
+        if limiter is None or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        # Requests that cannot authenticate must not hold a slot or queue
+        # space; the endpoint's auth dependency still verifies the token
+        if not _has_bearer_token(headers.get(b"authorization", b"")):
+            await self._reject(send, 401, "Not authenticated", www_authenticate=True)
+            return
+
+        try:
+            content_length = int(headers.get(b"content-length", b""))
+        except ValueError:
+            content_length = None
+
+        if content_length is not None and content_length > settings.max_upload_bytes:
+            await self._reject(send, 413, f"Request body exceeds {settings.max_upload_bytes} bytes")
+            return
+
+        # Chunked uploads have no declared size; assume a typical upload
+        reserved = content_length if content_length is not None else settings.admission_default_upload_bytes
+        if not self.budget.reserve(reserved):
+            await self._reject(send, 503, "Server is low on memory for uploads", limiter.retry_after())
+            return
+
+        limit = content_length if content_length is not None else settings.max_upload_bytes
+        received = 0
+        response_started = False
+
+        async def receive_capped():
+            nonlocal received, reserved
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            received += len(message.get("body", b""))
+            if received > limit:
+                raise UploadTooLarge(f"Request body exceeds {limit} bytes")
+            if received > reserved:
+                # Chunked upload outgrew its reservation: grow it by another default chunk
+                grow = min(limit, max(received, reserved + settings.admission_default_upload_bytes)) - reserved
+                if not self.budget.reserve(grow):
+                    raise UploadTooLarge("Request body exceeds the memory available for uploads")
+                reserved += grow
+            return message
+
+        async def send_tracked(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            try:
+                await limiter.acquire()
+            except AdmissionRejected as e:
+                await self._reject(send, 503, str(e), e.retry_after)
+                return
+            started = time.monotonic()
+            try:
+                await self.app(scope, receive_capped, send_tracked)
+            except UploadTooLarge as e:
+                if response_started:
+                    raise
+                await self._reject(send, 413, e.detail)
+            finally:
+                limiter.release(time.monotonic() - started)
+        finally:
+            self.budget.release(reserved)
+
+    async def _reject(
+        self,
+        send,
+        status: int,
+        detail: str,
+        retry_after: Optional[int] = None,
+        www_authenticate: bool = False
+    ):
+        body = json.dumps({"detail": detail}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode()))
+        if www_authenticate:
+            headers.append((b"www-authenticate", b"Bearer"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
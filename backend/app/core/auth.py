@@ -1,8 +1,17 @@
+import asyncio
+import hashlib
 import os
-from fastapi import Request, HTTPException, Depends
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+from fastapi import Request, HTTPException, Depends, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
 from dotenv import load_dotenv
+from .config import settings
+from .profiling import stage
+from .singleflight import get_group
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 
@@ -10,22 +19,72 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
-if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+@lru_cache(maxsize=None)
+def get_supabase() -> "Client":
+    """
+    Get the Supabase client, created on first use so the app can boot
+    (e.g. for health checks) without Supabase credentials
+    """
+    if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+        raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set")
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Verify the Supabase JWT and return user information.
     """
-    token = credentials.credentials
+    return await verify_token(credentials.credentials)
+
+async def get_admin_user(user=Depends(get_current_user)):
+    """
+    Like get_current_user, but only for users listed in ADMIN_USERS (by id or email)
+    Guards endpoints that spend shared quota or expose other users' data
+    """
+    if user.id not in settings.admin_users and (not user.email or user.email not in settings.admin_users):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+async def get_current_user_from_query(
+    access_token: Optional[str] = Query(default=None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """
+    Like get_current_user, but also accepts the JWT as an `access_token`
+    query parameter (browser EventSource cannot set headers)
+    """
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await verify_token(token)
+
+async def verify_token(token: str):
+    """
+    Validate a Supabase JWT and return the user
+    """
+    try:
+        supabase = get_supabase()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=f"Authentication is not configured: {str(e)}")
+    
     try:
         # Verify the token with Supabase
         # supabase.auth.get_user(token) validates the JWT and returns user info
-        user_response = supabase.auth.get_user(token)
+        # The client is synchronous: run it off the event loop, and let
+        # concurrent requests carrying the same token share one lookup
+        token_key = hashlib.sha256(token.encode()).hexdigest()
+        with stage("auth"):
+            user_response = await get_group("auth.get_user").do(
+                token_key,
+                lambda: asyncio.to_thread(supabase.auth.get_user, token)
+            )
         
         if not user_response or not user_response.user:
             raise HTTPException(
@@ -16,9 +16,129 @@ class Settings(BaseSettings):
     app_name: str = "Voice Agent API"
     debug: bool = os.getenv("DEBUG", "False").lower() == "true"
     cors_origins: list[str] = ["http://localhost:5173", "http://localhost:3000"]
+    admin_users: list[str] = []  # user ids or emails allowed on privileged /api/admin endpoints (empty: none)
     
     # Database
     database_url: Optional[str] = os.getenv("DATABASE_URL", "")
+    supabase_read_replica_url: str = os.getenv("SUPABASE_READ_REPLICA_URL", "")  # empty: all reads go to the primary
+    db_read_your_writes_seconds: float = 5.0  # after a write, the user's reads stay on the primary this long
+    db_clients_per_target: int = 2  # pooled Supabase clients per endpoint, used round-robin
+    
+    # Upstream resilience (OpenAI)
+    openai_chat_timeout_seconds: float = 30.0
+    openai_embedding_timeout_seconds: float = 10.0
+    openai_transcription_timeout_seconds: float = 60.0
+    openai_max_retries: int = 2
+    openai_hedge_delay_seconds: float = 0.0  # 0 disables hedged requests
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+    embedding_backfill_queue_size: int = 1000
+    
+    # Embedding backfill / re-embedding job
+    embedding_backfill_batch_size: int = 256
+    embedding_backfill_requests_per_minute: float = 500.0
+    embedding_backfill_tokens_per_minute: float = 1_000_000.0
+    embedding_backfill_checkpoint_path: str = ".embedding_backfill_checkpoint.json"
+    
+    # Conversation sessions (classify-with-context)
+    session_backend: str = "memory"  # "memory" or "supabase" (shared across workers)
+    session_max_recent_turns: int = 6  # turns always kept verbatim
+    session_summary_token_threshold: int = 1500
+    session_ttl_seconds: int = 1800
+    
+    # Ingest deduplication
+    dedup_enabled: bool = True
+    dedup_similarity_threshold: float = 0.95
+    dedup_mode: str = "merge"  # "merge" (count on the original) or "link" (insert with duplicate_of)
+    dedup_lookback_days: int = 180  # vector duplicate search window; 0 searches all history
+    
+    # Embedding provider
+    embedding_provider: str = "openai"  # "openai" or "local" (ONNX sentence encoder, zero-padded to 1536)
+    embedding_local_model: str = "BAAI/bge-small-en-v1.5"
+    embedding_local_threads: int = 2  # ONNX Runtime intra-op threads
+    embedding_batch_max_size: int = 32  # texts per local forward pass
+    embedding_batch_max_wait_ms: float = 5.0  # how long a request waits for others to batch with
+    
+    # Transcription backends
+    transcription_backend: str = "openai"  # "openai", "local" or "auto" (local for short clips)
+    transcription_local_model: str = "base.en"  # faster-whisper model name or path
+    transcription_local_compute_type: str = "int8"
+    transcription_local_workers: int = 2  # processes, each holding one copy of the model
+    transcription_local_cpu_threads: int = 2  # per process
+    transcription_local_max_seconds: float = 30.0  # auto mode: longer audio goes to OpenAI
+    
+    # Batch classification (/api/agent/classify-batch)
+    classify_batch_max_items: int = 25  # inputs per structured-output call
+    classify_batch_max_input_tokens: int = 6000  # estimated input tokens per call (~4 chars/token)
+    classify_batch_concurrency: int = 4  # calls in flight per batch request
+    
+    # Category registry
+    category_confident_threshold: float = 0.85  # centroid cosine that overrides the classifier's label
+    category_fallback_threshold: float = 0.70  # centroid cosine used when the label is unusable
+    
+    # Async voice jobs
+    job_queue_dir: str = ".voice_jobs"
+    job_queue_max_pending: int = 100
+    job_workers: int = 4
+    job_result_ttl_seconds: int = 3600
+    
+    # Entry partitions and archival (archive_entries.py)
+    partition_months_ahead: int = 3  # monthly partitions created ahead of time
+    archive_after_months: int = 24  # months older than this are archived by default
+    archive_bucket: str = "entry-archive"  # Supabase Storage bucket for archived months
+    
+    # Idempotent voice uploads (Idempotency-Key header / audio sha256)
+    idempotency_ttl_seconds: float = 600.0  # how long a finished result is replayed
+    idempotency_max_entries: int = 5000
+    idempotency_hash_audio: bool = True  # dedupe identical uploads sent without a key
+    
+    # Request profiling (/api/admin/profiles)
+    profiling_enabled: bool = False  # install the profiling middleware
+    profiling_paths: list[str] = [
+        "/api/voice/process",
+        "/api/voice/transcribe",
+        "/api/agent/classify",
+        "/api/agent/classify-with-context",
+        "/api/agent/classify-batch",
+    ]
+    profiling_sample_rate: float = 0.0  # fraction of requests that get stack samples
+    profiling_force_token: Optional[str] = None  # `X-Profile: <token>` forces a sampled capture (unset: header ignored)
+    profiling_slow_ms: float = 2000.0  # requests at least this slow are kept
+    profiling_buffer_size: int = 50  # slow-request profiles kept per worker
+    profiling_forced_buffer_size: int = 10  # forced profiles kept per worker (never evict slow ones)
+    profiling_sample_interval_ms: float = 5.0
+    
+    # Admission control for expensive endpoints
+    admission_voice_max_concurrent: int = 8
+    admission_voice_max_queue: int = 16
+    admission_agent_max_concurrent: int = 32
+    admission_agent_max_queue: int = 64
+    admission_queue_timeout_seconds: float = 10.0
+    admission_memory_budget_bytes: int = 256 * 1024 * 1024
+    admission_default_upload_bytes: int = 2 * 1024 * 1024
+    max_upload_bytes: int = 25 * 1024 * 1024  # Whisper's upload limit
+    
+    # Read endpoint response cache
+    response_cache_ttl_seconds: float = 30.0
+    response_cache_max_entries: int = 2000
+    
+    # Incremental sync (/api/sync)
+    sync_page_size: int = 1000  # rows per table per response
+    sync_overlap_seconds: float = 300.0  # re-scan window for late-committing transactions
+    sync_tombstone_retention_days: int = 30  # older tokens get a full resync
+    
+    # Background summarization and rollups
+    summary_batch_size: int = 20  # entries per summarization call
+    summary_batch_wait_seconds: float = 2.0  # max wait to fill a batch
+    summary_queue_size: int = 1000
+    summary_sweep_interval_seconds: float = 600.0  # rescan for unsummarized rows when idle
+    summary_max_attempts: int = 3  # entries the model skips this often are left unsummarized
+    
+    # Change events (/api/events)
+    events_buffer_size: int = 256  # pending events per client before a resync
+    events_heartbeat_seconds: float = 15.0
+    events_bridge: str = "none"  # "none" or "postgres" (LISTEN/NOTIFY via DATABASE_URL)
+    events_channel: str = "voice_agent_events"
     
     class Config:
         env_file = ".env"
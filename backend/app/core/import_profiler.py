@@ -0,0 +1,108 @@
+"""
+Import Profiler
+Measures per-module import cost during startup (enable with IMPORT_PROFILE=1)
+"""
+import sys
+import time
+from importlib.abc import MetaPathFinder
+from typing import Dict, Optional
+
+# module name -> [inclusive seconds, self seconds]
+_timings: Dict[str, list[float]] = {}
+_stack: list[str] = []
+_boot = {"started": time.perf_counter(), "app_imported": None}
+
+
+class _TimingLoader:
+    """Wraps a loader to time exec_module; everything else is delegated"""
+
+    def __init__(self, loader, name: str):
+        self._loader = loader
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        _stack.append(self._name)
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - started
+            _stack.pop()
+            record = _timings.setdefault(self._name, [0.0, 0.0])
+            record[0] += elapsed
+            record[1] += elapsed
+            if _stack:
+                # Child time is not the parent's own cost
+                _timings.setdefault(_stack[-1], [0.0, 0.0])[1] -= elapsed
+
+
+class _ImportProfiler(MetaPathFinder):
+    def __init__(self):
+        self._resolving = set()
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname in self._resolving:
+            return None
+        self._resolving.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimingLoader(spec.loader, fullname)
+                    return spec
+            return None
+        finally:
+            self._resolving.discard(fullname)
+
+
+_profiler: Optional[_ImportProfiler] = None
+
+
+def install():
+    """Start timing every subsequent import (call before importing the app)"""
+    global _profiler
+    if _profiler is None:
+        _profiler = _ImportProfiler()
+        sys.meta_path.insert(0, _profiler)
+
+
+def uninstall():
+    global _profiler
+    if _profiler is not None:
+        sys.meta_path.remove(_profiler)
+        _profiler = None
+
+
+def mark_app_imported():
+    _boot["app_imported"] = time.perf_counter()
+
+
+def report(top: int = 25) -> dict:
+    """Boot time and the most expensive modules by self and inclusive time"""
+    app_import = _boot["app_imported"] - _boot["started"] if _boot["app_imported"] else None
+    modules = [
+        {"module": name, "inclusive_ms": round(inc * 1000, 2), "self_ms": round(own * 1000, 2)}
+        for name, (inc, own) in _timings.items()
+    ]
+    return {
+        "profiling_enabled": _profiler is not None or bool(_timings),
+        "app_import_ms": round(app_import * 1000, 2) if app_import is not None else None,
+        "by_self_time": sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:top],
+        "by_inclusive_time": sorted(modules, key=lambda m: m["inclusive_ms"], reverse=True)[:top],
+    }
+
+
+def print_report(top: int = 15):
+    data = report(top)
+    print(f"⏱️  App import: {data['app_import_ms']} ms")
+    for module in data["by_self_time"]:
+        print(f"   {module['self_ms']:>9.2f} ms self  {module['inclusive_ms']:>9.2f} ms total  {module['module']}")
@@ -0,0 +1,265 @@
+"""
+Request Profiling
+Opt-in capture of per-stage timings and sampled stack profiles for slow
+requests, kept in a bounded in-memory ring buffer (see /api/admin/profiles)
+"""
+import hmac
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Deque, List, Optional
+
+from .config import settings
+
+
+class RequestProfile:
+    """Stage timings (always) and folded stack samples (when sampled) for one request"""
+
+    def __init__(self, method: str, path: str, sampled: bool, forced: bool):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.sampled = sampled
+        self.forced = forced
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.stages: List[dict] = []
+        self.samples: Counter = Counter()
+
+    def add_stage(self, name: str, started: float, ended: float):
+        self.stages.append({
+            "name": name,
+            "offset_ms": round((started - self.started) * 1000, 2),
+            "duration_ms": round((ended - started) * 1000, 2),
+        })
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "sampled": self.sampled,
+            "forced": self.forced,
+            "samples": sum(self.samples.values()),
+        }
+
+    def to_dict(self) -> dict:
+        return {**self.summary(), "stages": self.stages, "stacks": dict(self.samples.most_common())}
+
+    def folded(self) -> str:
+        """Stacks in folded format ("a;b;c count"), for flamegraph.pl / speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+class _Stage:
+    __slots__ = ("name", "profile", "started")
+
+    def __init__(self, name: str, profile: RequestProfile):
+        self.name = name
+        self.profile = profile
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.add_stage(self.name, self.started, time.perf_counter())
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    """
+    Time a block as a named stage of the current request:
+
+        with stage("transcribe"):
+            ...
+
+    Outside a profiled request this is a single context-variable lookup.
+    """
+    profile = _current.get()
+    if profile is None:
+        return _NO_STAGE
+    return _Stage(name, profile)
+
+
+class StackSampler:
+    """
+    Background thread that samples the event-loop thread's Python stack
+    while at least one sampled request is in flight
+
+    Samples are attributed to every sampled request active at that moment:
+    under concurrency a profile also contains other requests' stacks, so it
+    shows where the worker spent its time while that request was slow.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._active: tuple = ()
+        self._thread_id: Optional[int] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, profile: RequestProfile):
+        with self._lock:
+            self._thread_id = threading.get_ident()
+            self._active = self._active + (profile,)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+
+    def unregister(self, profile: RequestProfile):
+        with self._lock:
+            self._active = tuple(p for p in self._active if p is not profile)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = self._active
+                if not active:
+                    self._thread = None
+                    return
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = self._fold(frame)
+            for profile in active:
+                profile.samples[stack] += 1
+
+    def _fold(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+class ProfileBuffer:
+    """
+    Most recent captured profiles, oldest evicted first
+
+    Forced captures are kept in their own smaller ring, so a burst of them
+    can never push out the slow-request profiles.
+    """
+
+    def __init__(self, max_entries: int = 50, max_forced: int = 10):
+        self._profiles: Deque[RequestProfile] = deque(maxlen=max_entries)
+        self._forced: Deque[RequestProfile] = deque(maxlen=max_forced)
+        self.stats = {"profiled": 0, "sampled": 0, "captured": 0}
+
+    def add(self, profile: RequestProfile, slow: bool = True):
+        (self._profiles if slow else self._forced).append(profile)
+        self.stats["captured"] += 1
+
+    def _all(self) -> List[RequestProfile]:
+        return sorted([*self._profiles, *self._forced], key=lambda profile: profile.started)
+
+    def list(self) -> List[dict]:
+        return [profile.summary() for profile in reversed(self._all())]
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return next((profile for profile in self._all() if profile.id == profile_id), None)
+
+    def snapshot(self) -> dict:
+        return {
+            "buffered": len(self._profiles) + len(self._forced),
+            "max_entries": self._profiles.maxlen,
+            "max_forced": self._forced.maxlen,
+            **self.stats,
+        }
+
+
+profile_buffer = ProfileBuffer(settings.profiling_buffer_size, settings.profiling_forced_buffer_size)
+stack_sampler = StackSampler(settings.profiling_sample_interval_ms / 1000)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests to `paths`
+
+    Every request on those paths records stage timings (a few list appends);
+    a random `sample_rate` fraction also gets stack samples, as do requests
+    sent with `X-Profile: <force_token>` (the header is ignored when no token
+    is configured, so clients cannot make the server sample at will).
+    Requests slower than `slow_ms`, and all forced ones, are kept in the ring
+    buffer; the rest are discarded.
+    """
+
+    def __init__(
+        self,
+        app,
+        paths: Optional[List[str]] = None,
+        sample_rate: Optional[float] = None,
+        slow_ms: Optional[float] = None,
+        force_token: Optional[str] = None,
+        buffer: Optional[ProfileBuffer] = None,
+        sampler: Optional[StackSampler] = None
+    ):
+        self.app = app
+        self.paths = set(paths if paths is not None else settings.profiling_paths)
+        self.sample_rate = settings.profiling_sample_rate if sample_rate is None else sample_rate
+        self.slow_ms = settings.profiling_slow_ms if slow_ms is None else slow_ms
+        self.force_token = ((settings.profiling_force_token if force_token is None else force_token) or "").encode()
+        self.buffer = buffer or profile_buffer
+        self.sampler = sampler or stack_sampler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path", "").rstrip("/") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        forced = self._forced(dict(scope["headers"]).get(b"x-profile"))
+        sampled = forced or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        profile = RequestProfile(scope["method"], scope["path"], sampled, forced)
+        self.buffer.stats["profiled"] += 1
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        token = _current.set(profile)
+        if sampled:
+            self.buffer.stats["sampled"] += 1
+            self.sampler.register(profile)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if sampled:
+                self.sampler.unregister(profile)
+            _current.reset(token)
+            profile.duration_ms = round((time.perf_counter() - profile.started) * 1000, 2)
+            slow = profile.duration_ms >= self.slow_ms
+            if forced or slow:
+                self.buffer.add(profile, slow)
+
+    def _forced(self, header: Optional[bytes]) -> bool:
+        return bool(self.force_token) and header is not None and hmac.compare_digest(header, self.force_token)
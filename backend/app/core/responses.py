@@ -0,0 +1,68 @@
+"""
+Response Classes
+Fast JSON serialization for API responses (orjson when installed)
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Optional, Type
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a declared dependency
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class. orjson encodes float arrays (embeddings),
+    datetimes and UUIDs natively, several times faster than json.dumps.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_embedding(value: Any) -> list[float] | None:
+    """
+    pgvector columns arrive from PostgREST as text ("[0.1,0.2,...]"), which
+    is valid JSON; parse it once so it is emitted as a real float array
+    """
+    if value is None or isinstance(value, list):
+        return value
+    return loads(value)
+
+
+def dump_trusted(model: Type[BaseModel], rows: Iterable[dict], exclude: Optional[set[str]] = None) -> list[dict]:
+    """
+    Project trusted database rows onto a response schema without validation
+    (model_construct skips it), keeping only the schema's fields
+    """
+    return [model.model_construct(**row).model_dump(exclude=exclude, warnings=False) for row in rows]
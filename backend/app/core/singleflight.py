@@ -0,0 +1,66 @@
+"""
+Single-flight
+Coalesces concurrent identical async calls: callers with the same key while
+a call is in flight share its result instead of issuing their own
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    One group per kind of call (e.g. "db.global_context")
+
+    The shared call runs as its own task, so a caller that is cancelled
+    (client disconnected) does not cancel it for the others. Nothing is
+    cached: once the call finishes, the next caller starts a new one.
+    Callers receive the same result object and must not mutate it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self.stats["calls"] += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieve the error so it isn't logged as unhandled when every caller went away
+            task.exception()
+
+    def snapshot(self) -> dict:
+        calls, shared = self.stats["calls"], self.stats["shared"]
+        return {
+            "in_flight": len(self._calls),
+            "calls": calls,
+            "shared": shared,
+            "fan_in": round((calls + shared) / calls, 2) if calls else None,
+        }
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+
+def get_group(name: str) -> SingleFlight:
+    """Get or create the process-wide single-flight group `name`"""
+    if name not in _groups:
+        _groups[name] = SingleFlight(name)
+    return _groups[name]
+
+
+def snapshot() -> Dict[str, Any]:
+    return {name: group.snapshot() for name, group in _groups.items()}
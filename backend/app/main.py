@@ -3,19 +3,99 @@ FastAPI Entry Point
 Voice Agent Application Backend
 """
 
+import os
+import traceback
+from app.core import import_profiler
+
+# Per-module import cost report (IMPORT_PROFILE=1); must run before other imports
+if os.getenv("IMPORT_PROFILE", "").lower() in ("1", "true"):
+    import_profiler.install()
+
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import voice, notes, reminders, agent, admin
+from app.routers import voice, notes, reminders, agent, admin, entries, sync, events
+from app.core.admission import AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.services.backfill_queue import embedding_backfill_queue
+from app.services.event_bus import event_bus, PostgresNotifyBridge
+from app.services.summarization import summarization_worker
+from app.services.providers import get_agent_service, get_db_service, get_job_queue, get_job_workers, get_voice_service
+
+import_profiler.mark_app_imported()
+import_profiler.uninstall()
 
 # Load environment variables from .env file
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv("IMPORT_PROFILE", "").lower() in ("1", "true"):
+        import_profiler.print_report()
+
+    # Monthly entries partitions for this month and the next few (pg_cron may
+    # not be installed; rows outside them land in entries_default)
+    try:
+        await get_db_service().ensure_entry_partitions(settings.partition_months_ahead)
+    except Exception:
+        traceback.print_exc()
+        print("⚠️ Could not ensure entries partitions")
+    # Background worker retrying embeddings that failed at ingest
+    backfill_task = asyncio.create_task(
+        embedding_backfill_queue.run(get_agent_service, get_db_service)
+    )
+    # Batched entry summaries and category/week rollups
+    summarization_task = asyncio.create_task(
+        summarization_worker.run(get_agent_service, get_db_service)
+    )
+    # Async voice jobs: re-queue anything left over from a previous run
+    await get_job_queue().recover()
+    get_job_workers().start()
+    # Cross-worker change events over LISTEN/NOTIFY (in-process only otherwise)
+    events_bridge = None
+    if settings.events_bridge == "postgres" and settings.database_url:
+        events_bridge = PostgresNotifyBridge(event_bus, settings.database_url, channel=settings.events_channel)
+        try:
+            await events_bridge.start()
+        except Exception:
+            traceback.print_exc()
+            print("⚠️ Event bridge unavailable, using in-process events only")
+            events_bridge = None
+    yield
+    if events_bridge:
+        await events_bridge.stop()
+    await get_job_workers().stop()
+    summarization_task.cancel()
+    # Only stop local model executors for services that were actually built
+    if get_voice_service.cache_info().currsize:
+        get_voice_service().shutdown()
+    if get_agent_service.cache_info().currsize:
+        get_agent_service().embedding_provider.shutdown()
+    backfill_task.cancel()
+
+
 app = FastAPI(
     title="Voice Agent API",
     description="Backend API for Voice Agent Application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# Admission control for Whisper/GPT-4o endpoints (added first so CORS wraps its 503s)
+app.add_middleware(AdmissionMiddleware)
+
+# Stage timings and sampled stacks for slow requests (wraps admission, so queueing time counts)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# gzip/brotli for large JSON, MessagePack and Arrow bodies (SSE is passed through)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +111,9 @@ app.include_router(notes.router)
 app.include_router(reminders.router)
 app.include_router(agent.router)
 app.include_router(admin.router)
+app.include_router(entries.router)
+app.include_router(sync.router)
+app.include_router(events.router)
 
 @app.get("/")
 async def root():
@@ -75,9 +75,61 @@ class AgentResponse(BaseModel):
     is_complete: bool = Field(description="False if the instruction is missing details")
     clarification_question: Optional[str] = Field(default=None, description="Question to ask if is_complete is False")
 
+class AgentBatchResult(AgentResponse):
+    """One classified input in a batch call, keyed by its position in the request"""
+    index: int = Field(description="The index of the input this result belongs to")
+
+class AgentBatchResponse(BaseModel):
+    """Structured output of a batch classification call"""
+    results: list[AgentBatchResult]
+
+class EntrySummary(BaseModel):
+    """One summarized entry in a batch summarization call"""
+    id: str
+    summary: str = Field(description="One-sentence summary of the entry, at most 20 words")
+
+class EntrySummaryBatch(BaseModel):
+    """Structured output of a batch summarization call"""
+    summaries: list[EntrySummary]
+
 class AgentClassifyRequest(BaseModel):
     """Request schema for agent classification endpoint"""
     text: str = Field(description="The transcribed text to classify")
     context_vars: Optional[dict] = Field(default_factory=dict, description="Global context variables")
 
+class AgentClassifyBatchRequest(BaseModel):
+    """Request schema for batch classification (imports, bulk jobs)"""
+    texts: list[str] = Field(min_length=1, max_length=500, description="Transcribed texts to classify")
+    context_vars: Optional[dict] = Field(default_factory=dict, description="Global context variables shared by all texts")
+
+
+
+# Entry Schemas
+class Entry(BaseModel):
+    """An entry row as returned by the entries endpoints"""
+    id: str
+    user_id: str
+    content: str
+    summary: Optional[str] = None
+    intent: str
+    category: Optional[str] = None
+    category_id: Optional[str] = None
+    duplicate_count: int = 0
+    created_at: datetime
+    updated_at: datetime
+    embedding: Optional[list[float]] = None
+
+class EntryList(BaseModel):
+    """Paginated list of entries"""
+    entries: list[Entry]
+    limit: int
+    offset: int
 
+class EntryRollup(BaseModel):
+    """Precomputed digest of a user's entries in one category or ISO week"""
+    scope: Literal['category', 'week']
+    scope_key: str
+    digest: str
+    entry_count: int
+    last_entry_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
@@ -1,7 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import EmailStr
-from app.core.auth import get_current_user, supabase
-from typing import List
+from app.core.auth import get_admin_user, get_current_user, get_supabase
+from app.core import import_profiler, singleflight
+from app.core.profiling import profile_buffer
+from app.services.providers import get_agent_service, get_archive_service, get_backfill_job, get_db_service, get_voice_service
+from app.services.response_cache import response_cache, cached_response, GLOBAL_SCOPE
+from app.services.event_bus import event_bus
+from app.services.idempotency import idempotency_store
+from app.services.summarization import summarization_worker
+from app.core.admission import voice_limiter, agent_limiter, memory_budget
+from app.core.config import settings
+from typing import List, Literal, Optional
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -13,7 +23,8 @@ async def invite_user(email: EmailStr, user: dict = Depends(get_current_user)):
     In a real app, you would add a check for admin roles here.
     """
     try:
-        result = supabase.table("invitations").insert({"email": email, "invited_by": user.id}).execute()
+        result = get_supabase().table("invitations").insert({"email": email, "invited_by": user.id}).execute()
+        response_cache.bump(GLOBAL_SCOPE, "invitations")
         return {"message": f"Successfully invited {email}"}
     except Exception as e:
         if "duplicate key" in str(e).lower():
@@ -21,13 +32,16 @@ async def invite_user(email: EmailStr, user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/invitations")
-async def list_invitations(user: dict = Depends(get_current_user)):
+async def list_invitations(request: Request, user: dict = Depends(get_current_user)):
     """
     List all invited emails.
     """
-    try:
-        result = supabase.table("invitations").select("*").execute()
+    async def load():
+        result = get_supabase().table("invitations").select("*").execute()
         return result.data
+    
+    try:
+        return await cached_response(request, GLOBAL_SCOPE, "invitations", {}, load)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -37,7 +51,155 @@ async def remove_invitation(email: str, user: dict = Depends(get_current_user)):
     Remove an invitation.
     """
     try:
-        result = supabase.table("invitations").delete().eq("email", email).execute()
+        result = get_supabase().table("invitations").delete().eq("email", email).execute()
+        response_cache.bump(GLOBAL_SCOPE, "invitations")
         return {"message": f"Removed invitation for {email}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/embeddings/backfill", status_code=202)
+async def start_embedding_backfill(
+    background_tasks: BackgroundTasks,
+    max_batches: Optional[int] = None,
+    reset: bool = False,
+    user: dict = Depends(get_admin_user)
+):
+    """
+    Start (or resume) the embedding backfill job in the background (admins only).
+    Embeds entries with no embedding or one from an outdated model.
+    """
+    backfill_job = get_backfill_job()
+    if backfill_job.running:
+        raise HTTPException(status_code=409, detail="Embedding backfill is already running")
+    background_tasks.add_task(backfill_job.run, max_batches, reset)
+    return {"message": "Embedding backfill started", "status": backfill_job.status}
+
+@router.get("/embeddings/backfill")
+async def get_embedding_backfill_status(user: dict = Depends(get_current_user)):
+    """
+    Get progress of the embedding backfill job.
+    """
+    backfill_job = get_backfill_job()
+    return {"running": backfill_job.running, "status": backfill_job.status}
+
+@router.get("/prompt-cache")
+async def get_prompt_cache_stats(user: dict = Depends(get_current_user)):
+    """
+    Provider-side prompt cache effectiveness for agent completions in this worker.
+    """
+    from app.services.agent_service import prompt_cache_stats
+    return prompt_cache_stats.snapshot()
+
+@router.get("/classify-batch")
+async def get_classify_batch_stats(user: dict = Depends(get_current_user)):
+    """
+    Batch classifier counters in this worker: calls, items parsed, splits, per-item retries, fallbacks.
+    """
+    return get_agent_service().batch_stats
+
+@router.get("/partitions")
+async def get_entry_partitions(user: dict = Depends(get_admin_user)):
+    """
+    Monthly entries partitions with estimated rows and size, and which are due for archival (admins only).
+    """
+    archive = get_archive_service()
+    return {
+        "archive_after_months": settings.archive_after_months,
+        "partitions": [
+            {**row, "archivable": archive.is_cold(row, settings.archive_after_months)}
+            for row in await archive.partitions()
+        ],
+    }
+
+@router.get("/database")
+async def get_database_routing_stats(user: dict = Depends(get_current_user)):
+    """
+    Read routing in this worker: replica vs primary reads and reads pinned to the primary after a write.
+    """
+    return get_db_service().snapshot()
+
+@router.get("/singleflight")
+async def get_singleflight_stats(user: dict = Depends(get_current_user)):
+    """
+    Coalesced upstream calls per group in this worker: calls issued, callers that shared one, fan-in.
+    """
+    return singleflight.snapshot()
+
+@router.get("/admission")
+async def get_admission_stats(user: dict = Depends(get_current_user)):
+    """
+    Current load and rejection counts of the admission limiters in this worker.
+    """
+    return {
+        "limiters": [voice_limiter.snapshot(), agent_limiter.snapshot()],
+        "memory": memory_budget.snapshot()
+    }
+
+@router.get("/response-cache")
+async def get_response_cache_stats(user: dict = Depends(get_current_user)):
+    """
+    Hit/miss/304 counts of the read endpoint response cache in this worker.
+    """
+    return response_cache.snapshot()
+
+@router.get("/events")
+async def get_event_stats(user: dict = Depends(get_current_user)):
+    """
+    Connected event-stream clients and publish/delivery counts in this worker.
+    """
+    return event_bus.snapshot()
+
+@router.get("/idempotency")
+async def get_idempotency_stats(user: dict = Depends(get_current_user)):
+    """
+    Idempotent upload store in this worker: stored/in-flight results, replays, joins and key conflicts.
+    """
+    return idempotency_store.snapshot()
+
+@router.get("/transcription")
+async def get_transcription_stats(user: dict = Depends(get_current_user)):
+    """
+    Transcription backend mode and per-backend request/failure counts in this worker.
+    """
+    return get_voice_service().transcription.snapshot()
+
+@router.get("/summaries")
+async def get_summarization_stats(user: dict = Depends(get_current_user)):
+    """
+    Background summarizer queue depth and batch/rollup counters in this worker.
+    """
+    return summarization_worker.snapshot()
+
+@router.get("/profiles")
+async def list_request_profiles(user: dict = Depends(get_admin_user)):
+    """
+    Captured slow/forced request profiles in this worker, newest first (PROFILING_ENABLED=1, admins only).
+    """
+    return {**profile_buffer.snapshot(), "profiles": profile_buffer.list()}
+
+@router.get("/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    format: Literal["json", "folded"] = "json",
+    user: dict = Depends(get_admin_user)
+):
+    """
+    One captured profile: stage timings and stack samples, or the stacks alone
+    in folded format (format=folded) for flamegraph.pl / speedscope (admins only).
+    """
+    profile = profile_buffer.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(
+            profile.folded(),
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.folded"'}
+        )
+    return profile.to_dict()
+
+@router.get("/startup")
+async def get_startup_report(user: dict = Depends(get_current_user)):
+    """
+    App import time and per-module import cost (module detail requires IMPORT_PROFILE=1).
+    """
+    return import_profiler.report()
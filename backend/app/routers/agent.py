@@ -2,14 +2,16 @@
 Agent Router
 Endpoints for AI-powered intent classification and structured data extraction
 """
-from fastapi import APIRouter, HTTPException, Depends
-from ..models.schemas import AgentResponse, AgentClassifyRequest
-from ..services.agent_service import AgentService
+from fastapi import APIRouter, HTTPException, Depends, Response, Request
+from typing import Optional
+from uuid import UUID
+from ..models.schemas import AgentResponse, AgentClassifyRequest, AgentClassifyBatchRequest
+from ..services.providers import get_agent_service, get_db_service, get_session_store
+from ..services.response_cache import cached_response
 from ..core.auth import get_current_user
 import traceback
 
 router = APIRouter(prefix="/api/agent", tags=["agent"])
-agent_service = AgentService()
 
 @router.post("/classify", response_model=AgentResponse)
 async def classify_input(
@@ -40,7 +42,7 @@ async def classify_input(
         }
     """
     try:
-        result = await agent_service.classify_input(
+        result = await get_agent_service().classify_input(
             text=request.text,
             context_vars=request.context_vars
         )
@@ -49,9 +51,40 @@ async def classify_input(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Classification error: {str(e)}")
 
+@router.post("/classify-batch")
+async def classify_batch(
+    request: AgentClassifyBatchRequest,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Classify many independent inputs in one request (imports, bulk jobs)
+    
+    Inputs are packed several to a GPT-4o call, so the system prompt and
+    context are paid once per chunk rather than once per text. Results are
+    returned in input order; any input the batch call could not classify is
+    retried on its own.
+    
+    Args:
+        request: AgentClassifyBatchRequest with texts and optional shared context_vars
+    
+    Returns:
+        {"results": [AgentResponse, ...]}, one per input
+    """
+    try:
+        results = await get_agent_service().classify_batch(
+            texts=request.texts,
+            context_vars=request.context_vars
+        )
+        return {"results": results}
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Classification error: {str(e)}")
+
 @router.post("/classify-with-context", response_model=AgentResponse)
 async def classify_with_conversation_context(
     text: str,
+    response: Response,
+    session_id: Optional[UUID] = None,
     conversation_history: list[dict] = [],
     context_vars: dict = {},
     user: dict = Depends(get_current_user)
@@ -62,21 +95,76 @@ async def classify_with_conversation_context(
     This endpoint is useful when you need to maintain conversation context,
     such as follow-up clarifications or multi-turn dialogues.
     
+    History is kept server-side: omit session_id on the first turn and send
+    back the `X-Session-Id` response header on follow-ups. Older turns are
+    summarized automatically so each turn costs a bounded prompt.
+    
     Args:
         text: The current user input
-        conversation_history: Previous messages [{"role": "user"|"assistant", "content": "..."}]
+        session_id: Conversation session returned by a previous call
+        conversation_history: Deprecated - client-side history, used only when no session_id is given
         context_vars: Optional global context variables
     
     Returns:
         AgentResponse with structured classification
     """
+    agent_service = get_agent_service()
+    session_store = get_session_store()
     try:
-        result = await agent_service.classify_with_history(
-            text=text,
-            conversation_history=conversation_history,
-            context_vars=context_vars
-        )
+        # Legacy mode: the client still sends its own history
+        if conversation_history and session_id is None:
+            return await agent_service.classify_with_history(
+                text=text,
+                conversation_history=conversation_history,
+                context_vars=context_vars
+            )
+        
+        session = await session_store.get_or_create(user.id, str(session_id) if session_id else None)
+        async with session_store.lock(session.id):
+            result = await agent_service.classify_with_history(
+                text=text,
+                conversation_history=session.history(),
+                context_vars=context_vars
+            )
+            await session_store.append_turn(
+                session,
+                user_text=text,
+                assistant_text=result.model_dump_json(exclude_none=True)
+            )
+        response.headers["X-Session-Id"] = session.id
         return result
+    except PermissionError:
+        raise HTTPException(status_code=404, detail="Session not found")
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Classification error: {str(e)}")
+
+@router.delete("/sessions/{session_id}")
+async def end_conversation_session(
+    session_id: UUID,
+    user: dict = Depends(get_current_user)
+):
+    """
+    End a conversation session and discard its history
+    """
+    session_store = get_session_store()
+    session = await session_store.get(str(session_id))
+    if not session or session.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Session not found")
+    await session_store.delete(session.id)
+    return {"message": "Session ended", "session_id": session.id}
+
+@router.get("/context")
+async def get_global_context(
+    request: Request,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Get the user's global context variables (as passed to classification)
+    
+    Served from the per-user response cache with ETag support.
+    """
+    return await cached_response(
+        request, user.id, "global_context", {},
+        lambda: get_db_service().get_all_global_context(user.id)
+    )
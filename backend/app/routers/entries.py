@@ -0,0 +1,127 @@
+"""
+Entries API Router
+Read access to a user's entries (notes, reminders) with the fast JSON path
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Optional, Literal
+from uuid import UUID
+from ..core.auth import get_current_user
+from ..core.responses import dump_trusted, parse_embedding
+from ..core.wire import encode_rows, negotiate
+from ..models.schemas import Entry, EntryList
+from ..services.database_service import ENTRY_COLUMNS
+from ..services.providers import get_db_service, get_export_service
+from ..services.response_cache import cached_response
+
+router = APIRouter(prefix="/api/entries", tags=["entries"])
+
+@router.get("/", response_model=EntryList)
+async def list_entries(
+    request: Request,
+    intent: Optional[Literal["NOTE", "REMINDER"]] = None,
+    category_id: Optional[UUID] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    include_embedding: bool = False,
+    user: dict = Depends(get_current_user)
+):
+    """
+    List entries, newest first
+    
+    created_after / created_before limit the listing to a time range; only
+    the monthly partitions inside it are read.
+    
+    Rows come straight from the database, so they are projected onto the
+    Entry schema without re-validation and encoded with orjson. Embeddings
+    are only fetched (and emitted as float arrays) with include_embedding=true.
+    
+    Clients sending `Accept: application/msgpack` get MessagePack with each
+    embedding as a little-endian float32 buffer; `Accept:
+    application/vnd.apache.arrow.stream` returns an Arrow IPC stream for
+    bulk reads. JSON remains the default.
+    """
+    columns = f"{ENTRY_COLUMNS}, embedding" if include_embedding else ENTRY_COLUMNS
+    rows = await get_db_service().get_entries(
+        user.id,
+        intent=intent,
+        limit=limit,
+        offset=offset,
+        columns=columns,
+        category_id=str(category_id) if category_id else None,
+        created_after=created_after,
+        created_before=created_before
+    )
+    
+    if include_embedding:
+        for row in rows:
+            row["embedding"] = parse_embedding(row.get("embedding"))
+    entries = dump_trusted(Entry, rows, exclude=None if include_embedding else {"embedding"})
+    
+    # Returning a Response skips FastAPI's response_model validation pass
+    return encode_rows(negotiate(request), entries, {"limit": limit, "offset": offset})
+
+@router.get("/export")
+async def export_entries(
+    format: Literal["ndjson", "parquet"] = "ndjson",
+    include_embedding: bool = False,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Export every entry with its reminders
+    
+    The body is streamed page by page (keyset pagination), so large
+    accounts are never materialized in memory. With include_embedding=true
+    each vector is written as little-endian float32 bytes (base64 in NDJSON,
+    a binary column in Parquet).
+    """
+    from ..services import export_service
+    
+    exporter = get_export_service()
+    if format == "parquet":
+        if export_service.pyarrow is None:
+            raise HTTPException(status_code=501, detail="Parquet export is not available on this server")
+        body = exporter.stream_parquet(user.id, include_embedding)
+        media_type, extension = export_service.PARQUET, "parquet"
+    else:
+        body = exporter.stream_ndjson(user.id, include_embedding)
+        media_type, extension = export_service.NDJSON, "ndjson"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="entries.{extension}"'}
+    )
+
+@router.get("/rollups")
+async def list_rollups(
+    request: Request,
+    scope: Optional[Literal["category", "week"]] = None,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Precomputed digests of the user's entries per category and per ISO week
+    
+    Digests are maintained by the background summarizer and only change
+    when new entries are summarized.
+    """
+    async def load():
+        return {"rollups": await get_db_service().get_rollups(user.id, scope)}
+    
+    return await cached_response(request, user.id, "rollups", {"scope": scope}, load)
+
+@router.get("/categories")
+async def list_categories(
+    request: Request,
+    user: dict = Depends(get_current_user)
+):
+    """
+    The user's category registry, most used first (use `id` as category_id filter)
+    """
+    async def load():
+        return {"categories": await get_db_service().get_categories(user.id)}
+    
+    return await cached_response(request, user.id, "categories", {}, load)
@@ -0,0 +1,54 @@
+"""
+Events API Router
+Server-sent events pushing per-user change notifications to the UI
+"""
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from ..core.auth import get_current_user_from_query
+from ..core.config import settings
+from ..services.event_bus import event_bus
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+@router.get("/")
+async def stream_events(
+    request: Request,
+    user: dict = Depends(get_current_user_from_query)
+):
+    """
+    Stream change events for the current user (text/event-stream)
+    
+    Each `change` event carries {"resource", "op", "id"}; clients refetch
+    or sync the affected rows. A `resync` event means events were dropped
+    while the client lagged, so it should run a full /api/sync. Pass the
+    JWT as `access_token` when using the browser EventSource API.
+    """
+    subscription = event_bus.subscribe(user.id)
+    
+    async def generate():
+        try:
+            # Tells EventSource how long to wait before reconnecting
+            yield b"retry: 3000\n\n"
+            while not await request.is_disconnected():
+                events = await subscription.get(timeout=settings.events_heartbeat_seconds)
+                if events is None:
+                    # Keep proxies from closing an idle connection
+                    yield b": keep-alive\n\n"
+                    continue
+                for event in events:
+                    if event["resource"] == "resync":
+                        yield b"event: resync\ndata: {}\n\n"
+                    else:
+                        yield f"event: change\ndata: {json.dumps(event)}\n\n".encode()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
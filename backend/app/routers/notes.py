@@ -2,23 +2,33 @@
 Notes API Router
 Handles note creation, retrieval, and management
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from typing import List, Optional
 from ..core.auth import get_current_user
+from ..services.database_service import ENTRY_COLUMNS
+from ..services.providers import get_db_service
+from ..services.response_cache import cached_response
 
 router = APIRouter(prefix="/api/notes", tags=["notes"])
 
 @router.get("/")
 async def get_notes(
+    request: Request,
     skip: int = 0, 
     limit: int = 100,
     user: dict = Depends(get_current_user)
 ):
     """
     Get all notes
+    
+    Served from the per-user response cache; send If-None-Match with the
+    previous ETag to get a 304 when nothing changed.
     """
-    # TODO: Implement database query
-    return {"notes": [], "skip": skip, "limit": limit}
+    async def load():
+        notes = await get_db_service().get_entries(user.id, intent="NOTE", limit=limit, offset=skip, columns=ENTRY_COLUMNS)
+        return {"notes": notes, "skip": skip, "limit": limit}
+    
+    return await cached_response(request, user.id, "entries", {"intent": "NOTE", "skip": skip, "limit": limit}, load)
 
 @router.post("/")
 async def create_note(
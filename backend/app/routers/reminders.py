@@ -2,24 +2,35 @@
 Reminders API Router
 Handles reminder creation, retrieval, and management
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from typing import List, Optional
 from datetime import datetime
 from ..core.auth import get_current_user
+from ..services.providers import get_db_service
+from ..services.response_cache import cached_response
 
 router = APIRouter(prefix="/api/reminders", tags=["reminders"])
 
 @router.get("/")
 async def get_reminders(
+    request: Request,
     skip: int = 0, 
     limit: int = 100,
+    status: Optional[str] = None,
     user: dict = Depends(get_current_user)
 ):
     """
     Get all reminders
+    
+    Served from the per-user response cache; send If-None-Match with the
+    previous ETag to get a 304 when nothing changed.
     """
-    # TODO: Implement database query
-    return {"reminders": [], "skip": skip, "limit": limit}
+    async def load():
+        reminders = await get_db_service().get_reminders(user.id, status=status, limit=skip + limit)
+        return {"reminders": reminders[skip:], "skip": skip, "limit": limit}
+    
+    params = {"skip": skip, "limit": limit, "status": status}
+    return await cached_response(request, user.id, "reminders", params, load)
 
 @router.post("/")
 async def create_reminder(
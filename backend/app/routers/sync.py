@@ -0,0 +1,31 @@
+"""
+Sync API Router
+Incremental sync for clients that keep a local replica (PWA offline cache)
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from ..core.auth import get_current_user
+from ..services.providers import get_sync_service
+
+router = APIRouter(prefix="/api/sync", tags=["sync"])
+
+@router.get("/")
+async def sync(
+    since: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Get entries, reminders and global context changed since a sync token
+    
+    Omit `since` for the initial snapshot. Store `next` and send it as
+    `since` on the following call; while `has_more` is true, call again
+    immediately. Rows under `deleted` must be removed locally (deleting an
+    entry also removes its reminders). `reset: true` means the token was
+    too old and the response is a full snapshot replacing the replica.
+    """
+    from ..services.sync_service import InvalidSyncToken
+    
+    try:
+        return await get_sync_service().changes(user.id, since)
+    except InvalidSyncToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -2,18 +2,26 @@
 Voice API Router
 Handles voice recording and transcription endpoints
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+import asyncio
+from typing import Literal, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Header, Response
+from fastapi.responses import JSONResponse
 from app.models.schemas import TranscriptionResponse, AgentResponse
-from app.services.voice_service import VoiceService
-from app.services.agent_service import AgentService
-from app.services.database_service import DatabaseService
+from app.core.config import settings
+from app.services.idempotency import IdempotencyConflict, audio_fingerprint, idempotency_store
+from app.services.job_queue import QueueFullError, new_job
+from app.services.providers import get_voice_service, get_voice_pipeline, get_job_queue
 from app.core.auth import get_current_user
 import traceback
 
 router = APIRouter(prefix="/api/voice", tags=["voice"])
-voice_service = VoiceService()
-agent_service = AgentService()
-db_service = DatabaseService()
+
+async def _read_upload(file: UploadFile) -> bytes:
+    """Read an upload into memory, refusing anything over max_upload_bytes"""
+    audio_content = await file.read(settings.max_upload_bytes + 1)
+    if len(audio_content) > settings.max_upload_bytes:
+        raise HTTPException(status_code=413, detail=f"Request body exceeds {settings.max_upload_bytes} bytes")
+    return audio_content
 
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
@@ -23,15 +31,20 @@ async def transcribe_audio(
     """
     Transcribe audio file to text
     """
+    audio_content = await _read_upload(file)
     try:
-        return await voice_service.transcribe_audio(file)
+        return await get_voice_service().transcribe_bytes(audio_content, file.filename, file.content_type)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
 
 @router.post("/process", response_model=AgentResponse)
 async def process_voice_command(
+    response: Response,
     file: UploadFile = File(...),
+    mode: Literal["sync", "async"] = "sync",
+    priority: Literal["high", "normal", "low"] = "normal",
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
     user: dict = Depends(get_current_user)
 ):
     """
@@ -41,34 +54,64 @@ async def process_voice_command(
     1. Transcribe audio to text
     2. Pass transcribed text to Agent Classify Intent Service
     3. Return AgentResponse with structured classification
+    
+    With mode=async the audio is queued and 202 is returned immediately with
+    a job id; poll GET /api/voice/jobs/{job_id} (optionally long-polling with
+    `wait`) for the AgentResponse.
+    
+    Retries are idempotent: send an `Idempotency-Key` header (or re-send the
+    same audio) and the original result is returned with
+    `Idempotent-Replayed: true` instead of creating another entry. A retry
+    that arrives while the first request is still running waits for it.
     """
+    audio_content = await _read_upload(file)
     try:
-        # Step 1: Transcribe audio
-        transcription = await voice_service.transcribe_audio(file)
-        
-        # Step 2: Classify intent using Agent Service
-        agent_response = await agent_service.classify_input(
-            text=transcription.text,
-            context_vars=None
-        )
+        async def run():
+            if mode == "async":
+                job = new_job(user.id, priority, file.filename, file.content_type)
+                await get_job_queue().enqueue(job, audio_content)
+                return {**job.to_public(), "status_url": f"{router.prefix}/jobs/{job.id}"}
+            return await get_voice_pipeline().process(user.id, audio_content, file.filename, file.content_type)
         
-        # Step 3: Automatically save if it's a NOTE
-        if agent_response.intent == 'NOTE':
-            # Generate embedding for the cleaned content
-            embedding = await agent_service.get_embedding(agent_response.content)
-            
-            await db_service.create_entry(
-                user_id=user.id,
-                content=agent_response.content,
-                intent='NOTE',
-                category=agent_response.category,
-                embedding=embedding
-            )
+        if idempotency_key or settings.idempotency_hash_audio:
+            fingerprint = await asyncio.to_thread(audio_fingerprint, audio_content)
+            key = idempotency_store.key(user.id, f"process.{mode}", idempotency_key, fingerprint)
+            result, replayed = await idempotency_store.run(key, fingerprint, run)
+        else:
+            result, replayed = await run(), False
         
-        # Step 4: Return AgentResponse
-        return agent_response
+        headers = {"Idempotent-Replayed": "true"} if replayed else {}
+        if mode == "async":
+            return JSONResponse(status_code=202, content=result, headers=headers)
+        response.headers.update(headers)
+        return result
         
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Voice processing queue is full, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Voice processing failed: {str(e)}")
 
+@router.get("/jobs/{job_id}")
+async def get_voice_job(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, le=30, description="Long-poll up to this many seconds for completion"),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Get the status (and, once finished, the AgentResponse) of a queued voice job
+    """
+    job_queue = get_job_queue()
+    job = await job_queue.get(job_id)
+    if not job or job.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = await job_queue.wait(job_id, wait)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_public()
@@ -3,23 +3,23 @@ Agent Service - Intelligence Layer
 Handles intent classification and structured data extraction using OpenAI GPT-4o
 """
 import openai
+import asyncio
+import json
 from datetime import datetime
+from string import Template
 from typing import Optional
 import traceback
 from ..core.config import settings
-from ..models.schemas import AgentResponse
+from ..core.singleflight import get_group
+from ..models.schemas import AgentResponse, AgentBatchResponse, EntrySummaryBatch
+from .embeddings import build_embedding_provider
+from .resilience import ResilientCaller, CircuitOpenError, get_breaker
 
-class AgentService:
-    """Service for AI-powered intent classification and data extraction"""
-    
-    def __init__(self):
-        self.client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
-        self.model = "gpt-4o"
-        self.system_prompt = self._build_system_prompt()
-    
-    def _build_system_prompt(self) -> str:
-        """Build the system prompt for the AI agent"""
-        return """You are a helpful assistant that classifies user voice input and extracts structured data.
+# Prompt layout is ordered for provider-side prefix caching: the static system
+# prompt first, then the (sorted, canonical) per-user context, then history,
+# and only then the parts that change on every call (time block + user text).
+# Templates are compiled once at import.
+SYSTEM_PROMPT = """You are a helpful assistant that classifies user voice input and extracts structured data.
 
 Your tasks:
 1. Determine the INTENT:
@@ -51,6 +51,113 @@ Important date resolution examples:
 - "next week" → 7 days from now
 
 Always be helpful and precise."""
+
+CONTEXT_TEMPLATE = Template("Global context:\n$context")
+USER_TEMPLATE = Template("""Current date: $date ($weekday)
+Current time: $time
+
+User input: "$text"
+""")
+
+# Batch classification: a second static system message keeps the cached prefix
+# (system prompt + instruction) identical across batch calls
+BATCH_INSTRUCTION = """You will receive several independent user inputs, one JSON object per line: {"index": N, "text": "..."}.
+Apply the tasks above to each input on its own; inputs do not share context with each other.
+Return exactly one result per input in `results`, carrying the input's index."""
+BATCH_USER_TEMPLATE = Template("""Current date: $date ($weekday)
+Current time: $time
+
+User inputs:
+$inputs
+""")
+
+# Rough output cost of one result (field names, intent, category, dates) on top of its content
+_BATCH_RESULT_OVERHEAD_TOKENS = 60
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for batch sizing"""
+    return len(text) // 4 + 1
+
+
+def canonicalize_context(context_vars: dict) -> str:
+    """
+    Render context variables deterministically: keys sorted, values normalized,
+    so identical context always produces an identical (cacheable) prompt prefix
+    """
+    lines = []
+    for key in sorted(context_vars, key=lambda k: str(k).strip()):
+        value = context_vars[key]
+        if not isinstance(value, str):
+            value = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+        lines.append(f"- {str(key).strip()}: {' '.join(value.split())}")
+    return "\n".join(lines)
+
+
+class PromptCacheStats:
+    """Provider prompt-cache effectiveness, from usage.prompt_tokens_details"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+    
+    def record(self, usage):
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+        self.requests += 1
+        self.prompt_tokens += usage.prompt_tokens or 0
+        self.cached_tokens += cached
+        if cached:
+            self.hits += 1
+    
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.requests if self.requests else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_token_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+        }
+
+
+prompt_cache_stats = PromptCacheStats()
+
+class AgentService:
+    """Service for AI-powered intent classification and data extraction"""
+    
+    def __init__(self):
+        # Retries are handled by the resilience layer, not the SDK
+        self.client = openai.AsyncOpenAI(api_key=settings.openai_api_key, max_retries=0)
+        self.model = "gpt-4o"
+        self.summary_model = "gpt-4o-mini"
+        hedge_delay = settings.openai_hedge_delay_seconds or None
+        self.chat_caller = ResilientCaller(
+            "openai.chat",
+            timeout=settings.openai_chat_timeout_seconds,
+            max_retries=settings.openai_max_retries,
+            hedge_delay=hedge_delay,
+            breaker=get_breaker("openai.chat", settings.breaker_failure_threshold, settings.breaker_reset_seconds),
+        )
+        self.embedding_caller = ResilientCaller(
+            "openai.embeddings",
+            timeout=settings.openai_embedding_timeout_seconds,
+            max_retries=settings.openai_max_retries,
+            hedge_delay=hedge_delay,
+            breaker=get_breaker("openai.embeddings", settings.breaker_failure_threshold, settings.breaker_reset_seconds),
+        )
+        # OpenAI or local ONNX encoder (settings.embedding_provider)
+        self.embedding_provider = build_embedding_provider(self.client, self.embedding_caller)
+        self.batch_stats = {"calls": 0, "items": 0, "splits": 0, "item_retries": 0, "fallbacks": 0}
+    
+    @property
+    def embedding_model(self) -> str:
+        """Model name stored with each vector (entries.embedding_model)"""
+        return self.embedding_provider.model_name
     
     async def classify_input(
         self,
@@ -67,115 +174,389 @@ Always be helpful and precise."""
         Returns:
             AgentResponse with structured classification and extraction
         """
-        if context_vars is None:
-            context_vars = {}
+        messages = self._build_messages(text, context_vars)
+        return await self._parse_or_fallback(text, messages)
+    
+    async def classify_with_history(
+        self,
+        text: str,
+        conversation_history: list[dict],
+        context_vars: Optional[dict] = None
+    ) -> AgentResponse:
+        """
+        Classify input with conversation history for context-aware processing
         
-        # Build user message with current datetime and context
-        current_time = datetime.now()
-        user_message = f"""Current datetime: {current_time.isoformat()}
-
-User input: "{text}"
-"""
+        Args:
+            text: The current user input
+            conversation_history: List of previous messages [{"role": "user"|"assistant", "content": "..."}]
+            context_vars: Optional global context variables
         
-        # Add context variables if provided
+        Returns:
+            AgentResponse with structured classification
+        """
+        messages = self._build_messages(text, context_vars, conversation_history)
+        return await self._parse_or_fallback(text, messages)
+    
+    def _build_messages(
+        self,
+        text: str,
+        context_vars: Optional[dict] = None,
+        conversation_history: Optional[list[dict]] = None
+    ) -> list[dict]:
+        """
+        Build the chat messages in cache-friendly order:
+        static system prompt -> canonical context -> history -> time block + user text
+        """
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
         if context_vars:
-            context_str = "\n".join([f"- {key}: {value}" for key, value in context_vars.items()])
-            user_message += f"\nGlobal context:\n{context_str}\n"
+            messages.append({
+                "role": "system",
+                "content": CONTEXT_TEMPLATE.substitute(context=canonicalize_context(context_vars))
+            })
+        if conversation_history:
+            messages.extend(conversation_history)
         
+        messages.append({
+            "role": "user",
+            "content": USER_TEMPLATE.substitute(text=text, **self._time_block())
+        })
+        return messages
+    
+    @staticmethod
+    def _time_block() -> dict:
+        """Date/time fields for the user message"""
+        # Minute resolution is enough for date resolution and keeps the tail stable
+        now = datetime.now().astimezone()
+        return {
+            "date": now.strftime("%Y-%m-%d"),
+            "weekday": now.strftime("%A"),
+            "time": now.strftime("%H:%M %z"),
+        }
+    
+    async def _parse_or_fallback(self, text: str, messages: list[dict]) -> AgentResponse:
+        """
+        Run a structured-output completion through the resilience layer,
+        degrading to the local heuristic classifier if the upstream is unavailable
+        """
         try:
             # Use OpenAI's structured output with response_format parameter (async)
-            completion = await self.client.beta.chat.completions.parse(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                response_format=AgentResponse,
+            completion = await self.chat_caller.call(
+                lambda: self.client.beta.chat.completions.parse(
+                    model=self.model,
+                    messages=messages,
+                    response_format=AgentResponse,
+                )
             )
             
+            prompt_cache_stats.record(completion.usage)
+            
             # Extract the parsed response
             agent_response = completion.choices[0].message.parsed
-            
+            if agent_response is None:
+                raise ValueError("Model returned no parsed response")
             return agent_response
             
+        except CircuitOpenError:
+            # Fast path: don't wait on an upstream we already know is down
+            return self._local_classify(text)
         except Exception as e:
-            # Fallback response in case of error
             traceback.print_exc()
-            return AgentResponse(
-                intent='NOTE',
-                content=text,
-                category='Uncategorized',
-                due_date=None,
-                is_complete=False,
-                clarification_question="I encountered an error processing your request. Could you please rephrase?"
-            )
+            return self._local_classify(text)
     
-    async def classify_with_history(
+    async def classify_batch(
         self,
-        text: str,
-        conversation_history: list[dict],
+        texts: list[str],
         context_vars: Optional[dict] = None
-    ) -> AgentResponse:
+    ) -> list[AgentResponse]:
         """
-        Classify input with conversation history for context-aware processing
+        Classify many independent inputs, several per structured-output call
+        
+        Inputs are packed into chunks bounded by classify_batch_max_items and
+        an estimated token budget, so the system prompt and context are sent
+        once per chunk instead of once per input. A chunk that hits the
+        output limit or fails to parse is split in half and retried; inputs
+        the model skips are retried one at a time through classify_input.
         
         Args:
-            text: The current user input
-            conversation_history: List of previous messages [{"role": "user"|"assistant", "content": "..."}]
-            context_vars: Optional global context variables
+            texts: Transcribed texts, classified independently
+            context_vars: Optional global context shared by all inputs
         
         Returns:
-            AgentResponse with structured classification
+            One AgentResponse per input, in input order
         """
-        if context_vars is None:
-            context_vars = {}
+        results: list[Optional[AgentResponse]] = [None] * len(texts)
+        # Bounds every upstream call, including split retries and per-item retries
+        semaphore = asyncio.Semaphore(settings.classify_batch_concurrency)
+        await asyncio.gather(*(
+            self._classify_chunk(indices, texts, context_vars, results, semaphore)
+            for indices in self._chunk_batch(texts)
+        ))
+        return results
+    
+    def _chunk_batch(self, texts: list[str]) -> list[list[int]]:
+        """Greedy packing of input indices under the item and token limits"""
+        chunks: list[list[int]] = []
+        current: list[int] = []
+        budget = 0
+        for i, text in enumerate(texts):
+            cost = estimate_tokens(text) + _BATCH_RESULT_OVERHEAD_TOKENS
+            if current and (len(current) >= settings.classify_batch_max_items or budget + cost > settings.classify_batch_max_input_tokens):
+                chunks.append(current)
+                current, budget = [], 0
+            current.append(i)
+            budget += cost
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    async def _classify_chunk(
+        self,
+        indices: list[int],
+        texts: list[str],
+        context_vars: Optional[dict],
+        results: list[Optional[AgentResponse]],
+        semaphore: asyncio.Semaphore
+    ):
+        """Classify one chunk into `results`, splitting it on length/parse failures"""
+        if len(indices) == 1:
+            self.batch_stats["item_retries"] += 1
+            async with semaphore:
+                results[indices[0]] = await self.classify_input(texts[indices[0]], context_vars)
+            return
         
-        current_time = datetime.now()
-        user_message = f"""Current datetime: {current_time.isoformat()}
-
-User input: "{text}"
-"""
+        try:
+            async with semaphore:
+                parsed = await self._parse_batch(indices, texts, context_vars)
+        except CircuitOpenError:
+            self.batch_stats["fallbacks"] += len(indices)
+            for i in indices:
+                results[i] = self._local_classify(texts[i])
+            return
+        except (openai.LengthFinishReasonError, openai.BadRequestError, ValueError):
+            # Output truncated, context too long or unparseable: halve and retry
+            traceback.print_exc()
+            self.batch_stats["splits"] += 1
+            middle = len(indices) // 2
+            await asyncio.gather(
+                self._classify_chunk(indices[:middle], texts, context_vars, results, semaphore),
+                self._classify_chunk(indices[middle:], texts, context_vars, results, semaphore),
+            )
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self.batch_stats["fallbacks"] += len(indices)
+            for i in indices:
+                results[i] = self._local_classify(texts[i])
+            return
         
-        if context_vars:
-            context_str = "\n".join([f"- {key}: {value}" for key, value in context_vars.items()])
-            user_message += f"\nGlobal context:\n{context_str}\n"
+        missing = [i for i in indices if i not in parsed]
+        for i, response in parsed.items():
+            results[i] = response
+        if missing:
+            await asyncio.gather(*(
+                self._classify_chunk([i], texts, context_vars, results, semaphore) for i in missing
+            ))
+    
+    async def _parse_batch(
+        self,
+        indices: list[int],
+        texts: list[str],
+        context_vars: Optional[dict]
+    ) -> dict[int, AgentResponse]:
+        """
+        One structured-output call for a chunk
         
-        # Build messages with history
-        messages = [{"role": "system", "content": self.system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": user_message})
+        Returns {input index: AgentResponse}; indices the model skipped,
+        invented or repeated are left out. Errors are raised to the caller.
+        """
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": BATCH_INSTRUCTION},
+        ]
+        if context_vars:
+            messages.append({
+                "role": "system",
+                "content": CONTEXT_TEMPLATE.substitute(context=canonicalize_context(context_vars))
+            })
+        listing = "\n".join(
+            json.dumps({"index": i, "text": texts[i]}, ensure_ascii=False)
+            for i in indices
+        )
+        messages.append({
+            "role": "user",
+            "content": BATCH_USER_TEMPLATE.substitute(inputs=listing, **self._time_block())
+        })
         
-        try:
-            completion = await self.client.beta.chat.completions.parse(
+        self.batch_stats["calls"] += 1
+        completion = await self.chat_caller.call(
+            lambda: self.client.beta.chat.completions.parse(
                 model=self.model,
                 messages=messages,
-                response_format=AgentResponse,
+                response_format=AgentBatchResponse,
             )
-            
-            agent_response = completion.choices[0].message.parsed
-            return agent_response
-            
+        )
+        prompt_cache_stats.record(completion.usage)
+        parsed = completion.choices[0].message.parsed
+        if parsed is None:
+            raise ValueError("Model returned no parsed response")
+        
+        wanted = set(indices)
+        results: dict[int, AgentResponse] = {}
+        seen: set[int] = set()
+        for item in parsed.results:
+            if item.index in seen:
+                # Two answers for one input: trust neither
+                results.pop(item.index, None)
+                continue
+            seen.add(item.index)
+            if item.index in wanted:
+                results[item.index] = AgentResponse(**item.model_dump(exclude={"index"}))
+        self.batch_stats["items"] += len(results)
+        return results
+    
+    def _local_classify(self, text: str) -> AgentResponse:
+        """
+        Cheap keyword-based classification used when GPT-4o is unavailable.
+        The guess is never marked complete, so the user confirms (or retries)
+        before a raw transcript is saved as an entry.
+        """
+        lowered = text.strip().lower()
+        if lowered.startswith(("remind me", "don't forget", "do not forget", "todo", "to do")):
+            intent = 'REMINDER'
+        elif lowered.endswith("?") or lowered.startswith(("what", "when", "where", "who", "why", "how", "which", "do i", "did i")):
+            intent = 'QUERY'
+        else:
+            intent = 'NOTE'
+        
+        return AgentResponse(
+            intent=intent,
+            content=text,
+            category='Uncategorized',
+            due_date=None,
+            is_complete=False,
+            clarification_question="I couldn't fully process that right now. Could you try again in a moment?"
+        )
+    
+    async def summarize_conversation(self, previous_summary: Optional[str], turns: list[dict]) -> str:
+        """
+        Fold older conversation turns into a running summary
+        
+        Args:
+            previous_summary: Summary of turns folded earlier (if any)
+            turns: Turns to fold in [{"role": "user"|"assistant", "content": "..."}]
+        
+        Returns:
+            Updated summary; on upstream failure, a truncated plain-text fallback
+        """
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+        prompt = f"""Previous summary:
+{previous_summary or "(none)"}
+
+New conversation turns:
+{transcript}
+
+Write an updated summary of the conversation in at most 120 words. Keep facts, pending reminders, dates and open questions needed to interpret follow-up messages."""
+        
+        try:
+            completion = await self.chat_caller.call(
+                lambda: self.client.chat.completions.create(
+                    model=self.summary_model,
+                    messages=[
+                        {"role": "system", "content": "You maintain a compact running summary of a conversation between a user and a note-taking assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                )
+            )
+            prompt_cache_stats.record(completion.usage)
+            return completion.choices[0].message.content.strip()
         except Exception as e:
             traceback.print_exc()
-            return AgentResponse(
-                intent='NOTE',
-                content=text,
-                category='Uncategorized',
-                due_date=None,
-                is_complete=False,
-                clarification_question="I encountered an error processing your request. Could you please rephrase?"
+            fallback = f"{previous_summary or ''}\n{transcript}".strip()
+            return fallback[-2000:]
+    
+    async def summarize_entries(self, entries: list[dict]) -> dict[str, str]:
+        """
+        Summarize many entries in one structured-output call (background stage)
+        
+        Args:
+            entries: [{"id": "...", "content": "..."}, ...]
+        
+        Returns:
+            {entry_id: summary}; ids the model skipped are missing. Errors are
+            raised so the caller can split the batch or retry later.
+        """
+        listing = "\n".join(
+            json.dumps({"id": entry["id"], "content": entry["content"]}, ensure_ascii=False)
+            for entry in entries
+        )
+        completion = await self.chat_caller.call(
+            lambda: self.client.beta.chat.completions.parse(
+                model=self.summary_model,
+                messages=[
+                    {"role": "system", "content": "You write one-sentence summaries (at most 20 words) of a user's voice notes. Return one summary per input id, in the user's language."},
+                    {"role": "user", "content": listing}
+                ],
+                response_format=EntrySummaryBatch,
             )
+        )
+        prompt_cache_stats.record(completion.usage)
+        parsed = completion.choices[0].message.parsed
+        if parsed is None:
+            raise ValueError("Model returned no parsed response")
+        wanted = {entry["id"] for entry in entries}
+        return {item.id: item.summary.strip() for item in parsed.summaries if item.id in wanted and item.summary.strip()}
+    
+    async def fold_rollup(self, previous_digest: Optional[str], label: str, summaries: list[str]) -> str:
+        """
+        Fold newly summarized entries into a rollup digest (category or week)
+        
+        Only the new summaries are sent, so cost is proportional to new
+        entries, not to the size of the rollup. Errors are raised.
+        """
+        new_items = "\n".join(f"- {summary}" for summary in summaries)
+        prompt = f"""Digest for {label}:
+{previous_digest or "(empty)"}
+
+New entries:
+{new_items}
+
+Write the updated digest in at most 150 words. Keep concrete facts, names, dates and recurring themes; drop repetition."""
+        completion = await self.chat_caller.call(
+            lambda: self.client.chat.completions.create(
+                model=self.summary_model,
+                messages=[
+                    {"role": "system", "content": "You maintain compact digests of a user's notes, grouped by category or by week."},
+                    {"role": "user", "content": prompt}
+                ],
+            )
+        )
+        prompt_cache_stats.record(completion.usage)
+        return completion.choices[0].message.content.strip()
     
     async def get_embedding(self, text: str) -> list[float]:
         """
-        Generate embedding for text using OpenAI text-embedding-3-small
+        Generate embedding for text with the configured provider
+        
+        Returns an empty list if the provider is unavailable; callers should
+        queue the entry for embedding backfill in that case. Concurrent
+        requests for the same text share one provider call.
         """
+        async def embed() -> list[float]:
+            return (await self.embedding_provider.embed([text]))[0]
+        
         try:
-            response = await self.client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text
-            )
-            return response.data[0].embedding
+            vector = await get_group("embeddings").do((self.embedding_model, text), embed)
+            return list(vector)
+        except CircuitOpenError:
+            return []
         except Exception as e:
             traceback.print_exc()
             return []
+    
+    async def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed many texts in one provider call (used by batch jobs)
+        
+        Unlike get_embedding, errors are raised so the caller can checkpoint and stop.
+        """
+        return await self.embedding_provider.embed(texts)
@@ -0,0 +1,177 @@
+"""
+Archive Service
+Moves cold monthly entries partitions out of Postgres: each month is written
+to a zstd-compressed Parquet file in Supabase Storage, and the partition is
+dropped only after the database confirms the archived row count and that
+nothing in it changed since the file was written.
+"""
+import asyncio
+import os
+import tempfile
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from ..core.responses import parse_embedding
+from ..core.wire import pack_vector
+from .database_service import DatabaseService
+from .export_service import PARQUET
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+ARCHIVE_COLUMNS = (
+    "id, user_id, content, summary, intent, category, category_id, embedding, embedding_model, "
+    "content_simhash, duplicate_of, duplicate_count, created_at, updated_at"
+)
+
+
+def _month_after(month_start: date) -> date:
+    return date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+
+
+def _months_before(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _utc(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+class ArchiveService:
+    def __init__(self, db_service: DatabaseService, bucket: str, page_size: int = 500):
+        self.db = db_service
+        self.bucket = bucket
+        self.page_size = page_size
+
+    async def ensure_partitions(self, months_ahead: int) -> int:
+        return await self.db.ensure_entry_partitions(months_ahead)
+
+    async def partitions(self) -> List[dict]:
+        rows = await self.db.list_entry_partitions()
+        for row in rows:
+            row["month_start"] = date.fromisoformat(row["month_start"])
+        return rows
+
+    @staticmethod
+    def is_cold(partition: dict, older_than_months: int, today: Optional[date] = None) -> bool:
+        """Whether the partition's whole month ended more than `older_than_months` months ago"""
+        return partition["month_start"] < _months_before(today or datetime.now(timezone.utc).date(), older_than_months)
+
+    async def cold_partitions(self, older_than_months: int) -> List[dict]:
+        return [row for row in await self.partitions() if self.is_cold(row, older_than_months)]
+
+    def _schema(self):
+        reminder = pyarrow.struct([
+            ("id", pyarrow.string()),
+            ("due_date", pyarrow.timestamp("us", tz="UTC")),
+            ("status", pyarrow.string()),
+            ("created_at", pyarrow.timestamp("us", tz="UTC")),
+            ("updated_at", pyarrow.timestamp("us", tz="UTC")),
+        ])
+        return pyarrow.schema([
+            ("id", pyarrow.string()),
+            ("user_id", pyarrow.string()),
+            ("content", pyarrow.string()),
+            ("summary", pyarrow.string()),
+            ("intent", pyarrow.string()),
+            ("category", pyarrow.string()),
+            ("category_id", pyarrow.string()),
+            # Raw little-endian float32 bytes, 4 per dimension
+            ("embedding", pyarrow.binary()),
+            ("embedding_model", pyarrow.string()),
+            ("content_simhash", pyarrow.int64()),
+            ("duplicate_of", pyarrow.string()),
+            ("duplicate_count", pyarrow.int32()),
+            ("created_at", pyarrow.timestamp("us", tz="UTC")),
+            ("updated_at", pyarrow.timestamp("us", tz="UTC")),
+            ("reminders", pyarrow.list_(reminder)),
+        ])
+
+    @staticmethod
+    def _row(entry: dict, reminders: List[dict], names: List[str]) -> dict:
+        row = {name: entry.get(name) for name in names}
+        row["embedding"] = pack_vector(parse_embedding(entry.get("embedding")))
+        for name in ("created_at", "updated_at"):
+            if row[name]:
+                row[name] = datetime.fromisoformat(row[name])
+        row["reminders"] = []
+        for reminder in reminders:
+            item = {"id": reminder["id"], "status": reminder["status"]}
+            for name in ("due_date", "created_at", "updated_at"):
+                item[name] = datetime.fromisoformat(reminder[name]) if reminder.get(name) else None
+            row["reminders"].append(item)
+        return row
+
+    async def write_parquet(self, month_start: date, file_path: str) -> int:
+        """Write one month of entries (with their reminders) to `file_path`; returns the row count"""
+        if pyarrow is None:
+            raise RuntimeError("Archiving requires pyarrow")
+
+        schema = self._schema()
+        rows_written = 0
+        writer = pyarrow.parquet.ParquetWriter(file_path, schema, compression="zstd", compression_level=9)
+        try:
+            async for entries in self.db.iter_entries(
+                None,
+                columns=ARCHIVE_COLUMNS,
+                page_size=self.page_size,
+                created_from=_utc(month_start),
+                created_before=_utc(_month_after(month_start)),
+                primary=True
+            ):
+                reminders = await self.db.get_reminders_for_entries([entry["id"] for entry in entries], primary=True)
+                by_entry: dict[str, list] = {}
+                for reminder in reminders:
+                    by_entry.setdefault(reminder["entry_id"], []).append(reminder)
+                rows = [self._row(entry, by_entry.get(entry["id"], []), schema.names) for entry in entries]
+                await asyncio.to_thread(writer.write_table, pyarrow.Table.from_pylist(rows, schema=schema))
+                rows_written += len(rows)
+        finally:
+            writer.close()
+        return rows_written
+
+    async def archive_partition(self, partition: dict, dry_run: bool = False, allow_pending: bool = False) -> dict:
+        """
+        Archive one partition: fingerprint -> Parquet -> Storage -> verified drop
+
+        The fingerprint is taken before the file is written and checked again
+        under lock by the drop, so a write that lands in between (and may be
+        missing from the file) aborts the drop. Partitions with pending
+        reminders are skipped ("skipped" in the report) unless allow_pending;
+        the drop re-checks that too.
+
+        With dry_run the file is written and measured but nothing is uploaded
+        or dropped. If anything fails before the drop, the partition is left
+        untouched and the run can simply be repeated.
+        """
+        name = partition["partition_name"]
+        month_start = partition["month_start"]
+        path = f"entries/{month_start:%Y/%m}/{name}.parquet"
+        state = await self.db.get_entry_partition_fingerprint(name)
+        pending = state["pending_reminders"] or 0
+        if pending and not allow_pending and not dry_run:
+            return {"partition": name, "rows": 0, "pending_reminders": pending, "path": path, "dropped": False, "skipped": True}
+        fd, file_path = tempfile.mkstemp(suffix=".parquet")
+        os.close(fd)
+        try:
+            rows = await self.write_parquet(month_start, file_path)
+            size = os.path.getsize(file_path)
+            report = {
+                "partition": name,
+                "rows": rows,
+                "pending_reminders": pending,
+                "archive_bytes": size,
+                "table_bytes": partition.get("total_bytes"),
+                "path": path,
+            }
+            if dry_run:
+                return {**report, "dropped": False, "skipped": False}
+            await self.db.upload_archive(self.bucket, path, file_path, PARQUET)
+            await self.db.drop_entry_partition(name, rows, state["fingerprint"], allow_pending)
+            return {**report, "dropped": True, "skipped": False}
+        finally:
+            os.remove(file_path)
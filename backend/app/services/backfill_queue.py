@@ -0,0 +1,79 @@
+"""
+Embedding Backfill Queue
+Retries embeddings for entries that were stored without one
+"""
+import asyncio
+import traceback
+from dataclasses import dataclass
+
+from ..core.config import settings
+
+
+@dataclass
+class BackfillItem:
+    entry_id: str
+    content: str
+    attempts: int = 0
+
+
+class EmbeddingBackfillQueue:
+    """
+    Bounded in-process queue of entries whose embedding failed at ingest
+
+    The queue is best-effort: when it is full, or the process restarts, the
+    entry simply keeps a NULL embedding until a batch backfill picks it up.
+    """
+
+    def __init__(self, maxsize: int = 1000, max_attempts: int = 5, retry_delay: float = 5.0):
+        self._queue: asyncio.Queue[BackfillItem] = asyncio.Queue(maxsize=maxsize)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.dropped = 0
+
+    def enqueue(self, entry_id: str, content: str, attempts: int = 0) -> bool:
+        """Queue an entry for embedding; returns False if the queue is full"""
+        try:
+            self._queue.put_nowait(BackfillItem(entry_id, content, attempts))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def run(self, get_agent_service, get_db_service):
+        """
+        Worker loop: embed queued entries and write the vectors back
+        
+        Services are passed as factories so nothing is constructed until
+        the first item arrives.
+        """
+        while True:
+            item = await self._queue.get()
+            try:
+                agent_service, db_service = get_agent_service(), get_db_service()
+                # Don't burn attempts while the embeddings upstream is known to be down
+                while agent_service.embedding_caller.breaker.is_open:
+                    await asyncio.sleep(self.retry_delay)
+
+                embedding = await agent_service.get_embedding(item.content)
+                if embedding:
+                    await db_service.update_entry(
+                        item.entry_id,
+                        {"embedding": embedding, "embedding_model": agent_service.embedding_model}
+                    )
+                elif item.attempts + 1 < self.max_attempts:
+                    await asyncio.sleep(self.retry_delay)
+                    self.enqueue(item.entry_id, item.content, item.attempts + 1)
+                else:
+                    self.dropped += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+
+embedding_backfill_queue = EmbeddingBackfillQueue(maxsize=settings.embedding_backfill_queue_size)
@@ -0,0 +1,190 @@
+"""
+Category Service
+Per-user category registry: canonicalizes free-text categories from the
+classifier and assigns new content to the nearest category centroid
+"""
+import re
+import time
+from typing import Optional, List
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.responses import parse_embedding
+
+_NON_WORD_RE = re.compile(r"[^\w\s&+-]")
+_SPACE_RE = re.compile(r"\s+")
+
+# Names the fallback classifier uses when it has no real category
+UNCATEGORIZED = {"", "uncategorized", "none", "other", "misc"}
+
+
+def canonical_name(name: Optional[str]) -> str:
+    """
+    Case/spacing/punctuation-insensitive key for a category name
+    (canonical_category_name() in migration 010 must stay identical)
+    """
+    if not name:
+        return ""
+    return _SPACE_RE.sub(" ", _NON_WORD_RE.sub("", name)).strip().lower()
+
+
+class _UserCategories:
+    """A user's categories with a row-normalized centroid matrix for vectorized cosine"""
+
+    def __init__(self, rows: list[dict], loaded_at: float):
+        self.loaded_at = loaded_at
+        self.rows = rows
+        self.by_name: dict[str, dict] = {}
+        for row in rows:
+            self.by_name[row["canonical_name"]] = row
+            for alias in row.get("aliases") or []:
+                self.by_name.setdefault(alias, row)
+        self._matrices: dict[Optional[str], tuple[list[dict], Optional[np.ndarray]]] = {}
+
+    def _matrix(self, model: Optional[str]) -> tuple[list[dict], Optional[np.ndarray]]:
+        """Centroids built from `model`, stacked and row-normalized (built once per model)"""
+        if model not in self._matrices:
+            rows = [
+                row for row in self.rows
+                if row.get("centroid") is not None and (model is None or row.get("centroid_model") == model)
+            ]
+            matrix = None
+            if rows:
+                matrix = np.asarray([row["centroid"] for row in rows], dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix = matrix / np.where(norms == 0, 1, norms)
+            self._matrices[model] = (rows, matrix)
+        return self._matrices[model]
+
+    def nearest(self, embedding: List[float], model: Optional[str] = None) -> tuple[Optional[dict], float]:
+        rows, matrix = self._matrix(model)
+        if matrix is None or not embedding:
+            return None, 0.0
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0 or vector.shape[0] != matrix.shape[1]:
+            return None, 0.0
+        scores = matrix @ (vector / norm)
+        best = int(np.argmax(scores))
+        return rows[best], float(scores[best])
+
+
+class CategoryService:
+    """
+    Resolution order for new content:
+    1. Nearest centroid with cosine >= confident_threshold wins outright
+       (the classifier's free-text label is recorded as an alias)
+    2. Otherwise the canonicalized label, matched by name or alias
+    3. With no usable label (e.g. fallback classification), nearest centroid
+       above fallback_threshold
+    4. Otherwise a new category is registered
+    """
+
+    def __init__(
+        self,
+        db_service,
+        confident_threshold: Optional[float] = None,
+        fallback_threshold: Optional[float] = None,
+        cache_ttl: float = 300.0
+    ):
+        self.db_service = db_service
+        self.confident_threshold = confident_threshold or settings.category_confident_threshold
+        self.fallback_threshold = fallback_threshold or settings.category_fallback_threshold
+        self.cache_ttl = cache_ttl
+        self._cache: dict[str, _UserCategories] = {}
+        self.stats = {"centroid_hits": 0, "name_hits": 0, "created": 0}
+
+    async def _load(self, user_id: str) -> _UserCategories:
+        cached = self._cache.get(user_id)
+        if cached is not None and time.monotonic() - cached.loaded_at < self.cache_ttl:
+            return cached
+        rows = await self.db_service.get_categories(user_id, with_centroids=True, primary=True)
+        for row in rows:
+            row["centroid"] = parse_embedding(row.get("centroid"))
+        categories = _UserCategories(rows, time.monotonic())
+        self._cache[user_id] = categories
+        return categories
+
+    def invalidate(self, user_id: str):
+        self._cache.pop(user_id, None)
+
+    def _rebuild(self, user_id: str, added: Optional[dict] = None):
+        """Refresh the cached lookup structures after a local change (no reload)"""
+        cached = self._cache.get(user_id)
+        if cached is not None:
+            rows = cached.rows + [added] if added else cached.rows
+            self._cache[user_id] = _UserCategories(rows, cached.loaded_at)
+
+    async def resolve(
+        self,
+        user_id: str,
+        label: Optional[str],
+        embedding: Optional[List[float]] = None,
+        embedding_model: Optional[str] = None
+    ) -> dict:
+        """
+        Map a classifier label (+ content embedding) to a registry category
+        Only centroids built from `embedding_model` are compared
+
+        Returns the category row ({id, name, canonical_name, ...}); nothing
+        is counted until record() is called for the stored entry.
+        """
+        categories = await self._load(user_id)
+        key = canonical_name(label)
+        nearest, score = categories.nearest(embedding or [], embedding_model)
+
+        if nearest is not None and score >= self.confident_threshold:
+            self.stats["centroid_hits"] += 1
+            if key and key not in UNCATEGORIZED and key not in categories.by_name:
+                await self.db_service.add_category_alias(nearest["id"], key)
+                nearest["aliases"] = sorted(set(nearest.get("aliases") or []) | {key})
+                categories.by_name[key] = nearest
+            return nearest
+
+        if key and key not in UNCATEGORIZED:
+            if key in categories.by_name:
+                self.stats["name_hits"] += 1
+                return categories.by_name[key]
+        elif nearest is not None and score >= self.fallback_threshold:
+            self.stats["centroid_hits"] += 1
+            return nearest
+        elif "uncategorized" in categories.by_name:
+            self.stats["name_hits"] += 1
+            return categories.by_name["uncategorized"]
+
+        usable = bool(key) and key not in UNCATEGORIZED
+        created = await self.db_service.create_category({
+            "user_id": user_id,
+            "name": " ".join(label.split()) if usable else "Uncategorized",
+            "canonical_name": key if usable else "uncategorized",
+        })
+        self.stats["created"] += 1
+        if created.get("canonical_name") in categories.by_name:
+            # Lost a race with another request creating the same category
+            self.invalidate(user_id)
+        else:
+            created["centroid"] = parse_embedding(created.get("centroid"))
+            self._rebuild(user_id, added=created)
+        return created
+
+    async def record(
+        self,
+        user_id: str,
+        category: dict,
+        embedding: Optional[List[float]] = None,
+        embedding_model: Optional[str] = None
+    ):
+        """
+        Count a stored entry and fold its embedding into the running-mean centroid
+        A centroid from another embedding model is restarted from this vector
+
+        The update runs in the database (record_category_entry), so entries
+        stored concurrently by other requests or workers are all counted.
+        """
+        row = await self.db_service.record_category_entry(category["id"], embedding or None, embedding_model)
+        if row:
+            category["entry_count"] = row.get("entry_count")
+            category["centroid"] = parse_embedding(row.get("centroid"))
+            category["centroid_model"] = row.get("centroid_model")
+        self._rebuild(user_id)
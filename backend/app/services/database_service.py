@@ -2,41 +2,128 @@
 Database Service
 Handles interactions with Supabase database
 """
+import asyncio
 import os
-from supabase import create_async_client, AsyncClient
-from typing import Optional, List, Dict
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Optional, List, Dict
 from datetime import datetime
+from ..core.config import settings
+from ..core.singleflight import get_group
+from .event_bus import event_bus
+from .response_cache import response_cache
+
+# Entry columns for list views; the 1536-float embedding is only fetched on request
+ENTRY_COLUMNS = "id, user_id, content, summary, intent, category, category_id, duplicate_count, created_at, updated_at"
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
+class _ClientPool:
+    """
+    Supabase clients for one endpoint, created together on first use and
+    handed out round-robin (each client keeps its own HTTP connection pool)
+    """
+
+    def __init__(self, url: str, key: str, size: int = 1):
+        self.url = url
+        self.key = key
+        self.size = max(1, size)
+        self._clients: List["AsyncClient"] = []
+        self._next = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> "AsyncClient":
+        if not self._clients:
+            async with self._lock:
+                if not self._clients:
+                    from supabase import create_async_client
+                    self._clients = [await create_async_client(self.url, self.key) for _ in range(self.size)]
+        client = self._clients[self._next % len(self._clients)]
+        self._next += 1
+        return client
+
 
 class DatabaseService:
+    """
+    Writes and write-adjacent reads go to the primary. Heavy user-facing
+    reads (lists, search, sync, exports) go to the read replica when
+    SUPABASE_READ_REPLICA_URL is set, except for a user who wrote within
+    the last `db_read_your_writes_seconds` in this worker: their reads stay
+    on the primary so they see their own writes despite replication lag.
+    """
+
     def __init__(self):
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_ANON_KEY")
         self.supabase_service_key = os.getenv("SUPABASE_SERVICE_KEY")
-        self.client: Optional[AsyncClient] = None
-        self.service_client: Optional[AsyncClient] = None
+        self.read_replica_url = settings.supabase_read_replica_url
+        self.read_your_writes_seconds = settings.db_read_your_writes_seconds
+        self.client: Optional["AsyncClient"] = None
+        self._primary: Optional[_ClientPool] = None
+        self._replica: Optional[_ClientPool] = None
+        self._last_write: Dict[str, float] = {}
+        self.routing_stats = {"primary_reads": 0, "replica_reads": 0, "sticky_reads": 0}
     
-    async def get_client(self) -> AsyncClient:
+    async def get_client(self) -> "AsyncClient":
         """
         Get or create Supabase client (anon key - subject to RLS)
         """
         if not self.client:
             if not self.supabase_url or not self.supabase_key:
                 raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set")
+            from supabase import create_async_client
             self.client = await create_async_client(self.supabase_url, self.supabase_key)
         return self.client
     
-    async def get_service_client(self) -> AsyncClient:
+    async def get_service_client(self) -> "AsyncClient":
         """
-        Get or create Supabase service client (bypasses RLS)
-        Required for global_context modifications
+        Get a Supabase service client for the primary (bypasses RLS)
+        Used for all writes
         """
-        if not self.service_client:
+        if not self._primary:
             if not self.supabase_url:
                 raise ValueError("SUPABASE_URL must be set")
             if not self.supabase_service_key:
-                raise ValueError("SUPABASE_SERVICE_KEY must be set for global_context modifications")
-            self.service_client = await create_async_client(self.supabase_url, self.supabase_service_key)
-        return self.service_client
+                raise ValueError("SUPABASE_SERVICE_KEY must be set")
+            self._primary = _ClientPool(self.supabase_url, self.supabase_service_key, settings.db_clients_per_target)
+        return await self._primary.get()
+    
+    async def get_read_client(self, user_id: Optional[str] = None) -> "AsyncClient":
+        """
+        Get a service client for a read on behalf of `user_id`
+        Replica when configured, unless the user wrote recently
+        """
+        if not self.read_replica_url:
+            self.routing_stats["primary_reads"] += 1
+            return await self.get_service_client()
+        wrote_at = self._last_write.get(user_id) if user_id else None
+        if wrote_at is not None and time.monotonic() - wrote_at < self.read_your_writes_seconds:
+            self.routing_stats["sticky_reads"] += 1
+            return await self.get_service_client()
+        if not self._replica:
+            if not self.supabase_service_key:
+                raise ValueError("SUPABASE_SERVICE_KEY must be set")
+            self._replica = _ClientPool(self.read_replica_url, self.supabase_service_key, settings.db_clients_per_target)
+        self.routing_stats["replica_reads"] += 1
+        return await self._replica.get()
+    
+    def _bump(self, user_id: str, *resources: str):
+        """Invalidate cached views after a write and pin the user's reads to the primary"""
+        response_cache.bump(user_id, *resources)
+        now = time.monotonic()
+        self._last_write[user_id] = now
+        if len(self._last_write) > 10000:
+            cutoff = now - self.read_your_writes_seconds
+            self._last_write = {uid: at for uid, at in self._last_write.items() if at >= cutoff}
+    
+    def snapshot(self) -> dict:
+        return {
+            "read_replica": bool(self.read_replica_url),
+            "read_your_writes_seconds": self.read_your_writes_seconds,
+            "clients_per_target": settings.db_clients_per_target,
+            "sticky_users": len(self._last_write),
+            **self.routing_stats,
+        }
     
     # Entry methods
     async def create_entry(
@@ -46,7 +133,11 @@ class DatabaseService:
         intent: str = "NOTE",
         summary: Optional[str] = None,
         category: Optional[str] = None,
-        embedding: Optional[List[float]] = None
+        category_id: Optional[str] = None,
+        embedding: Optional[List[float]] = None,
+        embedding_model: Optional[str] = None,
+        content_simhash: Optional[int] = None,
+        duplicate_of: Optional[str] = None
     ) -> dict:
         """
         Create a new entry in the database
@@ -59,37 +150,123 @@ class DatabaseService:
             "category": category,
         }
         
+        if category_id:
+            entry_data["category_id"] = category_id
         if embedding:
             entry_data["embedding"] = embedding
+            entry_data["embedding_model"] = embedding_model
+        if content_simhash is not None:
+            entry_data["content_simhash"] = content_simhash
+        if duplicate_of:
+            entry_data["duplicate_of"] = duplicate_of
         
         client = await self.get_service_client()
         result = await client.table("entries").insert(entry_data).execute()
-        return result.data[0] if result.data else {}
+        self._bump(user_id, "entries")
+        entry = result.data[0] if result.data else {}
+        if entry:
+            event_bus.publish(user_id, "entries", "insert", entry["id"])
+        return entry
     
     async def get_entries(
         self, 
         user_id: str,
         intent: Optional[str] = None,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        columns: str = "*",
+        category_id: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
     ) -> List[dict]:
         """
-        Get entries for a user, optionally filtered by intent
+        Get entries for a user, optionally filtered by intent, category and creation time
+        
+        entries is partitioned by month on created_at: the newest-first order
+        reads the newest partitions first and stops at the limit, and a time
+        range skips the partitions outside it entirely.
         """
-        client = await self.get_service_client()
-        query = client.table("entries").select("*").eq("user_id", user_id)
+        client = await self.get_read_client(user_id)
+        query = client.table("entries").select(columns).eq("user_id", user_id)
         
         if intent:
             query = query.eq("intent", intent)
+        if category_id:
+            query = query.eq("category_id", category_id)
+        if created_after:
+            query = query.gte("created_at", created_after.isoformat())
+        if created_before:
+            query = query.lt("created_at", created_before.isoformat())
         
         result = await query.order("created_at", desc=True).limit(limit).offset(offset).execute()
         return result.data if result.data else []
     
+    async def iter_entries(
+        self,
+        user_id: Optional[str],
+        columns: str = ENTRY_COLUMNS,
+        page_size: int = 500,
+        created_from: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        primary: bool = False
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Yield all of a user's entries page by page, oldest first
+        With user_id=None, every user's entries in the created_at range (archival,
+        which passes primary=True: a lagging replica would archive stale rows)
+        
+        Keyset pagination on (created_at, id): each page starts strictly after
+        the last row of the previous one, so the cost per page is constant and
+        rows inserted mid-export never shift later pages.
+        """
+        client = await self.get_service_client() if primary else await self.get_read_client(user_id)
+        last: Optional[dict] = None
+        while True:
+            query = client.table("entries").select(columns)
+            if user_id is not None:
+                query = query.eq("user_id", user_id)
+            if created_from:
+                query = query.gte("created_at", created_from.isoformat())
+            if created_before:
+                query = query.lt("created_at", created_before.isoformat())
+            if last is not None:
+                created_at = f'"{last["created_at"]}"'
+                query = query.or_(
+                    f"created_at.gt.{created_at},"
+                    f"and(created_at.eq.{created_at},id.gt.{last['id']})"
+                )
+            result = await query.order("created_at").order("id").limit(page_size).execute()
+            rows = result.data or []
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            last = rows[-1]
+    
+    async def get_reminders_for_entries(
+        self,
+        entry_ids: List[str],
+        user_id: Optional[str] = None,
+        primary: bool = False
+    ) -> List[dict]:
+        """
+        Get the reminders of a set of entries in one query
+        Pass the owner's user_id to route the read like their other reads,
+        or primary=True when the result must not lag (archival)
+        """
+        if not entry_ids:
+            return []
+        client = await self.get_service_client() if primary else await self.get_read_client(user_id)
+        result = await client.table("reminders").select(
+            "id, entry_id, due_date, status, created_at, updated_at"
+        ).in_("entry_id", entry_ids).execute()
+        return result.data if result.data else []
+    
     async def get_entry(self, entry_id: str) -> Optional[dict]:
         """
         Get a specific entry by ID
         """
-        client = await self.get_client()
+        client = await self.get_service_client()
         result = await client.table("entries").select("*").eq("id", entry_id).execute()
         return result.data[0] if result.data else None
     
@@ -99,6 +276,9 @@ class DatabaseService:
         """
         client = await self.get_service_client()
         result = await client.table("entries").update(updates).eq("id", entry_id).execute()
+        for row in result.data or []:
+            self._bump(row["user_id"], "entries", "reminders")
+            event_bus.publish(row["user_id"], "entries", "update", row["id"])
         return result.data[0] if result.data else {}
     
     async def delete_entry(self, entry_id: str) -> bool:
@@ -107,26 +287,216 @@ class DatabaseService:
         """
         client = await self.get_service_client()
         result = await client.table("entries").delete().eq("id", entry_id).execute()
+        for row in result.data or []:
+            self._bump(row["user_id"], "entries", "reminders")
+            event_bus.publish(row["user_id"], "entries", "delete", row["id"])
         return True
     
+    async def get_entries_by_simhash(self, user_id: str, content_simhash: int, limit: int = 1) -> List[dict]:
+        """
+        Get a user's entries with an identical content SimHash (dedup prefilter)
+        """
+        client = await self.get_service_client()
+        result = await client.table("entries").select("id, content, category, created_at").eq(
+            "user_id", user_id
+        ).eq("content_simhash", content_simhash).limit(limit).execute()
+        return result.data if result.data else []
+    
+    async def register_duplicate_entry(self, entry_id: str) -> int:
+        """
+        Increment the merged-duplicate counter of an entry
+        """
+        client = await self.get_service_client()
+        result = await client.rpc("register_duplicate_entry", {"entry_id_param": entry_id}).execute()
+        owner_id = await self._bump_entry_owner(entry_id, "entries")
+        if owner_id:
+            event_bus.publish(owner_id, "entries", "update", entry_id)
+        return result.data or 0
+    
+    async def get_entries_needing_embedding(
+        self,
+        model: str,
+        after_id: Optional[str] = None,
+        limit: int = 500
+    ) -> List[dict]:
+        """
+        Get entries with no embedding, or one from a different model, in id (keyset) order
+        """
+        client = await self.get_service_client()
+        query = client.table("entries").select("id, content").or_(
+            f"embedding.is.null,embedding_model.is.null,embedding_model.neq.{model}"
+        )
+        if after_id:
+            query = query.gt("id", after_id)
+        result = await query.order("id").limit(limit).execute()
+        return result.data if result.data else []
+    
+    async def bulk_update_embeddings(self, updates: List[dict], model: str) -> int:
+        """
+        Write back many embeddings in one round trip
+        updates: [{"id": ..., "embedding": [...]}, ...]
+        """
+        client = await self.get_service_client()
+        result = await client.rpc(
+            "bulk_update_embeddings",
+            {"updates": updates, "model_name": model}
+        ).execute()
+        # Batch spans many users; invalidate entries everywhere
+        response_cache.bump_all("entries")
+        return result.data or 0
+    
+    async def get_entries_needing_summary(self, limit: int = 100, max_attempts: int = 3) -> List[dict]:
+        """
+        Get the oldest entries that have no summary yet, skipping entries the
+        model already skipped `max_attempts` times
+        """
+        client = await self.get_service_client()
+        result = await client.table("entries").select(
+            "id, user_id, content, category, created_at"
+        ).is_("summary", "null").lt("summary_attempts", max_attempts).order("created_at").limit(limit).execute()
+        return result.data if result.data else []
+    
+    async def apply_entry_summaries(
+        self,
+        user_id: str,
+        updates: List[dict],
+        skipped: List[str],
+        rollups: List[dict]
+    ) -> int:
+        """
+        Write back one user's summaries, skipped-entry attempts and folded
+        rollups in a single transaction
+        updates: [{"id": ..., "summary": "..."}, ...]
+        rollups: [{"scope": ..., "scope_key": ..., "digest": ..., "entry_count": <new>, "last_entry_at": ...}, ...]
+        
+        Returns:
+            Entries updated, or -1 if another worker summarized some of them first (nothing written)
+        """
+        client = await self.get_service_client()
+        result = await client.rpc("apply_entry_summaries", {
+            "owner_id": user_id,
+            "updates": updates,
+            "skipped": skipped,
+            "rollups": rollups
+        }).execute()
+        if result.data and result.data > 0:
+            self._bump(user_id, "entries")
+            if rollups:
+                self._bump(user_id, "rollups")
+        return result.data or 0
+    
+    # Category registry methods
+    async def get_categories(self, user_id: str, with_centroids: bool = False, primary: bool = False) -> List[dict]:
+        """
+        Get a user's categories, most used first
+        Pass primary=True to skip the read replica (the ingest-time registry
+        must see categories another worker just created)
+        """
+        columns = "id, name, canonical_name, aliases, entry_count"
+        if with_centroids:
+            columns += ", centroid, centroid_model"
+        client = await (self.get_service_client() if primary else self.get_read_client(user_id))
+        result = await client.table("categories").select(columns).eq("user_id", user_id).order(
+            "entry_count", desc=True
+        ).execute()
+        return result.data if result.data else []
+    
+    async def create_category(self, category_data: dict) -> dict:
+        """
+        Create a category; an existing row with the same canonical name is returned instead
+        """
+        client = await self.get_service_client()
+        result = await client.table("categories").upsert(
+            category_data,
+            on_conflict="user_id,canonical_name",
+            ignore_duplicates=True
+        ).execute()
+        if not result.data:
+            result = await client.table("categories").select("*").eq("user_id", category_data["user_id"]).eq(
+                "canonical_name", category_data["canonical_name"]
+            ).execute()
+        self._bump(category_data["user_id"], "categories")
+        return result.data[0] if result.data else {}
+    
+    async def record_category_entry(
+        self,
+        category_id: str,
+        embedding: Optional[List[float]] = None,
+        embedding_model: Optional[str] = None
+    ) -> dict:
+        """
+        Atomically count a stored entry and fold its embedding into the category's running-mean centroid
+        """
+        client = await self.get_service_client()
+        result = await client.rpc("record_category_entry", {
+            "category_id": category_id,
+            "entry_embedding": embedding,
+            "entry_embedding_model": embedding_model
+        }).execute()
+        for row in result.data or []:
+            self._bump(row["user_id"], "categories")
+        return result.data[0] if result.data else {}
+    
+    async def add_category_alias(self, category_id: str, alias: str) -> dict:
+        """
+        Add an alias to a category (no-op if it is already there)
+        """
+        client = await self.get_service_client()
+        result = await client.rpc("add_category_alias", {"category_id": category_id, "alias": alias}).execute()
+        for row in result.data or []:
+            self._bump(row["user_id"], "categories")
+        return result.data[0] if result.data else {}
+    
+    # Rollup methods
+    async def get_rollups(self, user_id: str, scope: Optional[str] = None) -> List[dict]:
+        """
+        Get a user's rollup digests, optionally for one scope ('category' or 'week')
+        """
+        client = await self.get_read_client(user_id)
+        query = client.table("entry_rollups").select(
+            "scope, scope_key, digest, entry_count, last_entry_at, updated_at"
+        ).eq("user_id", user_id)
+        if scope:
+            query = query.eq("scope", scope)
+        result = await query.order("scope").order("scope_key", desc=True).execute()
+        return result.data if result.data else []
+    
+    async def get_rollup(self, user_id: str, scope: str, scope_key: str) -> Optional[dict]:
+        """
+        Get one rollup digest
+        """
+        client = await self.get_service_client()
+        result = await client.table("entry_rollups").select("*").eq("user_id", user_id).eq(
+            "scope", scope
+        ).eq("scope_key", scope_key).execute()
+        return result.data[0] if result.data else None
+    
     # Reminder methods
     async def create_reminder(
         self, 
         entry_id: str, 
         due_date: datetime,
-        status: str = "PENDING"
+        status: str = "PENDING",
+        entry_created_at: Optional[str] = None
     ) -> dict:
         """
         Create a new reminder for an entry
+        Pass the entry's created_at when known; otherwise the database looks it up
         """
         reminder_data = {
             "entry_id": entry_id,
             "due_date": due_date.isoformat(),
             "status": status
         }
+        if entry_created_at:
+            reminder_data["entry_created_at"] = entry_created_at
         client = await self.get_service_client()
         result = await client.table("reminders").insert(reminder_data).execute()
-        return result.data[0] if result.data else {}
+        owner_id = await self._bump_entry_owner(entry_id, "reminders")
+        reminder = result.data[0] if result.data else {}
+        if owner_id and reminder:
+            event_bus.publish(owner_id, "reminders", "insert", reminder["id"])
+        return reminder
     
     async def get_reminders(
         self, 
@@ -137,10 +507,10 @@ class DatabaseService:
         """
         Get reminders for a user's entries
         """
-        # Get reminders by joining with entries
-        client = await self.get_client()
+        # Get reminders by (inner) joining with entries, filtered on the entry owner
+        client = await self.get_read_client(user_id)
         result = client.table("reminders").select(
-            "*, entries(*)"
+            "*, entries!inner(*)"
         ).eq("entries.user_id", user_id)
         
         if status:
@@ -155,21 +525,38 @@ class DatabaseService:
         """
         client = await self.get_service_client()
         result = await client.table("reminders").update(updates).eq("id", reminder_id).execute()
+        for row in result.data or []:
+            owner_id = await self._bump_entry_owner(row["entry_id"], "reminders")
+            if owner_id:
+                event_bus.publish(owner_id, "reminders", "update", row["id"])
         return result.data[0] if result.data else {}
     
+    async def _bump_entry_owner(self, entry_id: str, *resources: str) -> Optional[str]:
+        """
+        Invalidate cached views for the owner of an entry (reminder rows carry no user_id)
+        Returns the owner's user id
+        """
+        client = await self.get_service_client()
+        result = await client.table("entries").select("user_id").eq("id", entry_id).execute()
+        if not result.data:
+            return None
+        owner_id = result.data[0]["user_id"]
+        self._bump(owner_id, *resources)
+        return owner_id
+    
     # Global context methods (user-specific)
     async def get_global_context(self, user_id: str, key: str) -> Optional[str]:
         """
         Get a global context value by key for a specific user
         """
-        client = await self.get_client()
+        client = await self.get_read_client(user_id)
         result = await client.table("global_context").select("value").eq("user_id", user_id).eq("key", key).execute()
         return result.data[0]["value"] if result.data else None
     
     async def set_global_context(self, user_id: str, key: str, value: str, description: Optional[str] = None) -> dict:
         """
         Set or update a global context value for a specific user
-        RLS ensures users can only modify their own context
+        Runs on the primary with the service client; scoped by user_id
         """
         context_data = {
             "user_id": user_id,
@@ -178,28 +565,156 @@ class DatabaseService:
             "description": description
         }
         # Upsert with user_id and key as unique constraint
-        client = await self.get_client()
+        client = await self.get_service_client()
         result = await client.table("global_context").upsert(
             context_data,
             on_conflict="user_id,key"
         ).execute()
-        return result.data[0] if result.data else {}
+        self._bump(user_id, "global_context")
+        context = result.data[0] if result.data else {}
+        event_bus.publish(user_id, "global_context", "update", context.get("id"))
+        return context
     
     async def get_all_global_context(self, user_id: str) -> Dict[str, str]:
         """
         Get all global context as a dictionary for a specific user
         """
-        client = await self.get_client()
-        result = await client.table("global_context").select("key, value").eq("user_id", user_id).execute()
-        return {item["key"]: item["value"] for item in result.data} if result.data else {}
+        cache_key = response_cache.key(user_id, "global_context", {"view": "dict"})
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        async def load() -> Dict[str, str]:
+            client = await self.get_read_client(user_id)
+            result = await client.table("global_context").select("key, value").eq("user_id", user_id).execute()
+            context = {item["key"]: item["value"] for item in result.data} if result.data else {}
+            response_cache.set(cache_key, context)
+            return context
+        
+        # The cache key carries the resource version, so a read issued after a
+        # write never joins a flight that started before it
+        return dict(await get_group("db.global_context").do(cache_key, load))
     
     async def delete_global_context(self, user_id: str, key: str) -> bool:
         """
         Delete a global context value by key for a specific user
-        RLS ensures users can only delete their own context
+        Runs on the primary with the service client; scoped by user_id
         """
-        client = await self.get_client()
+        client = await self.get_service_client()
         result = await client.table("global_context").delete().eq("user_id", user_id).eq("key", key).execute()
+        self._bump(user_id, "global_context")
+        for row in result.data or []:
+            event_bus.publish(user_id, "global_context", "delete", row["id"])
+        return True
+    
+    # Conversation session methods
+    async def get_conversation_session(self, session_id: str) -> Optional[dict]:
+        """
+        Get a non-expired conversation session by ID
+        """
+        client = await self.get_service_client()
+        result = await client.table("conversation_sessions").select("*").eq(
+            "id", session_id
+        ).gt("expires_at", datetime.now().astimezone().isoformat()).execute()
+        return result.data[0] if result.data else None
+    
+    async def save_conversation_session(self, session_data: dict, expected_version: int) -> Optional[int]:
+        """
+        Create (expected_version 0) or update a conversation session if it is
+        still at expected_version
+        
+        Returns:
+            The new version, or None if another writer saved the session first
+        """
+        client = await self.get_service_client()
+        result = await client.rpc("save_conversation_session", {
+            "session_id": session_data["id"],
+            "owner_id": session_data["user_id"],
+            "session_summary": session_data.get("summary"),
+            "session_turns": session_data.get("turns") or [],
+            "session_expires_at": session_data["expires_at"],
+            "expected_version": expected_version
+        }).execute()
+        return result.data
+    
+    async def delete_conversation_session(self, session_id: str) -> bool:
+        """
+        Delete a conversation session
+        """
+        client = await self.get_service_client()
+        await client.table("conversation_sessions").delete().eq("id", session_id).execute()
+        return True
+    
+    async def delete_expired_conversation_sessions(self) -> bool:
+        """
+        Delete all expired conversation sessions
+        """
+        client = await self.get_service_client()
+        await client.table("conversation_sessions").delete().lt(
+            "expires_at", datetime.now().astimezone().isoformat()
+        ).execute()
+        return True
+    
+    # Incremental sync methods
+    async def get_changed_rows(
+        self,
+        table: str,
+        user_id: str,
+        since: Optional[str] = None,
+        after_id: Optional[str] = None,
+        limit: int = 1000,
+        columns: str = "*"
+    ) -> List[dict]:
+        """
+        Get rows of `table` changed at or after `since`, in (updated_at, id) order
+        
+        With `after_id` the scan resumes strictly after (since, after_id)
+        (keyset continuation of a full page); without it every row with
+        updated_at >= since is returned. Reminders are scoped to the user
+        through their entry.
+        """
+        client = await self.get_read_client(user_id)
+        if table == "reminders":
+            query = client.table("reminders").select(f"{columns}, entries!inner(user_id)").eq("entries.user_id", user_id)
+        else:
+            query = client.table(table).select(columns).eq("user_id", user_id)
+        
+        if since and after_id:
+            query = query.or_(f'updated_at.gt."{since}",and(updated_at.eq."{since}",id.gt.{after_id})')
+        elif since:
+            query = query.gte("updated_at", since)
+        
+        result = await query.order("updated_at").order("id").limit(limit).execute()
+        rows = result.data if result.data else []
+        for row in rows:
+            row.pop("entries", None)
+        return rows
+    
+    async def get_tombstones(
+        self,
+        user_id: str,
+        since: Optional[str] = None,
+        after_id: Optional[int] = None,
+        limit: int = 1000
+    ) -> List[dict]:
+        """
+        Get deletions recorded at or after `since`, in (deleted_at, id) order
+        """
+        client = await self.get_read_client(user_id)
+        query = client.table("sync_tombstones").select("id, table_name, row_id, deleted_at").eq("user_id", user_id)
+        if since and after_id is not None:
+            query = query.or_(f'deleted_at.gt."{since}",and(deleted_at.eq."{since}",id.gt.{after_id})')
+        elif since:
+            query = query.gte("deleted_at", since)
+        result = await query.order("deleted_at").order("id").limit(limit).execute()
+        return result.data if result.data else []
+    
+    async def delete_old_tombstones(self, before: datetime) -> bool:
+        """
+        Delete tombstones older than the sync retention window
+        """
+        client = await self.get_service_client()
+        await client.table("sync_tombstones").delete().lt("deleted_at", before.isoformat()).execute()
         return True
     
     # Vector similarity search
@@ -208,22 +723,95 @@ class DatabaseService:
         user_id: str,
         embedding: List[float],
         limit: int = 10,
-        threshold: float = 0.7
+        threshold: float = 0.7,
+        embedding_model: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        primary: bool = False
     ) -> List[dict]:
         """
         Search for similar entries using vector similarity
+        Pass embedding_model to only compare against vectors from the same model,
+        and created_after to search only the monthly partitions from then on.
+        Replica by default; ingest dedup passes primary=True (it must see a
+        duplicate inserted moments ago by any worker)
         """
         # Use Supabase RPC for vector similarity search
-        # Note: You may need to create a custom function in Supabase for this
-        client = await self.get_client()
+        # The function filters by user_id_param itself, so run it with a service client
+        client = await self.get_service_client() if primary else await self.get_read_client(user_id)
         result = await client.rpc(
             "search_similar_entries",
             {
                 "user_id_param": user_id,
                 "query_embedding": embedding,
                 "match_threshold": threshold,
-                "match_count": limit
+                "match_count": limit,
+                "embedding_model_param": embedding_model,
+                "created_after": created_after.isoformat() if created_after else None
             }
         ).execute()
         return result.data if result.data else []
+    
+    # Partition maintenance and archival (service role)
+    async def ensure_entry_partitions(self, months_ahead: int = 3) -> int:
+        """
+        Create the monthly entries partitions for the current month and the next `months_ahead`
+        """
+        client = await self.get_service_client()
+        result = await client.rpc("ensure_entries_partitions", {"months_ahead": months_ahead}).execute()
+        return result.data or 0
+    
+    async def list_entry_partitions(self) -> List[dict]:
+        """
+        Get the entries partitions, oldest first: partition_name, month_start,
+        estimated_rows, total_bytes
+        """
+        client = await self.get_service_client()
+        result = await client.rpc("list_entries_partitions", {}).execute()
+        return result.data if result.data else []
+    
+    async def get_entry_partition_fingerprint(self, partition_name: str) -> dict:
+        """
+        Get a content fingerprint of a partition and its reminders, plus the
+        number of pending reminders: {"fingerprint", "pending_reminders"}
+        """
+        client = await self.get_service_client()
+        result = await client.rpc("entries_partition_fingerprint", {"partition_name": partition_name}).execute()
+        return result.data[0] if result.data else {"fingerprint": None, "pending_reminders": 0}
+    
+    async def drop_entry_partition(
+        self,
+        partition_name: str,
+        expected_rows: int,
+        expected_fingerprint: str,
+        allow_pending: bool = False
+    ) -> int:
+        """
+        Drop an archived partition (and its reminders) without recording tombstones
+        Fails unless the partition still holds exactly `expected_rows` rows and
+        still matches `expected_fingerprint`, or if it has pending reminders
+        and allow_pending is False
+        """
+        client = await self.get_service_client()
+        result = await client.rpc(
+            "drop_entries_partition",
+            {
+                "partition_name": partition_name,
+                "expected_rows": expected_rows,
+                "expected_fingerprint": expected_fingerprint,
+                "allow_pending": allow_pending
+            }
+        ).execute()
+        response_cache.bump_all("entries", "reminders")
+        return result.data or 0
+    
+    async def upload_archive(self, bucket: str, path: str, file_path: str, content_type: str) -> None:
+        """
+        Upload an archive file to Supabase Storage (replacing an earlier upload)
+        """
+        client = await self.get_service_client()
+        await client.storage.from_(bucket).upload(
+            path,
+            file_path,
+            {"content-type": content_type, "upsert": "true"}
+        )
 
@@ -0,0 +1,150 @@
+"""
+Deduplication Service
+Detects near-identical notes at ingest so re-recorded thoughts are merged or
+linked instead of stored again
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List
+
+from ..core.config import settings
+
+# Words in any script (with inner apostrophes), or any single other
+# non-space character such as an emoji
+_TOKEN_RE = re.compile(r"\w+(?:'\w+)*|[^\w\s]", re.UNICODE)
+
+
+def normalize_content(text: str) -> list[str]:
+    """Casefolded word and symbol tokens with punctuation and extra whitespace removed"""
+    return [
+        token for token in _TOKEN_RE.findall(text.casefold())
+        if len(token) > 1 or not unicodedata.category(token).startswith("P")
+    ]
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over word unigrams and bigrams, returned as a signed
+    integer so it fits a Postgres BIGINT. Texts that differ only in case,
+    punctuation or spacing hash identically.
+
+    Returns None for text with no tokens, which must not share a hash.
+    """
+    tokens = normalize_content(text)
+    if not tokens:
+        return None
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * 64
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    value = sum(1 << bit for bit in range(64) if weights[bit] > 0)
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class DedupService:
+    """
+    Ingest-time duplicate check:
+    1. SimHash prefilter - an identical hash whose normalized content also
+       matches is an exact duplicate and skips the vector lookup entirely
+    2. Nearest neighbour by embedding against a similarity threshold
+    """
+
+    def __init__(self, db_service, threshold: Optional[float] = None):
+        self.db_service = db_service
+        self.threshold = threshold or settings.dedup_similarity_threshold
+        self.stats = {"checked": 0, "simhash_hits": 0, "vector_hits": 0}
+
+    async def find_duplicate(
+        self,
+        user_id: str,
+        content: str,
+        embedding: Optional[List[float]] = None,
+        content_simhash: Optional[int] = None,
+        embedding_model: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        Return the existing entry `content` duplicates, or None
+
+        Args:
+            user_id: Owner of the new content
+            content: Cleaned content about to be stored
+            embedding: Embedding already computed for create_entry (reused, not recomputed)
+            content_simhash: Precomputed SimHash of content, if available
+            embedding_model: Model that produced `embedding`; only same-model vectors are compared
+        """
+        self.stats["checked"] += 1
+        if content_simhash is None:
+            content_simhash = simhash(content)
+
+        if content_simhash is not None:
+            # A hash collision must never merge unrelated notes: confirm on the text
+            tokens = normalize_content(content)
+            matches = await self.db_service.get_entries_by_simhash(user_id, content_simhash, limit=5)
+            for match in matches:
+                if normalize_content(match.get("content") or "") == tokens:
+                    self.stats["simhash_hits"] += 1
+                    return match
+
+        if embedding:
+            neighbours = await self.db_service.search_similar_entries(
+                user_id=user_id,
+                embedding=embedding,
+                limit=1,
+                threshold=self.threshold,
+                embedding_model=embedding_model,
+                created_after=self._lookback_start(),
+                primary=True
+            )
+            if neighbours:
+                self.stats["vector_hits"] += 1
+                return neighbours[0]
+        return None
+
+    @staticmethod
+    def _lookback_start() -> Optional[datetime]:
+        """Oldest created_at searched for near-duplicates (prunes older partitions)"""
+        if settings.dedup_lookback_days <= 0:
+            return None
+        return datetime.now(timezone.utc) - timedelta(days=settings.dedup_lookback_days)
+
+    async def store_note(
+        self,
+        user_id: str,
+        content: str,
+        category: Optional[str],
+        embedding: Optional[List[float]],
+        embedding_model: Optional[str],
+        category_id: Optional[str] = None
+    ) -> tuple[dict, bool]:
+        """
+        Store a NOTE unless it duplicates an existing one
+
+        Returns:
+            (entry, merged): the new entry, or the original entry when the
+            duplicate was merged into it (nothing inserted)
+        """
+        content_simhash = simhash(content)
+        duplicate = None
+        if settings.dedup_enabled:
+            duplicate = await self.find_duplicate(user_id, content, embedding, content_simhash, embedding_model)
+
+        if duplicate and settings.dedup_mode == "merge":
+            await self.db_service.register_duplicate_entry(duplicate["id"])
+            return duplicate, True
+
+        entry = await self.db_service.create_entry(
+            user_id=user_id,
+            content=content,
+            intent='NOTE',
+            category=category,
+            category_id=category_id,
+            embedding=embedding,
+            embedding_model=embedding_model,
+            content_simhash=content_simhash,
+            duplicate_of=duplicate["id"] if duplicate else None
+        )
+        return entry, False
@@ -0,0 +1,144 @@
+"""
+Embedding Backfill Job
+Resumable batch job that embeds entries missing an embedding, or re-embeds
+entries produced by a different embedding model
+"""
+import json
+import os
+import traceback
+from datetime import datetime
+from typing import Optional
+
+from ..core.config import settings
+from .resilience import AsyncRateLimiter
+
+# text-embedding-3-small accepts up to 8191 tokens per input; stay well under it
+MAX_INPUT_CHARS = 24000
+
+
+def _estimate_tokens(texts: list[str]) -> int:
+    """Rough token estimate (~4 characters per token) for rate limiting"""
+    return sum(len(text) for text in texts) // 4 + len(texts)
+
+
+class EmbeddingBackfillJob:
+    """
+    Streams entries needing embeddings in keyset (id) order, embeds them in
+    multi-input batches under a rate limit and writes them back in bulk.
+
+    Progress is checkpointed to disk after every batch, so a restarted job
+    resumes after the last committed id.
+    """
+
+    def __init__(
+        self,
+        agent_service,
+        db_service,
+        batch_size: Optional[int] = None,
+        checkpoint_path: Optional[str] = None
+    ):
+        self.agent_service = agent_service
+        self.db_service = db_service
+        self.batch_size = batch_size or settings.embedding_backfill_batch_size
+        self.checkpoint_path = checkpoint_path or settings.embedding_backfill_checkpoint_path
+        self.request_limiter = AsyncRateLimiter(settings.embedding_backfill_requests_per_minute)
+        self.token_limiter = AsyncRateLimiter(settings.embedding_backfill_tokens_per_minute)
+        self.running = False
+        self.status = self._load_checkpoint()
+
+    def _new_status(self) -> dict:
+        return {
+            "model": self.agent_service.embedding_model,
+            "last_id": None,
+            "processed": 0,
+            "skipped": 0,
+            "batches": 0,
+            "completed": False,
+            "error": None,
+            "started_at": None,
+            "updated_at": None,
+        }
+
+    def _load_checkpoint(self) -> dict:
+        if os.path.exists(self.checkpoint_path):
+            try:
+                with open(self.checkpoint_path) as f:
+                    status = json.load(f)
+                # A checkpoint for a different model is meaningless for this run
+                if status.get("model") == self.agent_service.embedding_model:
+                    return status
+            except (OSError, ValueError):
+                traceback.print_exc()
+        return self._new_status()
+
+    def _save_checkpoint(self):
+        self.status["updated_at"] = datetime.now().isoformat()
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.status, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    async def run(self, max_batches: Optional[int] = None, reset: bool = False) -> dict:
+        """
+        Run the backfill until no entries remain (or max_batches is reached)
+
+        Args:
+            max_batches: Stop after this many batches (None = run to completion)
+            reset: Ignore any existing checkpoint and start from the beginning
+
+        Returns:
+            The final job status
+        """
+        if self.running:
+            raise RuntimeError("Embedding backfill is already running")
+        self.running = True
+
+        if reset or self.status.get("completed"):
+            self.status = self._new_status()
+        self.status["started_at"] = datetime.now().isoformat()
+        self.status["error"] = None
+        model = self.agent_service.embedding_model
+
+        try:
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                rows = await self.db_service.get_entries_needing_embedding(
+                    model=model,
+                    after_id=self.status["last_id"],
+                    limit=self.batch_size
+                )
+                if not rows:
+                    self.status["completed"] = True
+                    break
+
+                texts, ids = [], []
+                for row in rows:
+                    content = (row.get("content") or "").strip()
+                    if content:
+                        ids.append(row["id"])
+                        texts.append(content[:MAX_INPUT_CHARS])
+                    else:
+                        self.status["skipped"] += 1
+
+                if texts:
+                    await self.request_limiter.acquire()
+                    await self.token_limiter.acquire(_estimate_tokens(texts))
+                    embeddings = await self.agent_service.get_embeddings(texts)
+                    await self.db_service.bulk_update_embeddings(
+                        [{"id": entry_id, "embedding": embedding} for entry_id, embedding in zip(ids, embeddings)],
+                        model
+                    )
+
+                self.status["last_id"] = rows[-1]["id"]
+                self.status["processed"] += len(texts)
+                self.status["batches"] += 1
+                self._save_checkpoint()
+                batches += 1
+        except Exception as e:
+            traceback.print_exc()
+            self.status["error"] = str(e)
+        finally:
+            self.running = False
+            self._save_checkpoint()
+
+        return self.status
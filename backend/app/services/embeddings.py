@@ -0,0 +1,181 @@
+"""
+Embedding Providers
+Pluggable text embeddings: OpenAI over the network, or a local quantized
+ONNX sentence encoder with cross-request micro-batching
+"""
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from ..core.config import settings
+
+# Width of the entries.embedding / categories.centroid columns
+STORAGE_DIMENSIONS = 1536
+
+
+def pad_to_dimensions(vector: list[float], dimensions: int = STORAGE_DIMENSIONS) -> list[float]:
+    """
+    Zero-pad a smaller vector to the storage width
+
+    Padding with zeros leaves dot products and norms unchanged, so cosine
+    similarity between two padded vectors equals the similarity of the
+    originals. Vectors from different models are still not comparable;
+    searches filter on embedding_model for that.
+    """
+    if len(vector) > dimensions:
+        raise ValueError(f"Embedding has {len(vector)} dimensions, storage holds {dimensions}")
+    return vector + [0.0] * (dimensions - len(vector))
+
+
+class EmbeddingProvider(ABC):
+    """Interface: embed a list of texts, in order"""
+    model_name = "base"
+    dimensions = STORAGE_DIMENSIONS
+
+    @abstractmethod
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        ...
+
+    def is_available(self) -> bool:
+        return True
+
+    def shutdown(self):
+        pass
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings through the AgentService resilience layer"""
+    dimensions = STORAGE_DIMENSIONS
+
+    def __init__(self, client, caller, model: str = "text-embedding-3-small"):
+        self.client = client
+        self.caller = caller
+        self.model_name = model
+
+    def is_available(self) -> bool:
+        return not self.caller.breaker.is_open
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        response = await self.caller.call(
+            lambda: self.client.embeddings.create(
+                model=self.model_name,
+                input=texts
+            )
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-text requests into batches
+
+    The first request opens a batch; it is flushed when `max_batch` texts
+    are waiting or `max_wait` seconds have passed, and `fn(texts)` runs on
+    the given executor. Under load many requests share one forward pass;
+    an idle request waits at most `max_wait`.
+    """
+
+    def __init__(self, fn: Callable[[list[str]], list[list[float]]], executor, max_batch: int = 32, max_wait: float = 0.005):
+        self.fn = fn
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._running: set[asyncio.Task] = set()
+        self.stats = {"requests": 0, "batches": 0}
+
+    async def submit(self, texts: list[str]) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future))
+            futures.append(future)
+        self.stats["requests"] += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]):
+        self.stats["batches"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            vectors = await loop.run_in_executor(self.executor, self.fn, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Quantized ONNX sentence encoder (fastembed) on CPU
+
+    Inference runs on a dedicated thread pool (ONNX Runtime releases the
+    GIL), so it never blocks the event loop or competes with the default
+    executor. Vectors are zero-padded to the storage width.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "BAAI/bge-small-en-v1.5",
+        threads: int = 2,
+        max_batch: int = 32,
+        max_wait: float = 0.005
+    ):
+        self.model_name = model_name
+        self.threads = threads
+        self._model = None
+        # One inference at a time; ONNX Runtime parallelizes inside the batch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embeddings")
+        self.batcher = MicroBatcher(self._embed_sync, self._executor, max_batch=max_batch, max_wait=max_wait)
+
+    def is_available(self) -> bool:
+        try:
+            import fastembed  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _embed_sync(self, texts: list[str]) -> list[list[float]]:
+        if self._model is None:
+            # Loaded on the executor thread on first use (downloads weights once)
+            from fastembed import TextEmbedding
+            self._model = TextEmbedding(self.model_name, threads=self.threads)
+        return [pad_to_dimensions(vector.tolist()) for vector in self._model.embed(texts, batch_size=len(texts))]
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return await self.batcher.submit(texts)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_embedding_provider(client, caller) -> EmbeddingProvider:
+    """Provider per settings.embedding_provider ("openai" or "local")"""
+    if settings.embedding_provider == "local":
+        return LocalEmbeddingProvider(
+            model_name=settings.embedding_local_model,
+            threads=settings.embedding_local_threads,
+            max_batch=settings.embedding_batch_max_size,
+            max_wait=settings.embedding_batch_max_wait_ms / 1000,
+        )
+    return OpenAIEmbeddingProvider(client, caller)
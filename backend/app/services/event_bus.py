@@ -0,0 +1,195 @@
+"""
+Event Bus
+Per-user change events (entry/reminder/global context writes) fanned out to
+connected clients. Delivery is in-process; an optional Postgres
+LISTEN/NOTIFY bridge carries events between workers.
+"""
+import asyncio
+import json
+import traceback
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from ..core.config import settings
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+
+class Subscription:
+    """
+    Bounded, coalescing buffer for one client
+
+    Events are keyed by (resource, id): a newer event for the same row
+    replaces the pending one, so a burst of updates to one reminder costs a
+    single slot. If the buffer still overflows the client is too far behind
+    to catch up event by event; pending events are dropped and it gets one
+    `resync` instead.
+    """
+
+    def __init__(self, user_id: str, max_buffer: int = 256):
+        self.user_id = user_id
+        self.max_buffer = max_buffer
+        self._pending: OrderedDict[tuple, dict] = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self.overflowed = False
+        self.coalesced = 0
+
+    def push(self, event: dict):
+        key = (event.get("resource"), event.get("id"))
+        if key in self._pending:
+            self.coalesced += 1
+            self._pending.pop(key)
+        elif len(self._pending) >= self.max_buffer:
+            self._pending.clear()
+            self.overflowed = True
+        if not self.overflowed:
+            self._pending[key] = event
+        self._wakeup.set()
+
+    async def get(self, timeout: float) -> Optional[list[dict]]:
+        """
+        Wait up to `timeout` seconds and drain pending events
+        Returns None on timeout, or [{"resource": "resync"}] after an overflow
+        """
+        if not self._pending and not self.overflowed:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.overflowed:
+            self.overflowed = False
+            self._pending.clear()
+            return [{"resource": "resync"}]
+        events = list(self._pending.values())
+        self._pending.clear()
+        return events
+
+
+class EventBus:
+    def __init__(self, max_buffer: int = 256):
+        self.max_buffer = max_buffer
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.bridge: Optional["PostgresNotifyBridge"] = None
+        self.stats = {"published": 0, "delivered": 0, "resyncs": 0}
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(str(user_id), self.max_buffer)
+        self._subscribers.setdefault(subscription.user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: str, resource: str, op: str, row_id: Optional[str] = None):
+        """
+        Publish a change event; never blocks or raises on the write path
+
+        With the bridge running, events go out through NOTIFY and come back
+        to every worker (this one included) through LISTEN.
+        """
+        event = {"resource": resource, "op": op, "id": row_id}
+        self.stats["published"] += 1
+        if self.bridge is not None and self.bridge.connected:
+            self.bridge.send(str(user_id), event)
+        else:
+            self.deliver(str(user_id), event)
+
+    def deliver(self, user_id: str, event: dict):
+        for subscription in self._subscribers.get(user_id, ()):
+            was_overflowed = subscription.overflowed
+            subscription.push(event)
+            if subscription.overflowed and not was_overflowed:
+                self.stats["resyncs"] += 1
+            self.stats["delivered"] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "users": len(self._subscribers),
+            "subscriptions": sum(len(subs) for subs in self._subscribers.values()),
+            "bridge": self.bridge.snapshot() if self.bridge else None,
+            **self.stats
+        }
+
+
+class PostgresNotifyBridge:
+    """
+    Cross-worker fan-out over Postgres LISTEN/NOTIFY (requires asyncpg and
+    a direct DATABASE_URL connection; PostgREST cannot LISTEN)
+    """
+
+    def __init__(self, bus: EventBus, dsn: str, channel: str = "voice_agent_events", queue_size: int = 1000):
+        self.bus = bus
+        self.dsn = dsn
+        self.channel = channel
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._connection = None
+        self._sender: Optional[asyncio.Task] = None
+        self.stats = {"sent": 0, "received": 0, "dropped": 0}
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    async def start(self):
+        if asyncpg is None:
+            raise RuntimeError("asyncpg is required for the Postgres event bridge")
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(self.channel, self._on_notify)
+        self._sender = asyncio.create_task(self._send_loop())
+        self.bus.bridge = self
+
+    async def stop(self):
+        self.bus.bridge = None
+        if self._sender:
+            self._sender.cancel()
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    def send(self, user_id: str, event: dict):
+        try:
+            self._outbox.put_nowait((user_id, event))
+        except asyncio.QueueFull:
+            # Never block the write path: other workers miss this one, local clients still get it
+            self.stats["dropped"] += 1
+            self.bus.deliver(user_id, event)
+
+    async def _send_loop(self):
+        while True:
+            user_id, event = await self._outbox.get()
+            payload = json.dumps({"u": user_id, "e": event}, separators=(",", ":"))
+            try:
+                await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+                self.stats["sent"] += 1
+            except Exception:
+                traceback.print_exc()
+                self.bus.deliver(user_id, event)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        # Anything with database access can NOTIFY this channel; a malformed
+        # payload must not raise inside asyncpg's listener callback
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        if not isinstance(data, dict):
+            return
+        user_id, event = data.get("u"), data.get("e")
+        if not user_id or not isinstance(event, dict) or not event.get("resource"):
+            return
+        self.stats["received"] += 1
+        self.bus.deliver(str(user_id), event)
+
+    def snapshot(self) -> dict:
+        return {"connected": self.connected, "pending": self._outbox.qsize(), **self.stats}
+
+
+event_bus = EventBus(max_buffer=settings.events_buffer_size)
@@ -0,0 +1,145 @@
+"""
+Export Service
+Streams a user's entries (with their reminders) as NDJSON or Parquet.
+Entries are read one keyset page at a time and each page is encoded and
+handed to the client before the next is fetched, so worker memory stays
+bounded by the page size regardless of account size.
+"""
+import asyncio
+import base64
+import io
+from datetime import datetime
+from typing import AsyncIterator, List
+
+from ..core.responses import dumps, parse_embedding
+from ..core.wire import pack_vector
+from .database_service import ENTRY_COLUMNS, DatabaseService
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+NDJSON = "application/x-ndjson"
+PARQUET = "application/vnd.apache.parquet"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the caller"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ExportService:
+    def __init__(self, db_service: DatabaseService, page_size: int = 500):
+        self.db = db_service
+        self.page_size = page_size
+
+    async def _pages(self, user_id: str, include_embedding: bool) -> AsyncIterator[List[dict]]:
+        """Entry pages with their reminders attached"""
+        columns = f"{ENTRY_COLUMNS}, embedding" if include_embedding else ENTRY_COLUMNS
+        async for entries in self.db.iter_entries(user_id, columns=columns, page_size=self.page_size):
+            reminders = await self.db.get_reminders_for_entries([entry["id"] for entry in entries], user_id)
+            by_entry: dict[str, list] = {}
+            for reminder in reminders:
+                by_entry.setdefault(reminder["entry_id"], []).append(reminder)
+            for entry in entries:
+                entry["reminders"] = by_entry.get(entry["id"], [])
+                if include_embedding:
+                    entry["embedding"] = pack_vector(parse_embedding(entry.get("embedding")))
+            yield entries
+
+    async def stream_ndjson(self, user_id: str, include_embedding: bool = False) -> AsyncIterator[bytes]:
+        """
+        One JSON object per line. With include_embedding, `embedding` is the
+        base64 of the little-endian float32 vector.
+        """
+        async for entries in self._pages(user_id, include_embedding):
+            lines = []
+            for entry in entries:
+                if include_embedding and entry["embedding"] is not None:
+                    entry["embedding"] = base64.b64encode(entry["embedding"]).decode("ascii")
+                lines.append(dumps(entry))
+            yield b"\n".join(lines) + b"\n"
+
+    def _parquet_schema(self, include_embedding: bool):
+        reminder = pyarrow.struct([
+            ("id", pyarrow.string()),
+            ("due_date", pyarrow.timestamp("us", tz="UTC")),
+            ("status", pyarrow.string()),
+        ])
+        fields = [
+            ("id", pyarrow.string()),
+            ("content", pyarrow.string()),
+            ("summary", pyarrow.string()),
+            ("intent", pyarrow.string()),
+            ("category", pyarrow.string()),
+            ("category_id", pyarrow.string()),
+            ("duplicate_count", pyarrow.int32()),
+            ("created_at", pyarrow.timestamp("us", tz="UTC")),
+            ("updated_at", pyarrow.timestamp("us", tz="UTC")),
+            ("reminders", pyarrow.list_(reminder)),
+        ]
+        if include_embedding:
+            # Raw little-endian float32 bytes, 4 per dimension
+            fields.append(("embedding", pyarrow.binary()))
+        return pyarrow.schema(fields)
+
+    async def stream_parquet(self, user_id: str, include_embedding: bool = False) -> AsyncIterator[bytes]:
+        """
+        Parquet file written one row group per page; bytes are flushed to the
+        client after every row group
+        """
+        if pyarrow is None:
+            raise RuntimeError("Parquet export requires pyarrow")
+
+        schema = self._parquet_schema(include_embedding)
+        sink = _ChunkSink()
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+        try:
+            async for entries in self._pages(user_id, include_embedding):
+                rows = [self._parquet_row(entry, schema) for entry in entries]
+                table = pyarrow.Table.from_pylist(rows, schema=schema)
+                await asyncio.to_thread(writer.write_table, table)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    @staticmethod
+    def _parquet_row(entry: dict, schema) -> dict:
+        row = {name: entry.get(name) for name in schema.names}
+        for name in ("created_at", "updated_at"):
+            if row[name]:
+                row[name] = datetime.fromisoformat(row[name])
+        row["reminders"] = [
+            {
+                "id": reminder["id"],
+                "due_date": datetime.fromisoformat(reminder["due_date"]),
+                "status": reminder["status"],
+            }
+            for reminder in entry["reminders"]
+        ]
+        return row
@@ -0,0 +1,117 @@
+"""
+Idempotency Store
+Short-lived results of processed uploads, so client retries of a voice
+request replay the original response instead of re-running the pipeline
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..core.config import settings
+
+
+class IdempotencyConflict(Exception):
+    """An Idempotency-Key was reused with a different payload"""
+
+
+def audio_fingerprint(audio: bytes) -> str:
+    """sha256 of the uploaded bytes (run it off the event loop for large uploads)"""
+    return hashlib.sha256(audio).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Results are keyed per user by the client's Idempotency-Key, or by the
+    audio fingerprint when no key is sent. A key that is still being
+    processed has an in-flight future: concurrent duplicates await it
+    rather than starting a second run. Completed results are kept for
+    `ttl` seconds; failures are not stored, so a retry after an error runs
+    again.
+
+    The store is per worker. Retries that land on another worker are only
+    caught by the ingest dedup stage.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._results: OrderedDict[str, tuple[float, str, Any]] = OrderedDict()
+        self._inflight: Dict[str, tuple[str, asyncio.Future]] = {}
+        self.stats = {"executed": 0, "replayed": 0, "joined": 0, "conflicts": 0}
+
+    @staticmethod
+    def key(user_id: str, scope: str, idempotency_key: Optional[str], fingerprint: str) -> str:
+        if idempotency_key:
+            return f"{user_id}:{scope}:key:{idempotency_key}"
+        return f"{user_id}:{scope}:sha256:{fingerprint}"
+
+    def _get(self, key: str) -> Optional[tuple[str, Any]]:
+        item = self._results.get(key)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            del self._results[key]
+            return None
+        return item[1], item[2]
+
+    def _set(self, key: str, fingerprint: str, value: Any):
+        self._results[key] = (time.monotonic() + self.ttl, fingerprint, value)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    async def run(self, key: str, fingerprint: str, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Run `fn` once per key
+
+        Returns:
+            (result, replayed) - replayed is True when the result came from an
+            earlier or concurrent request
+
+        Raises:
+            IdempotencyConflict: if the key was used for different audio
+        """
+        stored = self._get(key)
+        if stored is not None:
+            self._check(fingerprint, stored[0])
+            self.stats["replayed"] += 1
+            return stored[1], True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._check(fingerprint, inflight[0])
+            self.stats["joined"] += 1
+            # Shielded so a disconnecting duplicate can't cancel the original run
+            return await asyncio.shield(inflight[1]), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, future)
+        self.stats["executed"] += 1
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved: with no waiters the error is the caller's to report
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        self._set(key, fingerprint, result)
+        future.set_result(result)
+        return result, False
+
+    def _check(self, fingerprint: str, stored_fingerprint: str):
+        if fingerprint != stored_fingerprint:
+            self.stats["conflicts"] += 1
+            raise IdempotencyConflict("Idempotency-Key was already used for a different upload")
+
+    def snapshot(self) -> dict:
+        return {"results": len(self._results), "in_flight": len(self._inflight), "ttl": self.ttl, **self.stats}
+
+
+idempotency_store = IdempotencyStore(
+    max_entries=settings.idempotency_max_entries,
+    ttl=settings.idempotency_ttl_seconds
+)
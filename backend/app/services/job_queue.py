@@ -0,0 +1,359 @@
+"""
+Job Queue
+Background processing of long-running voice commands with a bounded,
+prioritized queue and a worker pool
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+import traceback
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict, field
+from typing import Awaitable, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no advisory locks, run a single worker process
+    fcntl = None
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is at capacity; callers should shed load (503)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: str
+    priority: int = PRIORITIES["normal"]
+    status: str = "queued"  # queued | running | succeeded | failed
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_public(self) -> dict:
+        """Job status as returned to the client"""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue(ABC):
+    """
+    Queue interface used by the router and worker pool. LocalDiskJobQueue is
+    the single-host implementation; a broker-backed queue can replace it by
+    implementing the same methods.
+    """
+
+    @abstractmethod
+    async def enqueue(self, job: Job, payload: bytes) -> Job:
+        ...
+
+    @abstractmethod
+    async def next(self) -> tuple[Job, bytes]:
+        ...
+
+    @abstractmethod
+    async def complete(self, job: Job, result: Optional[dict] = None, error: Optional[str] = None):
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        ...
+
+
+class LocalDiskJobQueue(JobQueue):
+    """
+    Jobs and their audio payloads are persisted under `directory`, so queued
+    work survives a restart (see recover()). Ordering is by priority, then FIFO.
+
+    The directory is shared by every worker process on the host: job status
+    is read from disk, so any worker can answer a poll, and a job is run only
+    by the worker holding its claim lock (released by the OS if that worker
+    dies, so the job is re-queued on the next recover()).
+    """
+
+    # Long-poll interval for jobs run by another worker process
+    poll_interval = 0.5
+
+    def __init__(self, directory: str, max_pending: int = 100, result_ttl: int = 3600):
+        self.directory = directory
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, Job] = {}
+        self._claims: Dict[str, int] = {}
+        self._heap: list[tuple[int, int, str]] = []
+        self._counter = itertools.count()
+        self._available = asyncio.Condition()
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._avg_job_seconds = 10.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.{suffix}")
+
+    def _write_meta(self, job: Job):
+        tmp_path = self._path(job.id, "json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(job), f)
+        os.replace(tmp_path, self._path(job.id, "json"))
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap)
+
+    def retry_after(self) -> int:
+        """Seconds until roughly one queue slot frees up"""
+        return max(1, round(self._avg_job_seconds))
+
+    async def enqueue(self, job: Job, payload: bytes) -> Job:
+        if self.pending >= self.max_pending:
+            raise QueueFullError(retry_after=self.retry_after())
+
+        def persist():
+            with open(self._path(job.id, "audio"), "wb") as f:
+                f.write(payload)
+            self._write_meta(job)
+
+        await asyncio.to_thread(persist)
+        self._push(job)
+        await self._notify()
+        return job
+
+    def _push(self, job: Job):
+        self._jobs[job.id] = job
+        self._finished.setdefault(job.id, asyncio.Event())
+        heapq.heappush(self._heap, (job.priority, next(self._counter), job.id))
+
+    async def _notify(self):
+        async with self._available:
+            self._available.notify()
+
+    async def next(self) -> tuple[Job, bytes]:
+        while True:
+            async with self._available:
+                await self._available.wait_for(lambda: bool(self._heap))
+                _, _, job_id = heapq.heappop(self._heap)
+            if await asyncio.to_thread(self._claim, job_id):
+                break
+            # Another worker process runs (or already ran) this job
+            self._jobs.pop(job_id, None)
+            self._finished.pop(job_id, None)
+
+        job = self._jobs[job_id]
+        job.status = "running"
+        job.started_at = time.time()
+        payload = await asyncio.to_thread(self._read_payload, job.id)
+        await asyncio.to_thread(self._write_meta, job)
+        return job, payload
+
+    def _claim(self, job_id: str) -> bool:
+        """Take the job's cross-process lock; False if it is held or the job already finished"""
+        if fcntl is None:
+            return True
+        fd = os.open(self._path(job_id, "claim"), os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        # The previous holder may have completed it before releasing the lock
+        job = self._read_meta(job_id)
+        if job is None or job.done or not os.path.exists(self._path(job_id, "audio")):
+            self._release(fd, job_id)
+            return False
+        self._claims[job_id] = fd
+        return True
+
+    def _release(self, fd: int, job_id: str):
+        try:
+            os.remove(self._path(job_id, "claim"))
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+
+    def _read_meta(self, job_id: str) -> Optional[Job]:
+        try:
+            with open(self._path(job_id, "json")) as f:
+                return Job(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError):
+            traceback.print_exc()
+            return None
+
+    def _read_payload(self, job_id: str) -> bytes:
+        with open(self._path(job_id, "audio"), "rb") as f:
+            return f.read()
+
+    async def complete(self, job: Job, result: Optional[dict] = None, error: Optional[str] = None):
+        job.status = "failed" if error else "succeeded"
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        if job.started_at:
+            # Moving average used for Retry-After estimates
+            self._avg_job_seconds = 0.9 * self._avg_job_seconds + 0.1 * (job.finished_at - job.started_at)
+
+        def persist():
+            self._write_meta(job)
+            try:
+                os.remove(self._path(job.id, "audio"))
+            except FileNotFoundError:
+                pass
+            fd = self._claims.pop(job.id, None)
+            if fd is not None:
+                self._release(fd, job.id)
+
+        await asyncio.to_thread(persist)
+        self._finished[job.id].set()
+        self._expire_results()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Current job state; jobs enqueued or run by other worker processes are read from disk"""
+        job = self._jobs.get(job_id)
+        if job and (job.done or job.id in self._claims):
+            return job
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        return await asyncio.to_thread(self._read_meta, job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Long-poll: return once the job finishes or the timeout elapses"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        job = await self.get(job_id)
+        while job and not job.done:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            # Only set when this process runs the job; otherwise poll the disk
+            finished = self._finished.get(job_id)
+            if finished:
+                try:
+                    await asyncio.wait_for(finished.wait(), min(remaining, self.poll_interval))
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(min(remaining, self.poll_interval))
+            job = await self.get(job_id)
+        return job
+
+    def _expire_results(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+            self._finished.pop(job_id, None)
+            try:
+                os.remove(self._path(job_id, "json"))
+            except FileNotFoundError:
+                pass
+
+    async def recover(self) -> int:
+        """
+        Reload jobs from disk; queued or interrupted jobs are re-queued
+
+        Every worker process re-queues them, but each job is claimed (and run)
+        by only one of them.
+        """
+        def load() -> list[Job]:
+            jobs = []
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    try:
+                        with open(os.path.join(self.directory, name)) as f:
+                            jobs.append(Job(**json.load(f)))
+                    except (OSError, ValueError, TypeError):
+                        traceback.print_exc()
+            return jobs
+
+        requeued = 0
+        for job in sorted(await asyncio.to_thread(load), key=lambda j: j.created_at):
+            if job.done:
+                self._jobs[job.id] = job
+                self._finished.setdefault(job.id, asyncio.Event()).set()
+            elif os.path.exists(self._path(job.id, "audio")):
+                job.status, job.started_at = "queued", None
+                self._push(job)
+                requeued += 1
+        self._expire_results()
+        async with self._available:
+            self._available.notify_all()
+        return requeued
+
+
+class JobWorkerPool:
+    """Fixed-size pool of asyncio workers pulling jobs from a JobQueue"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[Job, bytes], Awaitable[dict]],
+        workers: int = 4
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self):
+        while True:
+            job, payload = await self.queue.next()
+            try:
+                result = await self.handler(job, payload)
+                await self.queue.complete(job, result=result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                traceback.print_exc()
+                await self.queue.complete(job, error=str(e))
+
+
+def new_job(user_id: str, priority: str, filename: Optional[str], content_type: Optional[str]) -> Job:
+    return Job(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        priority=PRIORITIES.get(priority, PRIORITIES["normal"]),
+        filename=filename,
+        content_type=content_type
+    )
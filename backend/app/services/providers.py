@@ -0,0 +1,116 @@
+"""
+Service Providers
+Lazily constructed, process-wide service instances shared by all routers.
+Nothing here touches the network or requires secrets until first use, and
+heavy client libraries (openai, supabase) are only imported on demand.
+"""
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from ..core.config import settings
+
+if TYPE_CHECKING:
+    from .agent_service import AgentService
+    from .archive_service import ArchiveService
+    from .category_service import CategoryService
+    from .database_service import DatabaseService
+    from .dedup_service import DedupService
+    from .embedding_backfill import EmbeddingBackfillJob
+    from .export_service import ExportService
+    from .job_queue import LocalDiskJobQueue, JobWorkerPool
+    from .session_store import ConversationSessionStore
+    from .sync_service import SyncService
+    from .voice_pipeline import VoicePipeline
+    from .voice_service import VoiceService
+
+
+@lru_cache(maxsize=None)
+def get_db_service() -> "DatabaseService":
+    from .database_service import DatabaseService
+    return DatabaseService()
+
+
+@lru_cache(maxsize=None)
+def get_agent_service() -> "AgentService":
+    from .agent_service import AgentService
+    return AgentService()
+
+
+@lru_cache(maxsize=None)
+def get_voice_service() -> "VoiceService":
+    from .voice_service import VoiceService
+    return VoiceService()
+
+
+@lru_cache(maxsize=None)
+def get_dedup_service() -> "DedupService":
+    from .dedup_service import DedupService
+    return DedupService(get_db_service())
+
+
+@lru_cache(maxsize=None)
+def get_category_service() -> "CategoryService":
+    from .category_service import CategoryService
+    return CategoryService(get_db_service())
+
+
+@lru_cache(maxsize=None)
+def get_voice_pipeline() -> "VoicePipeline":
+    from .voice_pipeline import VoicePipeline
+    return VoicePipeline(get_voice_service(), get_agent_service(), get_dedup_service(), get_category_service())
+
+
+@lru_cache(maxsize=None)
+def get_session_store() -> "ConversationSessionStore":
+    from .session_store import build_session_store
+    return build_session_store(get_agent_service(), get_db_service())
+
+
+@lru_cache(maxsize=None)
+def get_backfill_job() -> "EmbeddingBackfillJob":
+    from .embedding_backfill import EmbeddingBackfillJob
+    return EmbeddingBackfillJob(get_agent_service(), get_db_service())
+
+
+@lru_cache(maxsize=None)
+def get_export_service() -> "ExportService":
+    from .export_service import ExportService
+    return ExportService(get_db_service())
+
+
+@lru_cache(maxsize=None)
+def get_archive_service() -> "ArchiveService":
+    from .archive_service import ArchiveService
+    return ArchiveService(get_db_service(), settings.archive_bucket)
+
+
+@lru_cache(maxsize=None)
+def get_sync_service() -> "SyncService":
+    from .sync_service import SyncService
+    return SyncService(
+        get_db_service(),
+        page_size=settings.sync_page_size,
+        overlap_seconds=settings.sync_overlap_seconds,
+        tombstone_retention_days=settings.sync_tombstone_retention_days
+    )
+
+
+@lru_cache(maxsize=None)
+def get_job_queue() -> "LocalDiskJobQueue":
+    from .job_queue import LocalDiskJobQueue
+    return LocalDiskJobQueue(
+        settings.job_queue_dir,
+        max_pending=settings.job_queue_max_pending,
+        result_ttl=settings.job_result_ttl_seconds
+    )
+
+
+async def _run_voice_job(job, audio_content: bytes) -> dict:
+    agent_response = await get_voice_pipeline().process(job.user_id, audio_content, job.filename, job.content_type)
+    return agent_response.model_dump()
+
+
+@lru_cache(maxsize=None)
+def get_job_workers() -> "JobWorkerPool":
+    from .job_queue import JobWorkerPool
+    return JobWorkerPool(get_job_queue(), _run_voice_job, workers=settings.job_workers)
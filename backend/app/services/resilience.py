@@ -0,0 +1,252 @@
+"""
+Resilience Layer
+Deadlines, jittered retries, hedged requests and circuit breaking for upstream API calls
+"""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+
+from ..core.profiling import stage
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited because its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker (closed -> open -> half-open)
+
+    After `failure_threshold` consecutive upstream failures the breaker opens and
+    rejects calls immediately for `reset_timeout` seconds. It then lets a single
+    probe call through; success closes it again, failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected without reaching the upstream"""
+        if self.state == "open":
+            return time.monotonic() - self.opened_at < self.reset_timeout
+        return self.state == "half_open" and self._probe_in_flight
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed"""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Release a half-open probe slot without judging the upstream (e.g. on a 4xx)"""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        return {
+            "state": "open" if self.is_open else self.state,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """
+    Get or create the process-wide breaker for an upstream operation
+
+    Breakers are shared so that every service instance talking to the same
+    upstream sees the same health state.
+    """
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+    return _breakers[name]
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient upstream failures: timeouts, connection errors, 429 and 5xx"""
+    if isinstance(exc, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Read a Retry-After hint (seconds) from a rate-limit response, if any"""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ResilientCaller:
+    """
+    Wraps an async upstream call with an overall deadline, jittered exponential
+    retries on transient errors, optional request hedging and a circuit breaker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        hedge_delay: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_delay = hedge_delay
+        self.breaker = breaker or get_breaker(name)
+        self.stats = {"calls": 0, "retries": 0, "hedges": 0, "failures": 0, "short_circuited": 0}
+
+    async def call(self, fn: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """
+        Run `fn` (a zero-argument coroutine factory) under the resilience policy
+
+        Raises:
+            CircuitOpenError: if the breaker is open
+            asyncio.TimeoutError: if the deadline is exhausted
+            Exception: the last upstream error once retries are exhausted
+        """
+        self.stats["calls"] += 1
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            raise CircuitOpenError(f"Circuit '{self.breaker.name}' is open")
+
+        probe = self.breaker.state == "half_open"
+        try:
+            with stage(self.name):
+                return await self._call(fn, timeout)
+        except BaseException:
+            # A cancelled probe (CancelledError is not an Exception) must not
+            # keep the half-open slot taken, or the breaker never closes again
+            if probe:
+                self.breaker.release()
+            raise
+
+    async def _call(self, fn: Callable[[], Awaitable[T]], timeout: Optional[float]) -> T:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        attempt = 0
+
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"Deadline exceeded for '{self.name}'")
+                result = await asyncio.wait_for(self._attempt(fn), remaining)
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.release()
+                    raise
+                remaining = deadline - loop.time()
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.random()
+                delay = max(delay, _retry_after(e) or 0.0)
+                if attempt >= self.max_retries or delay >= remaining:
+                    self.stats["failures"] += 1
+                    self.breaker.record_failure()
+                    raise
+                self.stats["retries"] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.hedge_delay:
+            return await fn()
+
+        # Hedging: if the primary hasn't answered within hedge_delay, fire a
+        # duplicate and take whichever succeeds first.
+        tasks = [asyncio.ensure_future(fn())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if not done:
+                self.stats["hedges"] += 1
+                tasks.append(asyncio.ensure_future(fn()))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> dict:
+        return {"name": self.name, **self.stats, "breaker": self.breaker.snapshot()}
+
+
+class AsyncRateLimiter:
+    """
+    Token-bucket limiter for batch workloads that must stay under a provider quota
+
+    `rate` units are replenished per `period` seconds; `acquire(cost)` waits
+    until enough budget is available (e.g. cost = estimated tokens of a request).
+    """
+
+    def __init__(self, rate: float, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._available = rate
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, cost: float = 1.0):
+        cost = min(cost, self.rate)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._available = min(self.rate, self._available + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._available >= cost:
+                    self._available -= cost
+                    return
+                await asyncio.sleep((cost - self._available) * self.period / self.rate)
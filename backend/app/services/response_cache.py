@@ -0,0 +1,115 @@
+"""
+Response Cache
+Per-user, version-invalidated cache for read endpoints with ETag / 304 support
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+
+from ..core.config import settings
+from ..core.responses import dumps
+
+# Scope used for resources that are not owned by a single user (e.g. invitations)
+GLOBAL_SCOPE = "*"
+
+
+class ResponseCache:
+    """
+    Cached values are keyed by (user, resource, version, params). Write paths
+    bump the (user, resource) version, which makes every cached view of that
+    resource unreachable at once. Entries also expire after `ttl` seconds,
+    which bounds staleness for writes that happened in another worker.
+    """
+
+    def __init__(self, max_entries: int = 2000, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._versions: Dict[tuple[str, str], int] = {}
+        self._epochs: Dict[str, int] = {}
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def bump(self, user_id: str, *resources: str):
+        """Invalidate all cached views of `resources` for one user"""
+        for resource in resources:
+            key = (str(user_id), resource)
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def bump_all(self, *resources: str):
+        """Invalidate `resources` for every user (bulk writes spanning users)"""
+        for resource in resources:
+            self._epochs[resource] = self._epochs.get(resource, 0) + 1
+
+    def key(self, user_id: str, resource: str, params: Optional[dict] = None) -> str:
+        version = self._versions.get((str(user_id), resource), 0)
+        epoch = self._epochs.get(resource, 0)
+        raw = json.dumps([str(user_id), resource, version, epoch, params or {}], sort_keys=True, default=str)
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._entries.get(key)
+        if item is None or item[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return item[1]
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self._entries), **self.stats}
+
+
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    ttl=settings.response_cache_ttl_seconds
+)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+async def cached_response(
+    request: Request,
+    user_id: str,
+    resource: str,
+    params: dict,
+    loader: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Serve a read endpoint from the cache
+
+    The serialized body and its content-hash ETag are cached together, so a
+    fresh entry answers both full requests and `If-None-Match` revalidations
+    (304) without touching the database.
+    """
+    key = response_cache.key(user_id, resource, params)
+    cached = response_cache.get(key)
+    if cached is None:
+        body = dumps(await loader())
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        cached = (body, etag)
+        response_cache.set(key, cached)
+
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        response_cache.stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,209 @@
+"""
+Conversation Session Store
+Server-side conversation state for multi-turn classification, with a rolling
+window of recent turns and automatic summarization of older ones
+"""
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional, Dict
+
+from ..core.config import settings
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class ConversationSession:
+    id: str
+    user_id: str
+    summary: Optional[str] = None
+    turns: list[dict] = field(default_factory=list)
+    last_active: float = field(default_factory=time.monotonic)
+    # Version of the shared row this copy was loaded from (0 = not saved yet)
+    version: int = 0
+
+    @property
+    def token_count(self) -> int:
+        tokens = estimate_tokens(self.summary) if self.summary else 0
+        return tokens + sum(estimate_tokens(turn["content"]) for turn in self.turns)
+
+    def history(self) -> list[dict]:
+        """Messages to send ahead of the current user input"""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        messages.extend(self.turns)
+        return messages
+
+
+class SupabaseSessionBackend:
+    """Shared session backing in the conversation_sessions table"""
+
+    def __init__(self, db_service):
+        self.db_service = db_service
+
+    async def load(self, session_id: str) -> Optional[ConversationSession]:
+        row = await self.db_service.get_conversation_session(session_id)
+        if not row:
+            return None
+        return ConversationSession(
+            id=row["id"],
+            user_id=row["user_id"],
+            summary=row.get("summary"),
+            turns=row.get("turns") or [],
+            version=row.get("version") or 0
+        )
+
+    async def save(self, session: ConversationSession, ttl: int) -> bool:
+        """Save the session unless another worker saved it since it was loaded"""
+        version = await self.db_service.save_conversation_session({
+            "id": session.id,
+            "user_id": session.user_id,
+            "summary": session.summary,
+            "turns": session.turns,
+            "expires_at": (datetime.now().astimezone() + timedelta(seconds=ttl)).isoformat()
+        }, session.version)
+        if version is None:
+            return False
+        session.version = version
+        return True
+
+    async def delete(self, session_id: str):
+        await self.db_service.delete_conversation_session(session_id)
+
+    async def sweep(self):
+        await self.db_service.delete_expired_conversation_sessions()
+
+
+class ConversationSessionStore:
+    """
+    Keeps conversation sessions in-process, or in a shared backend when one is
+    configured. Once a session's prompt size passes the token threshold, all
+    but the most recent turns are folded into a running summary, so each turn
+    costs a bounded prompt. Idle sessions expire after the TTL.
+
+    With a backend the shared row is the source of truth: every access reloads
+    it, and saves are versioned so a turn appended by another worker is never
+    overwritten.
+    """
+
+    # Attempts to re-apply a turn on top of a session another worker just saved
+    max_save_attempts = 5
+
+    def __init__(
+        self,
+        agent_service,
+        backend: Optional[SupabaseSessionBackend] = None,
+        max_recent_turns: int = 6,
+        token_threshold: int = 1500,
+        ttl: int = 1800
+    ):
+        self.agent_service = agent_service
+        self.backend = backend
+        self.max_recent_turns = max_recent_turns
+        self.token_threshold = token_threshold
+        self.ttl = ttl
+        self._sessions: Dict[str, ConversationSession] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._last_sweep = time.monotonic()
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        """Per-session lock so concurrent turns of one session are applied in order"""
+        if session_id not in self._locks:
+            self._locks[session_id] = asyncio.Lock()
+        return self._locks[session_id]
+
+    async def get_or_create(self, user_id: str, session_id: Optional[str] = None) -> ConversationSession:
+        """
+        Get an existing session, or start a new one if session_id is None or unknown/expired
+
+        Raises:
+            PermissionError: if the session belongs to another user
+        """
+        await self._maybe_sweep()
+        session = await self.get(session_id) if session_id else None
+        if session is None:
+            session = ConversationSession(id=session_id or str(uuid.uuid4()), user_id=user_id)
+            if not self.backend:
+                self._sessions[session.id] = session
+        if session.user_id != user_id:
+            raise PermissionError("Session belongs to another user")
+        session.last_active = time.monotonic()
+        return session
+
+    async def get(self, session_id: str) -> Optional[ConversationSession]:
+        if self.backend:
+            # Other workers may have appended turns since this one last saw it
+            return await self.backend.load(session_id)
+        session = self._sessions.get(session_id)
+        if session and time.monotonic() - session.last_active > self.ttl:
+            self._evict(session_id)
+            session = None
+        return session
+
+    async def append_turn(self, session: ConversationSession, user_text: str, assistant_text: str):
+        """
+        Record a completed turn and compact the session if it grew past the threshold
+
+        Raises:
+            RuntimeError: if the shared session kept changing underneath this save
+        """
+        turn = [{"role": "user", "content": user_text}, {"role": "assistant", "content": assistant_text}]
+        for _ in range(self.max_save_attempts):
+            session.turns.extend(turn)
+            session.last_active = time.monotonic()
+            await self._compact(session)
+            if not self.backend or await self.backend.save(session, self.ttl):
+                return
+            # Another worker saved first: re-apply this turn on top of its version
+            latest = await self.backend.load(session.id)
+            session.summary = latest.summary if latest else None
+            session.turns = latest.turns if latest else []
+            session.version = latest.version if latest else 0
+        raise RuntimeError(f"Conversation session {session.id} is being updated concurrently")
+
+    async def _compact(self, session: ConversationSession):
+        keep = self.max_recent_turns * 2
+        if session.token_count > self.token_threshold and len(session.turns) > keep:
+            older, session.turns = session.turns[:-keep], session.turns[-keep:]
+            session.summary = await self.agent_service.summarize_conversation(session.summary, older)
+
+    async def delete(self, session_id: str):
+        self._evict(session_id)
+        if self.backend:
+            await self.backend.delete(session_id)
+
+    def _evict(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        lock = self._locks.get(session_id)
+        if lock and not lock.locked():
+            del self._locks[session_id]
+
+    async def _maybe_sweep(self):
+        """Expire idle sessions, at most once per minute"""
+        now = time.monotonic()
+        if now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+        for session_id in [sid for sid, s in self._sessions.items() if now - s.last_active > self.ttl]:
+            self._evict(session_id)
+        if self.backend:
+            await self.backend.sweep()
+
+
+def build_session_store(agent_service, db_service) -> ConversationSessionStore:
+    """Create the session store configured in settings"""
+    backend = SupabaseSessionBackend(db_service) if settings.session_backend == "supabase" else None
+    return ConversationSessionStore(
+        agent_service,
+        backend=backend,
+        max_recent_turns=settings.session_max_recent_turns,
+        token_threshold=settings.session_summary_token_threshold,
+        ttl=settings.session_ttl_seconds
+    )
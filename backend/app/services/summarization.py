@@ -0,0 +1,188 @@
+"""
+Summarization Worker
+Fills entries.summary in batched LLM calls off the request path and folds
+new summaries into per-category and per-week rollup digests
+"""
+import asyncio
+import traceback
+from datetime import datetime
+from typing import Optional
+
+from ..core.config import settings
+
+
+def week_key(created_at: Optional[str]) -> str:
+    """ISO week of an entry timestamp, e.g. '2026-W07'"""
+    moment = datetime.fromisoformat(created_at) if created_at else datetime.now().astimezone()
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class SummarizationWorker:
+    """
+    Bounded in-process queue of entries waiting for a summary
+
+    New entries are enqueued at ingest; a periodic sweep of `summary IS NULL`
+    rows picks up anything lost to a full queue, a failed batch or a restart.
+    Each LLM call only sees one user's entries. Rollups are only touched for
+    groups that received new entries, with one fold call per group per batch,
+    and are saved in the same transaction that marks the entries summarized.
+    Entries the model skips `max_attempts` times are left out of the sweep.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 20,
+        batch_wait: float = 2.0,
+        maxsize: int = 1000,
+        sweep_interval: float = 600.0,
+        retry_delay: float = 30.0,
+        max_attempts: int = 3
+    ):
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=maxsize)
+        self._queued_ids: set[str] = set()
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.sweep_interval = sweep_interval
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.stats = {
+            "summarized": 0, "skipped": 0, "batches": 0, "failed_batches": 0,
+            "raced_batches": 0, "rollups_updated": 0, "dropped": 0
+        }
+
+    def enqueue(self, entry: dict) -> bool:
+        """
+        Queue an entry ({id, user_id, content, category, created_at}); returns
+        False if it is already queued or the queue is full
+        """
+        if entry["id"] in self._queued_ids:
+            return False
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        self._queued_ids.add(entry["id"])
+        return True
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def _next_batch(self, get_db_service) -> list[dict]:
+        try:
+            first = await asyncio.wait_for(self._queue.get(), self.sweep_interval)
+        except asyncio.TimeoutError:
+            await self._sweep(get_db_service())
+            return []
+        batch = [first]
+        deadline = asyncio.get_running_loop().time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _sweep(self, db_service):
+        try:
+            for entry in await db_service.get_entries_needing_summary(
+                limit=self.batch_size * 5,
+                max_attempts=self.max_attempts
+            ):
+                self.enqueue(entry)
+        except Exception:
+            traceback.print_exc()
+
+    async def run(self, get_agent_service, get_db_service):
+        """
+        Worker loop; services are passed as factories so nothing is
+        constructed until there is work
+        """
+        await self._sweep(get_db_service())
+        while True:
+            batch = await self._next_batch(get_db_service)
+            if not batch:
+                continue
+            by_user: dict[str, list[dict]] = {}
+            for entry in batch:
+                by_user.setdefault(entry["user_id"], []).append(entry)
+            try:
+                for user_id, entries in by_user.items():
+                    try:
+                        await self._process(user_id, entries, get_agent_service(), get_db_service())
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception:
+                        # Rows keep summary NULL and are retried by the next sweep
+                        self.stats["failed_batches"] += 1
+                        traceback.print_exc()
+                        await asyncio.sleep(self.retry_delay)
+            finally:
+                for entry in batch:
+                    self._queued_ids.discard(entry["id"])
+                    self._queue.task_done()
+
+    async def _process(self, user_id: str, entries: list[dict], agent_service, db_service):
+        """Summarize one user's entries and fold them into that user's rollups"""
+        summaries = await agent_service.summarize_entries(entries)
+        summarized = [entry for entry in entries if entry["id"] in summaries]
+        skipped = [entry["id"] for entry in entries if entry["id"] not in summaries]
+
+        groups: dict[tuple[str, str], list[dict]] = {}
+        for entry in summarized:
+            groups.setdefault(("category", entry.get("category") or "Uncategorized"), []).append(entry)
+            groups.setdefault(("week", week_key(entry.get("created_at"))), []).append(entry)
+
+        # All LLM work happens before anything is written
+        rollups = [
+            await self._fold(agent_service, db_service, user_id, scope, scope_key, group, summaries)
+            for (scope, scope_key), group in groups.items()
+        ]
+        updated = await db_service.apply_entry_summaries(
+            user_id,
+            [{"id": entry["id"], "summary": summaries[entry["id"]]} for entry in summarized],
+            skipped,
+            rollups
+        )
+        self.stats["skipped"] += len(skipped)
+        self.stats["batches"] += 1
+        if updated < 0:
+            # Another worker summarized (and folded) some of these first
+            self.stats["raced_batches"] += 1
+            return
+        self.stats["summarized"] += updated
+        self.stats["rollups_updated"] += len(rollups)
+
+    async def _fold(self, agent_service, db_service, user_id, scope, scope_key, entries, summaries) -> dict:
+        """New digest for one rollup; entry_count is the number of entries added"""
+        existing = await db_service.get_rollup(user_id, scope, scope_key)
+        label = f"category '{scope_key}'" if scope == "category" else f"week {scope_key}"
+        digest = await agent_service.fold_rollup(
+            existing["digest"] if existing else None,
+            label,
+            [summaries[entry["id"]] for entry in entries]
+        )
+        timestamps = [entry["created_at"] for entry in entries if entry.get("created_at")]
+        return {
+            "scope": scope,
+            "scope_key": scope_key,
+            "digest": digest,
+            "entry_count": len(entries),
+            "last_entry_at": max(timestamps, key=datetime.fromisoformat) if timestamps else None,
+        }
+
+    def snapshot(self) -> dict:
+        return {"queued": len(self), **self.stats}
+
+
+summarization_worker = SummarizationWorker(
+    batch_size=settings.summary_batch_size,
+    batch_wait=settings.summary_batch_wait_seconds,
+    maxsize=settings.summary_queue_size,
+    sweep_interval=settings.summary_sweep_interval_seconds,
+    max_attempts=settings.summary_max_attempts
+)
@@ -0,0 +1,153 @@
+"""
+Sync Service
+Incremental replication of a user's entries, reminders and global context
+to offline clients (/api/sync). Clients keep an opaque token and receive
+only rows changed since it, plus tombstones for deleted rows.
+"""
+import asyncio
+import base64
+import json
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from .database_service import ENTRY_COLUMNS, DatabaseService
+
+SYNC_TABLES = {
+    "entries": ENTRY_COLUMNS,
+    "reminders": "id, entry_id, due_date, status, created_at, updated_at",
+    "global_context": "id, key, value, description, created_at, updated_at",
+}
+TOMBSTONES = "deleted"
+TOKEN_VERSION = 1
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def encode_token(cursors: dict, issued_at: float) -> str:
+    raw = json.dumps({"v": TOKEN_VERSION, "i": int(issued_at), "c": cursors}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token: str) -> tuple[dict, float]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        if data.get("v") != TOKEN_VERSION:
+            raise InvalidSyncToken("Unsupported sync token version")
+        return data["c"], float(data["i"])
+    except InvalidSyncToken:
+        raise
+    except Exception as e:
+        raise InvalidSyncToken("Malformed sync token") from e
+
+
+class SyncService:
+    """
+    Each table has its own cursor [watermark, last_id]:
+
+    - last_id set: the previous page was full, so the next one continues
+      strictly after (watermark, last_id) in (updated_at, id) order.
+    - last_id null: the table was drained; the next sync re-scans from
+      `watermark - overlap`, catching rows whose transaction started
+      (and stamped updated_at) before the watermark but committed after it.
+
+    Re-sent rows are harmless: clients upsert by id.
+    """
+
+    def __init__(
+        self,
+        db_service: DatabaseService,
+        page_size: int = 1000,
+        overlap_seconds: float = 300.0,
+        tombstone_retention_days: int = 30
+    ):
+        self.db = db_service
+        self.page_size = page_size
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.retention = timedelta(days=tombstone_retention_days)
+        self._last_prune = 0.0
+
+    def _since(self, cursor: Optional[list]) -> tuple[Optional[str], Optional[str]]:
+        if not cursor or not cursor[0]:
+            return None, None
+        watermark, last_id = cursor
+        if last_id is not None:
+            return watermark, last_id
+        return (datetime.fromisoformat(watermark) - self.overlap).isoformat(), None
+
+    def _advance(self, cursor: Optional[list], rows: list[dict], stamp: str) -> list:
+        if len(rows) >= self.page_size:
+            return [rows[-1][stamp], rows[-1]["id"]]
+        if rows:
+            return [rows[-1][stamp], None]
+        if cursor and cursor[0]:
+            return [cursor[0], None]
+        return [None, None]
+
+    async def changes(self, user_id: str, token: Optional[str] = None) -> dict:
+        """
+        Rows changed since `token` (everything when token is empty)
+
+        A token older than the tombstone retention window cannot be served
+        incrementally (its deletes may be pruned); the client gets a full
+        snapshot with `reset: true` and must replace its replica.
+        """
+        cursors, reset = {}, False
+        if token:
+            cursors, issued_at = decode_token(token)
+            if time.time() - issued_at > self.retention.total_seconds():
+                cursors, reset = {}, True
+
+        await self._maybe_prune()
+
+        async def fetch_table(table: str, columns: str):
+            since, after_id = self._since(cursors.get(table))
+            return await self.db.get_changed_rows(
+                table, user_id, since=since, after_id=after_id, limit=self.page_size, columns=columns
+            )
+
+        async def fetch_tombstones():
+            if not token or reset:
+                # A fresh replica has nothing to delete
+                return []
+            since, after_id = self._since(cursors.get(TOMBSTONES))
+            return await self.db.get_tombstones(user_id, since=since, after_id=after_id, limit=self.page_size)
+
+        results = await asyncio.gather(
+            *(fetch_table(table, columns) for table, columns in SYNC_TABLES.items()),
+            fetch_tombstones()
+        )
+        changed = dict(zip(SYNC_TABLES, results[:-1]))
+        tombstones = results[-1]
+
+        next_cursors = {
+            table: self._advance(cursors.get(table), rows, "updated_at")
+            for table, rows in changed.items()
+        }
+        next_cursors[TOMBSTONES] = self._advance(cursors.get(TOMBSTONES), tombstones, "deleted_at")
+        if not token or reset:
+            # Deletes before this snapshot are already reflected in it
+            next_cursors[TOMBSTONES] = [datetime.now(timezone.utc).isoformat(), None]
+
+        return {
+            **changed,
+            "deleted": [{"table": row["table_name"], "id": row["row_id"]} for row in tombstones],
+            "next": encode_token(next_cursors, time.time()),
+            "has_more": any(len(rows) >= self.page_size for rows in (*changed.values(), tombstones)),
+            "reset": reset,
+        }
+
+    async def _maybe_prune(self):
+        """Drop expired tombstones at most once an hour per process"""
+        now = time.monotonic()
+        if now - self._last_prune < 3600:
+            return
+        self._last_prune = now
+        try:
+            await self.db.delete_old_tombstones(datetime.now(timezone.utc) - self.retention)
+        except Exception:
+            traceback.print_exc()
@@ -0,0 +1,242 @@
+"""
+Transcription Backends
+Pluggable speech-to-text: OpenAI Whisper over the network, or a local
+quantized Whisper (faster-whisper / CTranslate2) running in a process pool
+"""
+import asyncio
+import io
+import multiprocessing
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from ..core.config import settings
+from ..models.schemas import TranscriptionResponse
+from .resilience import ResilientCaller, CircuitOpenError, get_breaker
+
+# Rough bitrates for compressed uploads whose duration can't be read cheaply
+_ESTIMATED_BYTES_PER_SECOND = {
+    "audio/webm": 4000,   # Opus ~32 kbit/s (MediaRecorder default)
+    "audio/ogg": 4000,
+    "audio/mpeg": 16000,  # MP3 128 kbit/s
+    "audio/mp4": 16000,
+    "audio/m4a": 16000,
+}
+
+
+def audio_duration_seconds(audio: bytes, content_type: Optional[str]) -> Optional[float]:
+    """
+    Duration of an upload: exact for WAV, estimated from size for common
+    compressed formats, None when unknown
+    """
+    base_type = (content_type or "").split(";")[0].strip().lower()
+    if base_type in ("audio/wav", "audio/x-wav", "audio/wave") or audio[:4] == b"RIFF":
+        try:
+            with wave.open(io.BytesIO(audio)) as wav:
+                return wav.getnframes() / float(wav.getframerate())
+        except (wave.Error, EOFError):
+            return None
+    rate = _ESTIMATED_BYTES_PER_SECOND.get(base_type)
+    return len(audio) / rate if rate else None
+
+
+class TranscriptionBackend(ABC):
+    """Interface: turn audio bytes into a TranscriptionResponse"""
+    name = "base"
+
+    @abstractmethod
+    async def transcribe(
+        self,
+        audio_content: bytes,
+        filename: Optional[str],
+        content_type: Optional[str]
+    ) -> TranscriptionResponse:
+        ...
+
+    def is_available(self) -> bool:
+        return True
+
+    def shutdown(self):
+        pass
+
+
+class OpenAITranscriptionBackend(TranscriptionBackend):
+    """OpenAI whisper-1 through the resilience layer (deadline, retries, breaker)"""
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str = "whisper-1"):
+        from openai import AsyncOpenAI
+        # Retries are handled by the resilience layer, not the SDK
+        self.client = AsyncOpenAI(api_key=api_key, max_retries=0)
+        self.model = model
+        # No hedging here: duplicating multi-megabyte uploads costs more than it saves
+        self.caller = ResilientCaller(
+            "openai.audio",
+            timeout=settings.openai_transcription_timeout_seconds,
+            max_retries=settings.openai_max_retries,
+            breaker=get_breaker("openai.audio", settings.breaker_failure_threshold, settings.breaker_reset_seconds),
+        )
+
+    def is_available(self) -> bool:
+        return not self.caller.breaker.is_open
+
+    async def transcribe(self, audio_content, filename, content_type) -> TranscriptionResponse:
+        response = await self.caller.call(
+            lambda: self.client.audio.transcriptions.create(
+                model=self.model,
+                file=(filename, audio_content, content_type),
+                language="en"
+            )
+        )
+        return TranscriptionResponse(
+            text=response.text,
+            language=getattr(response, "language", "unknown")
+        )
+
+
+# Per-process model for the local backend, loaded once by the pool initializer
+_local_model = None
+
+
+def _init_local_worker(model_name: str, compute_type: str, cpu_threads: int):
+    global _local_model
+    from faster_whisper import WhisperModel
+    _local_model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_local(audio_content: bytes, language: Optional[str]) -> tuple[str, str]:
+    segments, info = _local_model.transcribe(io.BytesIO(audio_content), language=language, beam_size=1, vad_filter=True)
+    text = " ".join(segment.text.strip() for segment in segments)
+    return text.strip(), info.language
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """
+    faster-whisper on CPU (int8 by default) in a ProcessPoolExecutor
+
+    Decoding is CPU-bound and holds the GIL in places, so it runs in worker
+    processes; each loads the model weights once in its initializer rather
+    than per request. The pool starts on first use.
+    """
+    name = "local"
+
+    def __init__(
+        self,
+        model_name: str = "base.en",
+        compute_type: str = "int8",
+        workers: int = 2,
+        cpu_threads: int = 2,
+        language: Optional[str] = "en"
+    ):
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.workers = workers
+        self.cpu_threads = cpu_threads
+        self.language = language
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def is_available(self) -> bool:
+        try:
+            import faster_whisper  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the server already runs threads (to_thread,
+            # embedding executor, stack sampler) whose locks a fork would copy
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_local_worker,
+                initargs=(self.model_name, self.compute_type, self.cpu_threads),
+            )
+        return self._executor
+
+    async def transcribe(self, audio_content, filename, content_type) -> TranscriptionResponse:
+        loop = asyncio.get_running_loop()
+        try:
+            text, language = await loop.run_in_executor(self._pool(), _transcribe_local, audio_content, self.language)
+        except BrokenProcessPool:
+            # A worker died (OOM, failed model load); start a fresh pool next time
+            self.shutdown()
+            raise
+        return TranscriptionResponse(text=text, language=language)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class TranscriptionRouter:
+    """
+    Picks a backend per request
+
+    mode "openai" / "local" pins one backend. mode "auto" sends clips up to
+    `local_max_seconds` to the local model (no upload, no API round trip)
+    and longer or unknown-length audio to OpenAI, where decoding is faster.
+    In every mode, if the chosen backend is unavailable (breaker open,
+    model not installed) or fails, the other one is tried.
+    """
+
+    def __init__(self, backends: dict[str, TranscriptionBackend], mode: str = "openai", local_max_seconds: float = 30.0):
+        if not backends:
+            raise ValueError("No transcription backend is configured")
+        self.backends = backends
+        self.mode = mode
+        self.local_max_seconds = local_max_seconds
+        self.stats = {name: {"requests": 0, "failures": 0} for name in backends}
+
+    def choose(self, audio_content: bytes, content_type: Optional[str]) -> list[TranscriptionBackend]:
+        if self.mode in self.backends:
+            preferred = self.mode
+        else:
+            duration = audio_duration_seconds(audio_content, content_type)
+            short = duration is not None and duration <= self.local_max_seconds
+            preferred = "local" if short and "local" in self.backends else "openai"
+        order = [preferred] + [name for name in self.backends if name != preferred]
+        return [self.backends[name] for name in order if name in self.backends]
+
+    async def transcribe(self, audio_content, filename, content_type) -> TranscriptionResponse:
+        candidates = self.choose(audio_content, content_type)
+        available = [backend for backend in candidates if backend.is_available()] or candidates[:1]
+        last_error: Optional[Exception] = None
+        for backend in available:
+            self.stats[backend.name]["requests"] += 1
+            try:
+                return await backend.transcribe(audio_content, filename, content_type)
+            except CircuitOpenError as e:
+                last_error = e
+            except Exception as e:
+                self.stats[backend.name]["failures"] += 1
+                last_error = e
+        raise last_error
+
+    def shutdown(self):
+        for backend in self.backends.values():
+            backend.shutdown()
+
+    def snapshot(self) -> dict:
+        return {"mode": self.mode, "local_max_seconds": self.local_max_seconds, "backends": self.stats}
+
+
+def build_transcription_router(api_key: Optional[str]) -> TranscriptionRouter:
+    """Backends per settings.transcription_backend ("openai", "local" or "auto")"""
+    mode = settings.transcription_backend
+    backends: dict[str, TranscriptionBackend] = {}
+    if mode in ("local", "auto"):
+        backends["local"] = LocalWhisperBackend(
+            model_name=settings.transcription_local_model,
+            compute_type=settings.transcription_local_compute_type,
+            workers=settings.transcription_local_workers,
+            cpu_threads=settings.transcription_local_cpu_threads,
+        )
+    if api_key:
+        backends["openai"] = OpenAITranscriptionBackend(api_key)
+    elif mode == "openai":
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    return TranscriptionRouter(backends, mode=mode, local_max_seconds=settings.transcription_local_max_seconds)
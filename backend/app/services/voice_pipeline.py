@@ -0,0 +1,98 @@
+"""
+Voice Pipeline
+Transcribe -> classify -> (embed + store NOTE), shared by the synchronous
+endpoint and the background job workers
+"""
+import traceback
+from typing import Optional
+
+from ..core.profiling import stage
+from ..models.schemas import AgentResponse
+from .backfill_queue import embedding_backfill_queue
+from .summarization import summarization_worker
+
+
+class VoicePipeline:
+    """Runs a voice command end to end for one user"""
+
+    def __init__(self, voice_service, agent_service, dedup_service, category_service=None):
+        self.voice_service = voice_service
+        self.agent_service = agent_service
+        self.dedup_service = dedup_service
+        self.category_service = category_service
+
+    async def process(
+        self,
+        user_id: str,
+        audio_content: bytes,
+        filename: Optional[str],
+        content_type: Optional[str]
+    ) -> AgentResponse:
+        """
+        Flow:
+        1. Transcribe audio to text
+        2. Pass transcribed text to Agent Classify Intent Service
+        3. Save NOTEs (deduplicated, with embedding or queued for backfill)
+        4. Queue new entries for background summarization
+        """
+        # Step 1: Transcribe audio
+        with stage("transcribe"):
+            transcription = await self.voice_service.transcribe_bytes(audio_content, filename, content_type)
+        
+        # Step 2: Classify intent using Agent Service
+        with stage("classify"):
+            agent_response = await self.agent_service.classify_input(
+                text=transcription.text,
+                context_vars=None
+            )
+        
+        # Step 3: Automatically save if it's a NOTE
+        if agent_response.intent == 'NOTE':
+            # Generate embedding for the cleaned content
+            with stage("embed"):
+                embedding = await self.agent_service.get_embedding(agent_response.content)
+            
+            # Canonicalize the free-text category against the user's registry
+            with stage("categorize"):
+                category = await self._resolve_category(user_id, agent_response.category, embedding)
+            if category:
+                agent_response.category = category["name"]
+            
+            # Merge/link re-recorded duplicates instead of inserting them again
+            with stage("store"):
+                entry, merged = await self.dedup_service.store_note(
+                    user_id=user_id,
+                    content=agent_response.content,
+                    category=agent_response.category,
+                    embedding=embedding,
+                    embedding_model=self.agent_service.embedding_model,
+                    category_id=category["id"] if category else None
+                )
+            
+            if category and not merged:
+                try:
+                    await self.category_service.record(user_id, category, embedding, self.agent_service.embedding_model)
+                except Exception:
+                    traceback.print_exc()
+            
+            # Embedding upstream failed: store now, embed later
+            if not embedding and not merged and entry.get("id"):
+                embedding_backfill_queue.enqueue(entry["id"], agent_response.content)
+            
+            # Step 4: Summary and rollups are filled in off the request path
+            if not merged and entry.get("id"):
+                summarization_worker.enqueue({
+                    key: entry.get(key) for key in ("id", "user_id", "content", "category", "created_at")
+                })
+        
+        return agent_response
+
+    async def _resolve_category(self, user_id: str, label: str, embedding: list[float]) -> Optional[dict]:
+        """Registry category for the note; None (keep the raw label) if the registry is unavailable"""
+        if self.category_service is None:
+            return None
+        try:
+            return await self.category_service.resolve(user_id, label, embedding, self.agent_service.embedding_model)
+        except Exception:
+            traceback.print_exc()
+            return None
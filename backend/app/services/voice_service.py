@@ -1,42 +1,40 @@
 """
 Voice Service
-Handles audio transcription using OpenAI Whisper
+Handles audio transcription (OpenAI Whisper or a local Whisper model)
 """
 import os
-from openai import AsyncOpenAI
+from typing import Optional
 from fastapi import UploadFile
 from app.models.schemas import TranscriptionResponse
+from app.services.transcription import build_transcription_router
 from dotenv import load_dotenv
 
 class VoiceService:
     def __init__(self):
         load_dotenv()
         self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY environment variable is not set")
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        # Backend selection (openai / local / auto by audio length) lives in the router
+        self.transcription = build_transcription_router(self.api_key)
 
     async def transcribe_audio(self, file: UploadFile) -> TranscriptionResponse:
         """
-        Transcribe audio file using OpenAI Whisper (async)
+        Transcribe an uploaded audio file
         """
-        try:
-            # Pass the file directly to OpenAI
-            # file.file is the underlying file-like object
-            audio_content = await file.read()
-            
-            # Use async OpenAI client
-            response = await self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=(file.filename, audio_content, file.content_type),
-                language="en"
-            )
-            
-            # Return model-neutral structure
-            return TranscriptionResponse(
-                text=response.text,
-                language=getattr(response, "language", "unknown")
-            )
-        except Exception as e:
-            # Re-raise to be handled by the router
-            raise e
+        audio_content = await file.read()
+        return await self.transcribe_bytes(audio_content, file.filename, file.content_type)
+
+    async def transcribe_bytes(
+        self,
+        audio_content: bytes,
+        filename: Optional[str],
+        content_type: Optional[str]
+    ) -> TranscriptionResponse:
+        """
+        Transcribe raw audio bytes with the configured backend(s)
+        """
+        # Errors are re-raised to be handled by the router
+        return await self.transcription.transcribe(audio_content, filename, content_type)
+
+    def shutdown(self):
+        """Stop local transcription worker processes"""
+        self.transcription.shutdown()
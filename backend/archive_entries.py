@@ -0,0 +1,93 @@
+"""
+Entry Archival Script
+Creates upcoming monthly entries partitions and moves cold months to
+zstd-compressed Parquet files in Supabase Storage. A partition is dropped
+only after its file is uploaded, the row count matches and nothing changed
+while it was written; re-running after a failure is safe. Months with
+pending reminders are skipped unless --include-pending. Needs pyarrow (the
+`wire` extra).
+
+Archived months leave the app: they no longer appear in lists, search or
+sync (clients keep the copies they already have).
+
+Usage:
+    python archive_entries.py --list
+    python archive_entries.py --ensure-only
+    python archive_entries.py [--older-than-months N] [--partition entries_2024_01] [--include-pending] [--dry-run] [--yes]
+"""
+import argparse
+import asyncio
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.core.config import settings
+from app.services.archive_service import ArchiveService
+from app.services.database_service import DatabaseService
+
+
+def _size(num_bytes) -> str:
+    return f"{(num_bytes or 0) / (1024 * 1024):.1f} MiB"
+
+
+async def main(args):
+    archive = ArchiveService(DatabaseService(), args.bucket)
+
+    created = await archive.ensure_partitions(settings.partition_months_ahead)
+    print(f"🗓️  Partitions ensured through {created - 1} month(s) ahead")
+    if args.ensure_only:
+        return
+
+    partitions = await archive.partitions()
+    if args.list:
+        for row in partitions:
+            marker = "🧊" if archive.is_cold(row, args.older_than_months) else "  "
+            print(f"{marker} {row['partition_name']}  ~{row['estimated_rows']} rows  {_size(row['total_bytes'])}")
+        return
+
+    if args.partition:
+        targets = [row for row in partitions if row["partition_name"] == args.partition]
+        if not targets:
+            print(f"❌ No partition named {args.partition}")
+            sys.exit(1)
+    else:
+        targets = [row for row in partitions if archive.is_cold(row, args.older_than_months)]
+    if not targets:
+        print(f"✅ Nothing older than {args.older_than_months} months to archive")
+        return
+
+    print(f"🧊 {len(targets)} partition(s) to archive: {', '.join(row['partition_name'] for row in targets)}")
+    if not args.dry_run and not args.yes:
+        if input("Archive and drop these partitions? [y/N] ").strip().lower() != "y":
+            print("⏸️  Aborted")
+            return
+
+    for row in targets:
+        try:
+            report = await archive.archive_partition(row, dry_run=args.dry_run, allow_pending=args.include_pending)
+        except Exception as e:
+            print(f"❌ {row['partition_name']}: {e} (partition left in place, re-run to retry)")
+            sys.exit(1)
+        if report["skipped"]:
+            print(f"⏭️  {report['partition']}: {report['pending_reminders']} pending reminder(s), skipped (--include-pending to archive)")
+            continue
+        action = "written (dry run)" if args.dry_run else f"archived to {args.bucket}/{report['path']}"
+        pending = f", {report['pending_reminders']} pending reminder(s)" if report["pending_reminders"] else ""
+        print(
+            f"📦 {report['partition']}: {report['rows']} rows{pending}, "
+            f"{_size(report['table_bytes'])} -> {_size(report['archive_bytes'])}, {action}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage monthly entries partitions and archive cold months")
+    parser.add_argument("--list", action="store_true", help="List partitions and exit")
+    parser.add_argument("--ensure-only", action="store_true", help="Only create upcoming partitions")
+    parser.add_argument("--older-than-months", type=int, default=settings.archive_after_months, help="Archive months older than this")
+    parser.add_argument("--partition", default=None, help="Archive one partition by name")
+    parser.add_argument("--bucket", default=settings.archive_bucket, help="Supabase Storage bucket")
+    parser.add_argument("--include-pending", action="store_true", help="Also archive months that still have pending reminders")
+    parser.add_argument("--dry-run", action="store_true", help="Write the Parquet files but upload and drop nothing")
+    parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,51 @@
+"""
+Embedding Backfill Script
+Embeds entries that were stored without an embedding, or re-embeds entries
+produced by an older embedding model. Safe to interrupt and re-run: progress
+is checkpointed after every batch.
+
+Usage:
+    python backfill_embeddings.py [--batch-size N] [--max-batches N] [--reset]
+"""
+import argparse
+import asyncio
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.agent_service import AgentService
+from app.services.database_service import DatabaseService
+from app.services.embedding_backfill import EmbeddingBackfillJob
+
+
+async def main(args):
+    job = EmbeddingBackfillJob(
+        AgentService(),
+        DatabaseService(),
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint
+    )
+    if job.status.get("last_id") and not args.reset:
+        print(f"↩️  Resuming after entry {job.status['last_id']} ({job.status['processed']} already processed)")
+
+    print(f"🧮 Backfilling embeddings with model '{job.status['model']}'...")
+    status = await job.run(max_batches=args.max_batches, reset=args.reset)
+
+    print(f"\n📋 Processed: {status['processed']}  Skipped: {status['skipped']}  Batches: {status['batches']}")
+    if status["error"]:
+        print(f"❌ Stopped with error: {status['error']} (re-run to resume)")
+        sys.exit(1)
+    if status["completed"]:
+        print("✅ All entries have up-to-date embeddings")
+    else:
+        print("⏸️  Stopped before completion (re-run to resume)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill or re-embed entry embeddings")
+    parser.add_argument("--batch-size", type=int, default=None, help="Entries per embedding request")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after N batches")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file path")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and start over")
+    asyncio.run(main(parser.parse_args()))
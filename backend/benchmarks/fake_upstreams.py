@@ -0,0 +1,220 @@
+"""
+Fake Upstreams
+Local stand-ins for the OpenAI and Supabase (Auth + PostgREST) APIs with
+configurable latency and error distributions, for offline benchmarking
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+EMBEDDING_DIMENSIONS = 1536
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Log-normal latency with a median and a tail, plus an error rate
+
+    Args:
+        median_ms: Median response latency
+        sigma: Log-normal shape; 0 = constant latency, ~0.5 = realistic API tail
+        error_rate: Fraction of requests answered with `error_status`
+        error_status: HTTP status used for injected errors (e.g. 429, 500, 503)
+    """
+    median_ms: float = 50.0
+    sigma: float = 0.5
+    error_rate: float = 0.0
+    error_status: int = 500
+
+    def sample_seconds(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return random.lognormvariate(0.0, self.sigma) * self.median_ms / 1000
+
+    async def apply(self) -> Optional[JSONResponse]:
+        """Sleep for a sampled latency; return an error response if one is injected"""
+        await asyncio.sleep(self.sample_seconds())
+        if self.error_rate and random.random() < self.error_rate:
+            return JSONResponse(
+                status_code=self.error_status,
+                content={"error": {"message": "Injected failure", "type": "server_error", "code": None}}
+            )
+        return None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def create_fake_openai(
+    chat: LatencyProfile,
+    embeddings: LatencyProfile,
+    transcription: LatencyProfile,
+    transcript_text: str = "Remember that the quarterly report is stored in the shared drive"
+) -> FastAPI:
+    """Fake OpenAI API: chat completions (structured output), embeddings, transcriptions"""
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        if (error := await chat.apply()) is not None:
+            return error
+        body = await request.json()
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+        user_text = str(body["messages"][-1].get("content", ""))
+        parsed = {
+            "intent": "REMINDER" if "remind" in user_text.lower() else "NOTE",
+            "content": transcript_text,
+            "category": "Work",
+            "due_date": None,
+            "is_complete": True,
+            "clarification_question": None,
+        }
+        content = json.dumps(parsed) if body.get("response_format") else "Summary of the conversation."
+        prompt_tokens = prompt_chars // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "refusal": None},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": 40,
+                "total_tokens": prompt_tokens + 40,
+                "prompt_tokens_details": {"cached_tokens": (prompt_tokens // 128) * 128 if prompt_tokens >= 1024 else 0},
+            },
+        }
+
+    @app.post("/v1/embeddings")
+    async def create_embeddings(request: Request):
+        if (error := await embeddings.apply()) is not None:
+            return error
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        return {
+            "object": "list",
+            "model": body.get("model", "text-embedding-3-small"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": [random.random() for _ in range(EMBEDDING_DIMENSIONS)]}
+                for i in range(len(inputs))
+            ],
+            "usage": {"prompt_tokens": 10 * len(inputs), "total_tokens": 10 * len(inputs)},
+        }
+
+    @app.post("/v1/audio/transcriptions")
+    async def create_transcription(request: Request):
+        await request.body()
+        if (error := await transcription.apply()) is not None:
+            return error
+        return {"text": transcript_text}
+
+    return app
+
+
+def create_fake_supabase(database: LatencyProfile, auth: LatencyProfile) -> FastAPI:
+    """
+    Fake Supabase: GoTrue /auth/v1/user and a minimal in-memory PostgREST
+    (insert/select/update/delete/upsert on any table, plus RPC calls)
+    """
+    app = FastAPI()
+    tables: dict[str, list[dict]] = {}
+
+    @app.get("/auth/v1/user")
+    async def get_user(request: Request):
+        if (error := await auth.apply()) is not None:
+            return error
+        token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        user_id = str(uuid.uuid5(uuid.NAMESPACE_URL, token or "anonymous"))
+        return {
+            "id": user_id,
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": f"{user_id[:8]}@bench.local",
+            "app_metadata": {},
+            "user_metadata": {},
+            "created_at": _now(),
+        }
+
+    @app.post("/rest/v1/rpc/{function}")
+    async def rpc(function: str, request: Request):
+        if (error := await database.apply()) is not None:
+            return error
+        params = await request.json()
+        if function == "bulk_update_embeddings":
+            return len(params.get("updates", []))
+        return []
+
+    @app.api_route("/rest/v1/{table}", methods=["GET", "POST", "PATCH", "DELETE"])
+    async def rest(table: str, request: Request):
+        if (error := await database.apply()) is not None:
+            return error
+        rows = tables.setdefault(table, [])
+        if request.method == "POST":
+            payload = await request.json()
+            new_rows = payload if isinstance(payload, list) else [payload]
+            for row in new_rows:
+                row.setdefault("id", str(uuid.uuid4()))
+                row.setdefault("created_at", _now())
+                row["updated_at"] = _now()
+            rows.extend(new_rows)
+            return JSONResponse(status_code=201, content=new_rows)
+
+        # Only equality filters are honoured; enough for benchmarking access paths
+        filters = {
+            key: value.removeprefix("eq.")
+            for key, value in request.query_params.items()
+            if value.startswith("eq.")
+        }
+        matched = [row for row in rows if all(str(row.get(k)) == v for k, v in filters.items())]
+        if request.method == "GET":
+            limit = int(request.query_params.get("limit", 100))
+            offset = int(request.query_params.get("offset", 0))
+            return matched[offset:offset + limit]
+        if request.method == "PATCH":
+            updates = await request.json()
+            for row in matched:
+                row.update(updates)
+                row["updated_at"] = _now()
+            return matched
+        tables[table] = [row for row in rows if row not in matched]
+        return matched
+
+    return app
+
+
+class BackgroundServer:
+    """Runs an ASGI app with uvicorn in a daemon thread"""
+
+    def __init__(self, app: FastAPI, port: int, host: str = "127.0.0.1"):
+        self.url = f"http://{host}:{port}"
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self) -> "BackgroundServer":
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Fake server at {self.url} failed to start")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
@@ -0,0 +1,244 @@
+"""
+Voice Pipeline Benchmark
+Drives /api/voice/process, /api/agent/classify and the DatabaseService paths
+against local fake OpenAI/Supabase servers and reports throughput, latency
+percentiles and memory per request. Optionally gates against a baseline.
+
+Usage (from backend/):
+    python -m benchmarks.run --concurrency 1,8,32 --requests 200
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --baseline baseline.json --max-regression 0.15
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import statistics
+import sys
+import time
+import tracemalloc
+import wave
+
+from .fake_upstreams import BackgroundServer, LatencyProfile, create_fake_openai, create_fake_supabase
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _make_wav(seconds: float = 3.0, rate: int = 16000) -> bytes:
+    """Silent mono 16-bit WAV; the fake Whisper ignores the content"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def _drive(call, concurrency: int, total: int) -> tuple[list[float], int, float]:
+    """Run `call(i)` `total` times with `concurrency` workers; returns latencies, errors, wall time"""
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def _measure_memory(call, concurrency: int, total: int) -> float:
+    """Peak traced allocation during a short run, per in-flight request (KiB)"""
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await _drive(call, concurrency, total)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - baseline) / concurrency / 1024
+
+
+def build_scenarios(client, db_service, users: int) -> dict:
+    """Scenario name -> async call(i) returning True on success"""
+    audio = _make_wav()
+    classify_body = {"text": "remind me to send the quarterly report to finance tomorrow", "context_vars": {"team": "platform"}}
+
+    def headers(i: int) -> dict:
+        return {"Authorization": f"Bearer bench-user-{i % users}"}
+
+    async def voice_process(i: int) -> bool:
+        files = {"file": ("note.wav", audio, "audio/wav")}
+        response = await client.post("/api/voice/process", files=files, headers=headers(i))
+        return response.status_code < 400
+
+    async def agent_classify(i: int) -> bool:
+        response = await client.post("/api/agent/classify", json=classify_body, headers=headers(i))
+        return response.status_code < 400
+
+    async def db_create_entry(i: int) -> bool:
+        entry = await db_service.create_entry(
+            user_id=f"bench-user-{i % users}",
+            content="Benchmark note content",
+            category="Work",
+            embedding=[0.0] * 1536,
+            embedding_model="text-embedding-3-small"
+        )
+        return bool(entry)
+
+    async def db_get_entries(i: int) -> bool:
+        await db_service.get_entries(user_id=f"bench-user-{i % users}", limit=50)
+        return True
+
+    return {
+        "voice": voice_process,
+        "classify": agent_classify,
+        "db_create": db_create_entry,
+        "db_list": db_get_entries,
+    }
+
+
+def check_regressions(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Compare p95 latency and throughput against a baseline report"""
+    failures = []
+    for key, base in baseline["results"].items():
+        current = report["results"].get(key)
+        if current is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            failures.append(f"{key}: p95 {current['p95_ms']:.1f}ms > baseline {base['p95_ms']:.1f}ms (+{tolerance:.0%})")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            failures.append(f"{key}: throughput {current['throughput_rps']:.1f}/s < baseline {base['throughput_rps']:.1f}/s (-{tolerance:.0%})")
+    return failures
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.main import app
+    from app.services.database_service import DatabaseService
+
+    db_service = DatabaseService()
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        scenarios = build_scenarios(client, db_service, args.users)
+        for name in args.scenarios:
+            call = scenarios[name]
+            # Warm up connection pools and lazy clients
+            await _drive(call, 1, 3)
+            for concurrency in args.concurrency:
+                latencies, errors, wall = await _drive(call, concurrency, args.requests)
+                latencies.sort()
+                memory_kib = await _measure_memory(call, concurrency, min(args.requests, concurrency * 4))
+                key = f"{name}@c{concurrency}"
+                results[key] = {
+                    "scenario": name,
+                    "concurrency": concurrency,
+                    "requests": args.requests,
+                    "errors": errors,
+                    "throughput_rps": args.requests / wall,
+                    "mean_ms": statistics.fmean(latencies) * 1000,
+                    "p50_ms": _percentile(latencies, 50) * 1000,
+                    "p95_ms": _percentile(latencies, 95) * 1000,
+                    "p99_ms": _percentile(latencies, 99) * 1000,
+                    "memory_kib_per_request": memory_kib,
+                }
+                r = results[key]
+                print(
+                    f"{key:<20} {r['throughput_rps']:>8.1f}/s  p50 {r['p50_ms']:>7.1f}ms  "
+                    f"p95 {r['p95_ms']:>7.1f}ms  p99 {r['p99_ms']:>7.1f}ms  "
+                    f"mem {r['memory_kib_per_request']:>7.1f}KiB/req  errors {errors}"
+                )
+    return {"config": {k: v for k, v in vars(args).items() if k not in ("baseline", "output")}, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the voice-to-entry pipeline")
+    parser.add_argument("--scenarios", default="voice,classify,db_create,db_list", type=lambda s: s.split(","))
+    parser.add_argument("--concurrency", default="1,8,32", type=lambda s: [int(c) for c in s.split(",")])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--users", type=int, default=16, help="Distinct bearer tokens / user ids")
+    parser.add_argument("--chat-latency-ms", type=float, default=400)
+    parser.add_argument("--embedding-latency-ms", type=float, default=80)
+    parser.add_argument("--transcription-latency-ms", type=float, default=900)
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--openai-error-status", type=int, default=500)
+    parser.add_argument("--db-latency-ms", type=float, default=15)
+    parser.add_argument("--auth-latency-ms", type=float, default=20)
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal tail shape (0 = constant)")
+    parser.add_argument("--output", help="Write the JSON report here (use as a future baseline)")
+    parser.add_argument("--baseline", help="Fail if results regress against this report")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    args = parser.parse_args()
+
+    def openai_profile(median_ms):
+        return LatencyProfile(median_ms, args.latency_sigma, args.openai_error_rate, args.openai_error_status)
+
+    openai_server = BackgroundServer(create_fake_openai(
+        chat=openai_profile(args.chat_latency_ms),
+        embeddings=openai_profile(args.embedding_latency_ms),
+        transcription=openai_profile(args.transcription_latency_ms),
+    ), _free_port()).start()
+    supabase_server = BackgroundServer(create_fake_supabase(
+        database=LatencyProfile(args.db_latency_ms, args.latency_sigma),
+        auth=LatencyProfile(args.auth_latency_ms, args.latency_sigma),
+    ), _free_port()).start()
+
+    # Must be set before the app (and its clients) are imported
+    os.environ.update({
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{openai_server.url}/v1",
+        "SUPABASE_URL": supabase_server.url,
+        "SUPABASE_ANON_KEY": "bench-anon",
+        "SUPABASE_SERVICE_KEY": "bench-service",
+    })
+
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        openai_server.stop()
+        supabase_server.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = check_regressions(report, json.load(f), args.max_regression)
+        if failures:
+            print("\n❌ Performance regressions:")
+            for failure in failures:
+                print(f"   - {failure}")
+            sys.exit(1)
+        print("\n✅ No performance regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Serialization Benchmark
+Compares response serialization cost for entry lists: FastAPI's default
+path (validate + jsonable_encoder + json.dumps) vs the trusted-row orjson path.
+
+Usage (from backend/):
+    python -m benchmarks.serialization [--sizes 100,1000] [--repeat 20]
+"""
+import argparse
+import json
+import random
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import dump_trusted, dumps, parse_embedding, orjson
+from app.models.schemas import Entry
+
+
+def make_rows(count: int, with_embedding: bool) -> list[dict]:
+    """Rows shaped like PostgREST output (timestamps and vectors as text)"""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        row = {
+            "id": str(uuid.uuid4()),
+            "user_id": str(uuid.uuid4()),
+            "content": f"Benchmark note number {i} about the quarterly planning meeting",
+            "summary": None,
+            "intent": "NOTE",
+            "category": "Work",
+            "duplicate_count": 0,
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+            "updated_at": (now - timedelta(minutes=i)).isoformat(),
+        }
+        if with_embedding:
+            row["embedding"] = "[" + ",".join(f"{random.uniform(-1, 1):.8f}" for _ in range(1536)) + "]"
+        rows.append(row)
+    return rows
+
+
+def default_path(rows: list[dict]) -> bytes:
+    """What response_model=list[Entry] + JSONResponse does"""
+    entries = [
+        Entry.model_validate(dict(row, embedding=json.loads(row["embedding"])) if "embedding" in row else row)
+        for row in rows
+    ]
+    content = jsonable_encoder([entry.model_dump() for entry in entries])
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows: list[dict]) -> bytes:
+    """Trusted rows projected with model_construct, encoded with orjson"""
+    include_embedding = bool(rows) and "embedding" in rows[0]
+    prepared = [dict(row, embedding=parse_embedding(row["embedding"])) if include_embedding else row for row in rows]
+    return dumps(dump_trusted(Entry, prepared, exclude=None if include_embedding else {"embedding"}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entry list serialization benchmark")
+    parser.add_argument("--sizes", default="100,1000", type=lambda s: [int(n) for n in s.split(",")])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"orjson available: {orjson is not None}\n")
+    print(f"{'payload':<28} {'default ms':>11} {'fast ms':>9} {'speedup':>8} {'size KiB':>9}")
+    for size in args.sizes:
+        for with_embedding in (False, True):
+            rows = make_rows(size, with_embedding)
+            default_s = min(timeit.repeat(lambda: default_path(rows), number=1, repeat=args.repeat))
+            fast_s = min(timeit.repeat(lambda: fast_path(rows), number=1, repeat=args.repeat))
+            label = f"{size} entries{' + embeddings' if with_embedding else ''}"
+            print(
+                f"{label:<28} {default_s * 1000:>11.2f} {fast_s * 1000:>9.2f} "
+                f"{default_s / fast_s:>7.1f}x {len(fast_path(rows)) / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Transcription Backend Benchmark
+Throughput and latency of the remote (OpenAI Whisper) path versus the local
+faster-whisper process pool, at several concurrency levels.
+
+The remote path runs against the fake OpenAI server with a configurable
+latency profile unless --real-openai is given (uses OPENAI_API_KEY and
+costs money). The local path needs the `local-stt` extra. Pass a real
+recording with --audio; the synthetic default (a tone) is only useful for
+measuring overhead, since VAD drops most of it.
+
+Usage (from backend/):
+    python -m benchmarks.transcription --audio sample.wav --concurrency 1,4,8 --requests 32
+    python -m benchmarks.transcription --backends local --local-workers 4 --model small.en
+"""
+import argparse
+import asyncio
+import io
+import math
+import os
+import statistics
+import struct
+import time
+import wave
+
+from .fake_upstreams import BackgroundServer, LatencyProfile, create_fake_openai
+from .run import _drive, _free_port, _percentile
+
+
+def _make_tone(seconds: float, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        frames = (int(8000 * math.sin(2 * math.pi * 220 * i / rate)) for i in range(int(seconds * rate)))
+        wav.writeframes(b"".join(struct.pack("<h", frame) for frame in frames))
+    return buffer.getvalue()
+
+
+def _build_backend(name: str, args):
+    from app.services.transcription import LocalWhisperBackend, OpenAITranscriptionBackend
+
+    if name == "openai":
+        return OpenAITranscriptionBackend(os.environ["OPENAI_API_KEY"])
+    backend = LocalWhisperBackend(
+        model_name=args.model,
+        compute_type=args.compute_type,
+        workers=args.local_workers,
+        cpu_threads=args.cpu_threads,
+    )
+    if not backend.is_available():
+        raise SystemExit("❌ faster-whisper is not installed (pip install 'backend[local-stt]')")
+    return backend
+
+
+async def run(args, audio: bytes, content_type: str) -> dict:
+    from app.services.transcription import audio_duration_seconds
+
+    duration = audio_duration_seconds(audio, content_type) or 0.0
+    print(f"Audio: {len(audio) / 1024:.1f} KiB, {duration:.1f}s\n")
+    results = {}
+    for name in args.backends:
+        backend = _build_backend(name, args)
+
+        async def call(i: int) -> bool:
+            response = await backend.transcribe(audio, "sample.wav", content_type)
+            return response.text is not None
+
+        try:
+            # Warm-up: for the local backend this starts the workers and loads the model
+            started = time.perf_counter()
+            await _drive(call, args.local_workers if name == "local" else 1, args.local_workers if name == "local" else 1)
+            print(f"{name}: warm-up {time.perf_counter() - started:.1f}s")
+
+            for concurrency in args.concurrency:
+                latencies, errors, wall = await _drive(call, concurrency, args.requests)
+                latencies.sort()
+                key = f"{name}@c{concurrency}"
+                results[key] = {
+                    "throughput_rps": args.requests / wall,
+                    "audio_seconds_per_second": args.requests * duration / wall,
+                    "mean_ms": statistics.fmean(latencies) * 1000,
+                    "p50_ms": _percentile(latencies, 50) * 1000,
+                    "p95_ms": _percentile(latencies, 95) * 1000,
+                    "errors": errors,
+                }
+                r = results[key]
+                print(
+                    f"{key:<14} {r['throughput_rps']:>7.2f}/s  {r['audio_seconds_per_second']:>7.1f}x realtime  "
+                    f"p50 {r['p50_ms']:>8.1f}ms  p95 {r['p95_ms']:>8.1f}ms  errors {errors}"
+                )
+        finally:
+            backend.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remote vs local transcription benchmark")
+    parser.add_argument("--backends", default="openai,local", type=lambda s: s.split(","))
+    parser.add_argument("--audio", help="WAV file to transcribe (default: synthetic tone)")
+    parser.add_argument("--seconds", type=float, default=8.0, help="Length of the synthetic clip")
+    parser.add_argument("--concurrency", default="1,4,8", type=lambda s: [int(c) for c in s.split(",")])
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--model", default="base.en")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--local-workers", type=int, default=2)
+    parser.add_argument("--cpu-threads", type=int, default=2)
+    parser.add_argument("--real-openai", action="store_true", help="Call the real API instead of the fake server")
+    parser.add_argument("--transcription-latency-ms", type=float, default=900)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    args = parser.parse_args()
+
+    if args.audio:
+        with open(args.audio, "rb") as f:
+            audio = f.read()
+    else:
+        audio = _make_tone(args.seconds)
+
+    server = None
+    if "openai" in args.backends and not args.real_openai:
+        server = BackgroundServer(create_fake_openai(
+            chat=LatencyProfile(0),
+            embeddings=LatencyProfile(0),
+            transcription=LatencyProfile(args.transcription_latency_ms, args.latency_sigma),
+        ), _free_port()).start()
+        os.environ.update({"OPENAI_API_KEY": "bench", "OPENAI_BASE_URL": f"{server.url}/v1"})
+
+    try:
+        asyncio.run(run(args, audio, "audio/wav"))
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("starlette")
+
+from app.core.admission import (
+    AdmissionLimiter,
+    AdmissionMiddleware,
+    AdmissionRejected,
+    MemoryBudget,
+)
+from app.core.config import settings
+
+TOKEN = b"Bearer header.payload.signature"
+
+
+def _scope(headers=(), method="POST", path="/api/voice/process"):
+    return {"type": "http", "method": method, "path": path, "headers": list(headers)}
+
+
+def _body(*chunks):
+    """An ASGI receive callable yielding `chunks` and counting how many were read"""
+    messages = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1} for i, chunk in enumerate(chunks)]
+    state = {"read": 0}
+
+    async def receive():
+        state["read"] += 1
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    return receive, state
+
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+
+    async def __call__(self, message):
+        self.messages.append(message)
+
+    @property
+    def status(self):
+        return self.messages[0]["status"]
+
+    @property
+    def headers(self):
+        return dict(self.messages[0]["headers"])
+
+    @property
+    def detail(self):
+        return json.loads(self.messages[1]["body"])["detail"]
+
+
+async def read_all(scope, receive, send):
+    """Endpoint stand-in: drain the body, then answer 200"""
+    while True:
+        message = await receive()
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _middleware(app=read_all, max_concurrent=1, max_queue=0, queue_timeout=1.0, budget_bytes=1024):
+    limiter = AdmissionLimiter("voice", max_concurrent, max_queue, queue_timeout)
+    budget = MemoryBudget(budget_bytes)
+    middleware = AdmissionMiddleware(app, policies={"/api/voice/process": limiter}, budget=budget)
+    return middleware, limiter, budget
+
+
+def test_limiter_rejects_immediately_when_the_queue_is_full():
+    limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=1, queue_timeout=5.0)
+
+    async def main():
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        limiter.release(0.1)
+        await waiter
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert rejected.retry_after >= 1
+    assert limiter.stats == {"admitted": 2, "rejected_queue_full": 1, "rejected_timeout": 0}
+    assert limiter.waiting == 0
+
+
+def test_limiter_rejects_after_the_queue_timeout():
+    limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=1, queue_timeout=0.01)
+
+    async def main():
+        await limiter.acquire()
+        with pytest.raises(AdmissionRejected):
+            await limiter.acquire()
+
+    asyncio.run(main())
+    assert limiter.stats["rejected_timeout"] == 1
+    assert limiter.waiting == 0
+
+
+def test_memory_budget_admits_one_oversized_request_when_idle():
+    budget = MemoryBudget(100)
+    assert budget.reserve(150)
+    assert not budget.reserve(1)
+    budget.release(150)
+    assert budget.reserve(60) and not budget.reserve(60)
+    assert budget.rejected == 2
+
+
+def test_request_without_a_bearer_token_is_rejected_before_admission():
+    middleware, limiter, budget = _middleware()
+    receive, _ = _body(b"audio")
+    send = Recorder()
+
+    asyncio.run(middleware(_scope([(b"content-length", b"5")]), receive, send))
+
+    assert send.status == 401
+    assert send.headers[b"www-authenticate"] == b"Bearer"
+    assert limiter.stats["admitted"] == 0 and budget.reserved == 0
+
+
+def test_declared_oversized_upload_is_rejected_without_reading(monkeypatch):
+    monkeypatch.setattr(settings, "max_upload_bytes", 10)
+    middleware, _, budget = _middleware()
+    receive, state = _body(b"x" * 20)
+    send = Recorder()
+
+    asyncio.run(middleware(_scope([(b"authorization", TOKEN), (b"content-length", b"20")]), receive, send))
+
+    assert send.status == 413
+    assert state["read"] == 0 and budget.reserved == 0
+
+
+def test_busy_endpoint_gets_a_fast_503_with_retry_after():
+    async def hold(scope, receive, send):
+        await asyncio.sleep(0.05)
+        await read_all(scope, receive, send)
+
+    middleware, _, budget = _middleware(app=hold)
+    headers = [(b"authorization", TOKEN), (b"content-length", b"5")]
+
+    async def main():
+        first, second = Recorder(), Recorder()
+        running = asyncio.ensure_future(middleware(_scope(headers), _body(b"audio")[0], first))
+        await asyncio.sleep(0.01)
+        await middleware(_scope(headers), _body(b"audio")[0], second)
+        await running
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first.status == 200
+    assert second.status == 503 and b"retry-after" in second.headers
+    assert budget.reserved == 0
+
+
+def test_reservation_and_slot_are_released_when_the_app_fails():
+    async def fail(scope, receive, send):
+        raise RuntimeError("boom")
+
+    middleware, limiter, budget = _middleware(app=fail)
+    receive, _ = _body(b"audio")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(middleware(_scope([(b"authorization", TOKEN), (b"content-length", b"5")]), receive, Recorder()))
+    assert budget.reserved == 0 and limiter.active == 0
+
+
+def test_body_longer_than_its_content_length_is_cut_off():
+    middleware, _, budget = _middleware()
+    receive, state = _body(b"x" * 4, b"x" * 4, b"x" * 4)
+    send = Recorder()
+
+    asyncio.run(middleware(_scope([(b"authorization", TOKEN), (b"content-length", b"5")]), receive, send))
+
+    assert send.status == 413
+    assert state["read"] == 2 and budget.reserved == 0
+
+
+def test_chunked_upload_grows_its_reservation_up_to_the_upload_limit(monkeypatch):
+    monkeypatch.setattr(settings, "admission_default_upload_bytes", 4)
+    monkeypatch.setattr(settings, "max_upload_bytes", 10)
+    seen = []
+
+    async def track(scope, receive, send):
+        while True:
+            message = await receive()
+            seen.append(budget.reserved)
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware, _, budget = _middleware(app=track)
+    send = Recorder()
+    asyncio.run(middleware(_scope([(b"authorization", TOKEN)]), _body(b"x" * 3, b"x" * 3, b"x" * 3)[0], send))
+    assert send.status == 200
+    assert seen == [4, 8, 10]
+    assert budget.reserved == 0
+
+    send = Recorder()
+    receive, state = _body(b"x" * 6, b"x" * 6, b"x" * 6)
+    asyncio.run(middleware(_scope([(b"authorization", TOKEN)]), receive, send))
+    assert send.status == 413
+    assert state["read"] == 2 and budget.reserved == 0
+
+
+def test_chunked_upload_is_cut_off_when_the_budget_runs_out(monkeypatch):
+    monkeypatch.setattr(settings, "admission_default_upload_bytes", 4)
+    middleware, _, budget = _middleware(budget_bytes=10)
+    budget.reserve(4)  # another upload in flight
+    receive, state = _body(b"x" * 4, b"x" * 4, b"x" * 4)
+    send = Recorder()
+
+    asyncio.run(middleware(_scope([(b"authorization", TOKEN)]), receive, send))
+
+    assert send.status == 413
+    assert "memory" in send.detail
+    assert state["read"] == 2 and budget.reserved == 4
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("openai")
+
+from app.core.config import settings
+from app.services.agent_service import AgentService
+
+
+class BatchAgent(AgentService):
+    """AgentService with the upstream calls replaced by the local classifier"""
+
+    def __init__(self, max_items_per_call: int = 2, skip: tuple = ()):
+        self.batch_stats = {"calls": 0, "items": 0, "splits": 0, "item_retries": 0, "fallbacks": 0}
+        self.max_items_per_call = max_items_per_call
+        self.skip = set(skip)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.single_calls = []
+
+    async def _track(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(0.005)
+        self.in_flight -= 1
+
+    async def _parse_batch(self, indices, texts, context_vars):
+        await self._track()
+        if len(indices) > self.max_items_per_call:
+            raise ValueError("output truncated")
+        return {i: self._local_classify(texts[i]) for i in indices if i not in self.skip}
+
+    async def classify_input(self, text, context_vars=None):
+        await self._track()
+        self.single_calls.append(text)
+        return self._local_classify(text)
+
+
+def test_chunk_batch_respects_the_item_limit(monkeypatch):
+    monkeypatch.setattr(settings, "classify_batch_max_items", 3)
+    chunks = BatchAgent()._chunk_batch([f"note {i}" for i in range(7)])
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_chunk_batch_respects_the_token_budget(monkeypatch):
+    monkeypatch.setattr(settings, "classify_batch_max_items", 100)
+    monkeypatch.setattr(settings, "classify_batch_max_input_tokens", 400)
+    chunks = BatchAgent()._chunk_batch(["x" * 800, "short", "x" * 800])
+    assert chunks == [[0, 1], [2]]
+
+
+def test_truncated_chunks_are_split_and_results_keep_input_order(monkeypatch):
+    monkeypatch.setattr(settings, "classify_batch_max_items", 8)
+    texts = [f"note number {i}" for i in range(8)]
+    agent = BatchAgent(max_items_per_call=2)
+
+    results = asyncio.run(agent.classify_batch(texts))
+
+    assert [result.content for result in results] == texts
+    assert agent.batch_stats["splits"] == 3
+
+
+def test_skipped_inputs_are_retried_one_at_a_time(monkeypatch):
+    monkeypatch.setattr(settings, "classify_batch_max_items", 4)
+    texts = ["remind me to call", "bought milk", "what did I buy?"]
+    agent = BatchAgent(max_items_per_call=4, skip=(1,))
+
+    results = asyncio.run(agent.classify_batch(texts))
+
+    assert [result.intent for result in results] == ["REMINDER", "NOTE", "QUERY"]
+    assert agent.single_calls == ["bought milk"]
+
+
+def test_concurrency_limit_covers_split_and_single_item_calls(monkeypatch):
+    monkeypatch.setattr(settings, "classify_batch_max_items", 16)
+    monkeypatch.setattr(settings, "classify_batch_concurrency", 2)
+    agent = BatchAgent(max_items_per_call=1)
+
+    results = asyncio.run(agent.classify_batch([f"note {i}" for i in range(32)]))
+
+    assert len(results) == 32
+    assert agent.peak_in_flight == 2
+
+
+def test_local_fallback_is_never_complete():
+    agent = BatchAgent()
+    for text, intent in (("bought milk", "NOTE"), ("remind me to call mom", "REMINDER"), ("what did I buy?", "QUERY")):
+        response = agent._local_classify(text)
+        assert response.intent == intent
+        assert response.category == "Uncategorized"
+        assert not response.is_complete
+        assert response.clarification_question
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.services.archive_service import ArchiveService, _month_after, _months_before
+
+
+class FakeDB:
+    def __init__(self, pending_reminders=0, entries=()):
+        self.state = {"fingerprint": "abc123", "pending_reminders": pending_reminders}
+        self.entries = list(entries)
+        self.reads = []
+        self.uploads = []
+        self.drops = []
+
+    async def get_entry_partition_fingerprint(self, partition_name):
+        return self.state
+
+    async def iter_entries(self, user_id, primary=False, **kwargs):
+        self.reads.append(("entries", primary))
+        if self.entries:
+            yield self.entries
+
+    async def get_reminders_for_entries(self, entry_ids, user_id=None, primary=False):
+        self.reads.append(("reminders", primary))
+        return []
+
+    async def upload_archive(self, bucket, path, file_path, content_type):
+        self.uploads.append(path)
+
+    async def drop_entry_partition(self, partition_name, expected_rows, expected_fingerprint, allow_pending=False):
+        self.drops.append((partition_name, expected_rows, expected_fingerprint, allow_pending))
+        return expected_rows
+
+
+PARTITION = {"partition_name": "entries_2024_01", "month_start": date(2024, 1, 1), "total_bytes": 8192}
+
+
+def test_month_after_rolls_over_the_year():
+    assert _month_after(date(2024, 1, 1)) == date(2024, 2, 1)
+    assert _month_after(date(2024, 12, 1)) == date(2025, 1, 1)
+
+
+def test_months_before_returns_the_first_of_the_month():
+    assert _months_before(date(2024, 3, 15), 2) == date(2024, 1, 1)
+    assert _months_before(date(2024, 3, 15), 3) == date(2023, 12, 1)
+    assert _months_before(date(2024, 3, 15), 0) == date(2024, 3, 1)
+
+
+def test_is_cold_only_for_months_that_ended_long_enough_ago():
+    today = date(2024, 7, 10)
+    assert ArchiveService.is_cold({"month_start": date(2024, 1, 1)}, 5, today)
+    assert not ArchiveService.is_cold({"month_start": date(2024, 1, 1)}, 6, today)
+    assert not ArchiveService.is_cold({"month_start": date(2024, 7, 1)}, 0, today)
+
+
+def test_partition_with_pending_reminders_is_skipped():
+    db = FakeDB(pending_reminders=2)
+    report = asyncio.run(ArchiveService(db, "entry-archive").archive_partition(PARTITION))
+    assert report["skipped"] and not report["dropped"]
+    assert report["pending_reminders"] == 2
+    assert db.uploads == [] and db.drops == []
+
+
+def test_drop_is_checked_against_the_fingerprint_taken_before_writing():
+    pytest.importorskip("pyarrow")
+    entry = {
+        "id": "00000000-0000-0000-0000-000000000001",
+        "user_id": "00000000-0000-0000-0000-000000000002",
+        "content": "archived note",
+        "intent": "NOTE",
+        "embedding": None,
+        "created_at": "2024-01-05T10:00:00+00:00",
+        "updated_at": "2024-01-05T10:00:00+00:00",
+    }
+    db = FakeDB(pending_reminders=1, entries=[entry])
+
+    report = asyncio.run(ArchiveService(db, "entry-archive").archive_partition(PARTITION, allow_pending=True))
+
+    assert report["dropped"] and report["rows"] == 1
+    assert db.drops == [("entries_2024_01", 1, "abc123", True)]
+    assert db.reads == [("entries", True), ("reminders", True)]
@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException
+
+from app.core.auth import get_admin_user
+from app.core.config import settings
+
+
+def _user(user_id="user-1", email="user@example.com"):
+    return SimpleNamespace(id=user_id, email=email)
+
+
+def test_admin_user_listed_by_id_or_email_is_allowed(monkeypatch):
+    monkeypatch.setattr(settings, "admin_users", ["admin-id", "ops@example.com"])
+    assert asyncio.run(get_admin_user(_user("admin-id"))).id == "admin-id"
+    assert asyncio.run(get_admin_user(_user(email="ops@example.com"))).email == "ops@example.com"
+
+
+def test_other_users_are_forbidden(monkeypatch):
+    monkeypatch.setattr(settings, "admin_users", ["admin-id"])
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_admin_user(_user()))
+    assert error.value.status_code == 403
+
+
+def test_no_admins_configured_forbids_everyone(monkeypatch):
+    monkeypatch.setattr(settings, "admin_users", [])
+    with pytest.raises(HTTPException):
+        asyncio.run(get_admin_user(_user(email=None)))
+
+
+def test_privileged_admin_routes_require_an_admin():
+    pytest.importorskip("openai")
+    pytest.importorskip("email_validator")
+    from app.routers.admin import router
+
+    guarded = {
+        (route.path, method)
+        for route in router.routes
+        for method in route.methods
+        if any(dependency.call is get_admin_user for dependency in route.dependant.dependencies)
+    }
+    assert guarded >= {
+        ("/api/admin/embeddings/backfill", "POST"),
+        ("/api/admin/partitions", "GET"),
+        ("/api/admin/profiles", "GET"),
+        ("/api/admin/profiles/{profile_id}", "GET"),
+    }
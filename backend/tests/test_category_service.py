@@ -0,0 +1,116 @@
+import asyncio
+import re
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.services.category_service import CategoryService, canonical_name
+
+MIGRATION = Path(__file__).resolve().parents[2] / "supabase" / "migrations" / "010_category_registry.sql"
+
+
+def _sql_canonical_name(name):
+    """
+    canonical_category_name() from migration 010, evaluated with the
+    patterns read from the SQL itself:
+    LOWER(BTRIM(REGEXP_REPLACE(REGEXP_REPLACE(COALESCE(name, ''), p1, '', 'g'), p2, ' ', 'g')))
+    """
+    body = MIGRATION.read_text().split("FUNCTION canonical_category_name", 1)[1].split("$$")[1]
+    patterns = re.findall(r"'([^']*)', '([^']*)', 'g'", body)
+    (strip_pattern, strip_with), (space_pattern, space_with) = patterns
+    value = re.sub(strip_pattern, strip_with, name or "")
+    value = re.sub(space_pattern, space_with, value)
+    return value.strip(" ").lower()
+
+
+@pytest.mark.parametrize("name", [
+    None,
+    "",
+    "Work",
+    "  Work   Projects  ",
+    "work\tprojects\n",
+    "Health/Fitness!!",
+    "Self-Care",
+    "R&D + Ops",
+    "C++",
+    "to_do",
+    "Café Notes",
+    "日本語 メモ",
+    "Travel ✈️ plans",
+])
+def test_canonical_name_matches_the_sql_function(name):
+    assert canonical_name(name) == _sql_canonical_name(name)
+
+
+def test_canonical_name_examples():
+    assert canonical_name("  Work   Projects!! ") == "work projects"
+    assert canonical_name("Health/Fitness") == "healthfitness"
+    assert canonical_name("R&D + Ops") == "r&d + ops"
+    assert canonical_name("Café") == "café"
+
+
+class StubDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.aliases = []
+        self.created = []
+
+    async def get_categories(self, user_id, with_centroids=False, primary=False):
+        assert with_centroids and primary
+        return [dict(row) for row in self.rows]
+
+    async def add_category_alias(self, category_id, alias):
+        self.aliases.append((category_id, alias))
+        return {}
+
+    async def create_category(self, category_data):
+        self.created.append(category_data)
+        return {"id": f"new-{len(self.created)}", "aliases": [], **category_data}
+
+
+ROWS = [
+    {"id": "work", "name": "Work", "canonical_name": "work", "aliases": ["job"], "centroid": [1.0, 0.0], "centroid_model": "m1"},
+    {"id": "food", "name": "Food", "canonical_name": "food", "aliases": [], "centroid": [0.0, 1.0], "centroid_model": "m1"},
+    {"id": "misc", "name": "Uncategorized", "canonical_name": "uncategorized", "aliases": [], "centroid": None},
+]
+
+
+def _resolve(db, label, embedding=None, model="m1"):
+    service = CategoryService(db, confident_threshold=0.95, fallback_threshold=0.8)
+    return asyncio.run(service.resolve("user-1", label, embedding, model))
+
+
+def test_confident_centroid_wins_over_the_label_and_records_an_alias():
+    db = StubDB(ROWS)
+    category = _resolve(db, "Groceries", [0.05, 1.0])
+    assert category["id"] == "food"
+    assert db.aliases == [("food", "groceries")]
+    assert db.created == []
+
+
+def test_known_label_is_matched_by_name_or_alias_below_the_confident_threshold():
+    db = StubDB(ROWS)
+    assert _resolve(db, "WORK!", [0.7, 0.7])["id"] == "work"
+    assert _resolve(db, "Job", [0.7, 0.7])["id"] == "work"
+    assert db.aliases == [] and db.created == []
+
+
+def test_missing_label_falls_back_to_a_nearby_centroid():
+    db = StubDB(ROWS)
+    assert _resolve(db, "Uncategorized", [0.9, 0.4])["id"] == "work"
+    # Too far from every centroid: the existing Uncategorized row
+    assert _resolve(db, None, [0.7, 0.7])["id"] == "misc"
+
+
+def test_centroids_from_another_model_are_ignored():
+    db = StubDB(ROWS)
+    assert _resolve(db, None, [1.0, 0.0], model="m2")["id"] == "misc"
+
+
+def test_unknown_label_creates_a_category():
+    db = StubDB(ROWS)
+    category = _resolve(db, "  Home   Repairs ", [0.7, 0.7])
+    assert category["id"] == "new-1"
+    assert db.created == [{"user_id": "user-1", "name": "Home Repairs", "canonical_name": "home repairs"}]
@@ -0,0 +1,46 @@
+import asyncio
+import gzip
+
+from app.core.compression import CompressionMiddleware
+
+ETAG = b'"abc123"'
+
+
+def _app(body: bytes, etag: bytes = ETAG):
+    async def app(scope, receive, send):
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), (b"etag", etag)]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+def _call(app, accept_encoding=b"gzip"):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding)]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, None, send))
+    return dict(messages[0]["headers"]), b"".join(m.get("body", b"") for m in messages[1:])
+
+
+def test_compressed_response_gets_a_weak_etag():
+    body = b'{"notes": "' + b"x" * 500 + b'"}'
+    headers, compressed = _call(_app(body))
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"etag"] == b'W/"abc123"'
+    assert gzip.decompress(compressed) == body
+
+
+def test_already_weak_etag_is_not_prefixed_twice():
+    headers, _ = _call(_app(b"x" * 500, etag=b'W/"abc123"'))
+    assert headers[b"etag"] == b'W/"abc123"'
+
+
+def test_small_or_unaccepted_responses_keep_the_strong_etag():
+    headers, body = _call(_app(b"{}"))
+    assert b"content-encoding" not in headers and headers[b"etag"] == ETAG and body == b"{}"
+
+    headers, _ = _call(_app(b"x" * 500), accept_encoding=b"identity")
+    assert b"content-encoding" not in headers and headers[b"etag"] == ETAG
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.services import database_service as database_module
+from app.services.database_service import DatabaseService
+
+
+class FakePool:
+    def __init__(self, name):
+        self.name = name
+
+    async def get(self):
+        return self.name
+
+
+class FakeRPC:
+    def __init__(self, client):
+        self.client = client
+
+    async def execute(self):
+        return type("Result", (), {"data": [{"client": self.client}]})()
+
+
+class FakeClient:
+    def __init__(self, name):
+        self.name = name
+
+    def rpc(self, function, params):
+        return FakeRPC(self.name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(database_module.time, "monotonic", lambda: clock["now"])
+    return clock
+
+
+@pytest.fixture
+def db(clock):
+    service = DatabaseService()
+    service.read_replica_url = "https://replica.example"
+    service.read_your_writes_seconds = 5.0
+    service._primary, service._replica = FakePool("primary"), FakePool("replica")
+    return service
+
+
+def _read(db, user_id="user-1"):
+    return asyncio.run(db.get_read_client(user_id))
+
+
+def test_reads_go_to_the_replica_when_configured(db):
+    assert _read(db) == "replica"
+    assert _read(db, None) == "replica"
+    assert db.routing_stats["replica_reads"] == 2
+
+
+def test_reads_stay_on_the_primary_without_a_replica(db):
+    db.read_replica_url = None
+    assert _read(db) == "primary"
+    assert db.routing_stats == {"primary_reads": 1, "replica_reads": 0, "sticky_reads": 0}
+
+
+def test_a_write_pins_only_that_users_reads_until_the_window_passes(db, clock):
+    db._bump("user-1", "notes")
+
+    assert _read(db, "user-1") == "primary"
+    assert _read(db, "user-2") == "replica"
+    assert db.routing_stats["sticky_reads"] == 1
+
+    clock["now"] += 4.9
+    assert _read(db, "user-1") == "primary"
+    clock["now"] += 0.2
+    assert _read(db, "user-1") == "replica"
+
+
+def test_expired_pins_are_pruned_once_the_map_grows(db):
+    db._last_write = {f"old-{i}": 0.0 for i in range(10000)}
+    db._bump("user-1")
+    assert db._last_write == {"user-1": 1000.0}
+
+
+def test_similar_entries_search_uses_the_replica_unless_primary_is_requested(db):
+    db._primary, db._replica = FakePool(FakeClient("primary")), FakePool(FakeClient("replica"))
+
+    async def search(**kwargs):
+        rows = await db.search_similar_entries("user-1", [0.1, 0.2], **kwargs)
+        return rows[0]["client"]
+
+    assert asyncio.run(search()) == "replica"
+    assert asyncio.run(search(primary=True)) == "primary"
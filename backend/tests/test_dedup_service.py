@@ -0,0 +1,78 @@
+import asyncio
+
+from app.services.dedup_service import DedupService, normalize_content, simhash
+
+
+class FakeDB:
+    def __init__(self, by_simhash=None, neighbours=None):
+        self.by_simhash = by_simhash or {}
+        self.neighbours = neighbours or []
+        self.vector_searches = 0
+        self.search_kwargs = None
+
+    async def get_entries_by_simhash(self, user_id, content_simhash, limit=1):
+        return self.by_simhash.get(content_simhash, [])[:limit]
+
+    async def search_similar_entries(self, **kwargs):
+        self.vector_searches += 1
+        self.search_kwargs = kwargs
+        return self.neighbours
+
+
+def test_simhash_ignores_case_punctuation_and_spacing():
+    assert simhash("Buy milk, eggs and bread!") == simhash("buy  milk eggs AND bread")
+    assert simhash("Buy milk") != simhash("Sell milk")
+
+
+def test_normalize_content_keeps_non_latin_words_and_emoji():
+    assert normalize_content("Привет, мир!") == ["привет", "мир"]
+    assert normalize_content("会议 🎉 明天") == ["会议", "🎉", "明天"]
+    assert normalize_content("it's café time") == ["it's", "café", "time"]
+
+
+def test_simhash_distinguishes_non_ascii_and_emoji_text():
+    hashes = {simhash(text) for text in ("Привет мир", "Пока мир", "会议明天", "🎉🎂", "🚗💥")}
+    assert None not in hashes
+    assert len(hashes) == 5
+
+
+def test_simhash_is_none_without_tokens():
+    assert simhash("") is None
+    assert simhash("?! ...") is None
+
+
+def test_find_duplicate_requires_matching_content_on_simhash_hit():
+    content = "🎉 party tomorrow"
+    colliding = {"id": "a", "content": "completely different note"}
+    db = FakeDB(by_simhash={simhash(content): [colliding]})
+    service = DedupService(db, threshold=0.9)
+
+    assert asyncio.run(service.find_duplicate("user", content)) is None
+    assert service.stats["simhash_hits"] == 0
+
+
+def test_find_duplicate_returns_exact_match_without_vector_search():
+    content = "Привет, мир"
+    original = {"id": "a", "content": "привет мир"}
+    db = FakeDB(by_simhash={simhash(content): [original]})
+    service = DedupService(db, threshold=0.9)
+
+    assert asyncio.run(service.find_duplicate("user", content, embedding=[0.1, 0.2])) is original
+    assert db.vector_searches == 0
+
+
+def test_find_duplicate_skips_prefilter_for_tokenless_content():
+    db = FakeDB(by_simhash={None: [{"id": "a", "content": "?!"}], 0: [{"id": "b", "content": ""}]})
+    service = DedupService(db, threshold=0.9)
+
+    assert asyncio.run(service.find_duplicate("user", "?!")) is None
+
+
+def test_vector_search_reads_from_the_primary():
+    neighbour = {"id": "a", "content": "buy oat milk"}
+    db = FakeDB(neighbours=[neighbour])
+    service = DedupService(db, threshold=0.9)
+
+    assert asyncio.run(service.find_duplicate("user", "buy milk", embedding=[0.1, 0.2])) is neighbour
+    assert db.search_kwargs["primary"] is True
+    assert service.stats["vector_hits"] == 1
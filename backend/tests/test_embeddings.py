@@ -0,0 +1,70 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.embeddings import STORAGE_DIMENSIONS, EmbeddingProvider, MicroBatcher, pad_to_dimensions
+
+
+def test_pad_to_dimensions_zero_pads_to_storage_width():
+    vector = pad_to_dimensions([0.5, -0.5])
+    assert len(vector) == STORAGE_DIMENSIONS
+    assert vector[:2] == [0.5, -0.5]
+    assert not any(vector[2:])
+
+
+def test_pad_to_dimensions_rejects_wider_vectors():
+    with pytest.raises(ValueError):
+        pad_to_dimensions([0.0] * 4, dimensions=3)
+
+
+def test_embedding_provider_requires_embed():
+    with pytest.raises(TypeError):
+        EmbeddingProvider()
+
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    batches = []
+
+    def embed(texts):
+        batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = MicroBatcher(embed, executor, max_batch=32, max_wait=0.01)
+            results = await asyncio.gather(*(batcher.submit([text]) for text in ("a", "bb", "ccc")))
+            return results, batcher.stats
+
+    results, stats = asyncio.run(main())
+    assert results == [[[1.0]], [[2.0]], [[3.0]]]
+    assert batches == [["a", "bb", "ccc"]]
+    assert stats == {"requests": 3, "batches": 1}
+
+
+def test_micro_batcher_flushes_at_max_batch():
+    batches = []
+
+    def embed(texts):
+        batches.append(list(texts))
+        return [[0.0] for _ in texts]
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = MicroBatcher(embed, executor, max_batch=2, max_wait=10.0)
+            return await batcher.submit(["a", "b", "c", "d", "e"])
+
+    assert len(asyncio.run(main())) == 5
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_micro_batcher_propagates_errors_to_every_request():
+    def embed(texts):
+        raise RuntimeError("model failed")
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = MicroBatcher(embed, executor, max_wait=0.001)
+            return await asyncio.gather(batcher.submit(["a"]), batcher.submit(["b"]), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(main()))
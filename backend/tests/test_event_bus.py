@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from app.services.event_bus import EventBus, PostgresNotifyBridge, Subscription
+
+
+def _event(resource, row_id, op="update"):
+    return {"resource": resource, "op": op, "id": row_id}
+
+
+def test_repeated_events_for_one_row_are_coalesced():
+    subscription = Subscription("user-1", max_buffer=4)
+    subscription.push(_event("reminders", "r1", "create"))
+    subscription.push(_event("entries", "e1"))
+    subscription.push(_event("reminders", "r1", "update"))
+
+    events = asyncio.run(subscription.get(timeout=0.1))
+
+    # The newest event wins and moves behind the ones already pending
+    assert events == [_event("entries", "e1"), _event("reminders", "r1", "update")]
+    assert subscription.coalesced == 1
+
+
+def test_overflow_switches_to_a_single_resync():
+    subscription = Subscription("user-1", max_buffer=2)
+    for i in range(5):
+        subscription.push(_event("entries", f"e{i}"))
+
+    assert asyncio.run(subscription.get(timeout=0.1)) == [{"resource": "resync"}]
+    # After the resync the client is caught up and gets events again
+    subscription.push(_event("entries", "e9"))
+    assert asyncio.run(subscription.get(timeout=0.1)) == [_event("entries", "e9")]
+
+
+def test_get_times_out_with_nothing_pending():
+    assert asyncio.run(Subscription("user-1").get(timeout=0.01)) is None
+
+
+def test_bus_delivers_per_user_and_counts_resyncs():
+    bus = EventBus(max_buffer=1)
+    mine, theirs = bus.subscribe("user-1"), bus.subscribe("user-2")
+
+    bus.publish("user-1", "entries", "create", "e1")
+    bus.publish("user-1", "entries", "create", "e2")
+
+    assert asyncio.run(mine.get(timeout=0.1)) == [{"resource": "resync"}]
+    assert asyncio.run(theirs.get(timeout=0.01)) is None
+    assert bus.stats["resyncs"] == 1
+
+    bus.unsubscribe(mine)
+    bus.unsubscribe(theirs)
+    assert bus.snapshot()["subscriptions"] == 0
+
+
+def test_bridge_skips_malformed_notifications():
+    bus = EventBus()
+    subscription = bus.subscribe("user-1")
+    bridge = PostgresNotifyBridge(bus, dsn="postgresql://unused")
+
+    for payload in (
+        "not json",
+        json.dumps([1, 2]),
+        json.dumps({"e": _event("entries", "e1")}),
+        json.dumps({"u": "user-1"}),
+        json.dumps({"u": "user-1", "e": {"op": "update", "id": "e1"}}),
+        json.dumps({"u": "user-1", "e": "entries"}),
+    ):
+        bridge._on_notify(None, 0, bridge.channel, payload)
+    assert bridge.stats["received"] == 0
+
+    bridge._on_notify(None, 0, bridge.channel, json.dumps({"u": "user-1", "e": _event("entries", "e1")}))
+    assert bridge.stats["received"] == 1
+    assert asyncio.run(subscription.get(timeout=0.1)) == [_event("entries", "e1")]
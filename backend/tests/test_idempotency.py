@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.services.idempotency import IdempotencyConflict, IdempotencyStore
+
+
+def test_completed_result_is_replayed():
+    store = IdempotencyStore()
+    calls = 0
+
+    async def process():
+        nonlocal calls
+        calls += 1
+        return {"text": "hello"}
+
+    async def main():
+        first = await store.run("user:voice:key:a", "sha-1", process)
+        second = await store.run("user:voice:key:a", "sha-1", process)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == ({"text": "hello"}, False)
+    assert second == ({"text": "hello"}, True)
+    assert calls == 1
+    assert store.stats["replayed"] == 1
+
+
+def test_concurrent_duplicates_join_the_inflight_run():
+    store = IdempotencyStore()
+    calls = 0
+
+    async def process():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(store.run("k", "sha-1", process) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True]
+    assert store.stats["joined"] == 2
+
+
+def test_failures_are_not_stored():
+    store = IdempotencyStore()
+    attempts = 0
+
+    async def process():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError("transient")
+        return "ok"
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await store.run("k", "sha-1", process)
+        return await store.run("k", "sha-1", process)
+
+    assert asyncio.run(main()) == ("ok", False)
+    assert attempts == 2
+
+
+def test_key_reused_for_different_audio_conflicts():
+    store = IdempotencyStore()
+
+    async def process():
+        return "ok"
+
+    async def main():
+        await store.run("k", "sha-1", process)
+        await store.run("k", "sha-2", process)
+
+    with pytest.raises(IdempotencyConflict):
+        asyncio.run(main())
+
+
+def test_expired_results_run_again():
+    store = IdempotencyStore(ttl=0)
+    calls = 0
+
+    async def process():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    async def main():
+        return [await store.run("k", "sha-1", process), await store.run("k", "sha-1", process)]
+
+    assert asyncio.run(main()) == [(1, False), (2, False)]
+
+
+def test_key_prefers_the_client_key_over_the_fingerprint():
+    assert IdempotencyStore.key("u", "voice", "abc", "sha") == "u:voice:key:abc"
+    assert IdempotencyStore.key("u", "voice", None, "sha") == "u:voice:sha256:sha"
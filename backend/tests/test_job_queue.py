@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.services.job_queue import PRIORITIES, Job, JobQueue, LocalDiskJobQueue, QueueFullError, fcntl
+
+
+def _job(priority: int = PRIORITIES["normal"]) -> Job:
+    return Job(id=str(uuid.uuid4()), user_id="user-1", priority=priority)
+
+
+def test_job_queue_is_abstract():
+    with pytest.raises(TypeError):
+        JobQueue()
+
+
+def test_jobs_run_by_priority_then_fifo(tmp_path):
+    queue = LocalDiskJobQueue(str(tmp_path))
+    low, first, second = _job(PRIORITIES["low"]), _job(PRIORITIES["high"]), _job(PRIORITIES["high"])
+
+    async def main():
+        for job in (low, first, second):
+            await queue.enqueue(job, b"audio")
+        return [(await queue.next())[0].id for _ in range(3)]
+
+    assert asyncio.run(main()) == [first.id, second.id, low.id]
+
+
+def test_full_queue_sheds_load(tmp_path):
+    queue = LocalDiskJobQueue(str(tmp_path), max_pending=1)
+
+    async def main():
+        await queue.enqueue(_job(), b"audio")
+        await queue.enqueue(_job(), b"audio")
+
+    with pytest.raises(QueueFullError):
+        asyncio.run(main())
+
+
+@pytest.mark.skipif(fcntl is None, reason="claim locks need fcntl")
+def test_recovered_job_runs_on_one_worker_only(tmp_path):
+    job = _job()
+
+    async def main():
+        await LocalDiskJobQueue(str(tmp_path)).enqueue(job, b"audio")
+        worker_a, worker_b = LocalDiskJobQueue(str(tmp_path)), LocalDiskJobQueue(str(tmp_path))
+        assert await worker_a.recover() == 1
+        assert await worker_b.recover() == 1
+
+        claimed, payload = await worker_a.next()
+        assert (claimed.id, payload) == (job.id, b"audio")
+        # worker_b's copy is claimed by worker_a, so it never comes out of next()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(worker_b.next(), 0.2)
+
+        # Any worker answers a poll from disk
+        assert (await worker_b.get(job.id)).status == "running"
+        await worker_a.complete(claimed, result={"text": "hi"})
+        return await worker_b.wait(job.id, timeout=1.0)
+
+    finished = asyncio.run(main())
+    assert finished.status == "succeeded"
+    assert finished.result == {"text": "hi"}
+
+
+def test_get_rejects_ids_that_are_not_uuids(tmp_path):
+    queue = LocalDiskJobQueue(str(tmp_path))
+    assert asyncio.run(queue.get("../../etc/passwd")) is None
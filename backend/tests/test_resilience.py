@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("openai")
+
+from app.services.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+def _caller(breaker: CircuitBreaker, **kwargs) -> ResilientCaller:
+    return ResilientCaller("test", timeout=1.0, backoff_base=0.001, breaker=breaker, **kwargs)
+
+
+def _open_breaker() -> CircuitBreaker:
+    """A breaker that has just tripped and lets a probe through right away"""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60.0)
+    caller = _caller(breaker, max_retries=0)
+
+    async def fail():
+        raise asyncio.TimeoutError()
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await caller.call(fail)
+        with pytest.raises(CircuitOpenError):
+            await caller.call(fail)
+
+    asyncio.run(main())
+    assert breaker.snapshot()["state"] == "open"
+    assert caller.stats["short_circuited"] == 1
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = _open_breaker()
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_cancelled_probe_releases_the_half_open_slot():
+    breaker = _open_breaker()
+    caller = _caller(breaker)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def main():
+        probe = asyncio.ensure_future(caller.call(hang))
+        await asyncio.sleep(0.01)
+        assert breaker.is_open
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(main())
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_non_retryable_error_releases_the_probe_without_reopening():
+    breaker = _open_breaker()
+    caller = _caller(breaker)
+
+    async def bad_request():
+        raise ValueError("invalid input")
+
+    with pytest.raises(ValueError):
+        asyncio.run(caller.call(bad_request))
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_transient_errors_are_retried():
+    caller = _caller(CircuitBreaker("test"), max_retries=2)
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise asyncio.TimeoutError()
+        return "ok"
+
+    assert asyncio.run(caller.call(flaky)) == "ok"
+    assert caller.stats["retries"] == 2
+
+
+def test_hedged_request_takes_the_first_answer():
+    caller = _caller(CircuitBreaker("test"), hedge_delay=0.01)
+    delays = [0.5, 0.0]
+
+    async def request():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert asyncio.run(caller.call(request)) == 0.0
+    assert caller.stats["hedges"] == 1
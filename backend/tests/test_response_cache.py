@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from starlette.requests import Request
+
+from app.services import response_cache as cache_module
+from app.services.response_cache import ResponseCache, cached_response
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResponseCache(max_entries=10, ttl=30.0)
+    monkeypatch.setattr(cache_module, "response_cache", cache)
+    return cache
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/api/notes", "headers": headers, "query_string": b""})
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def _get(loader, if_none_match=None, user_id="user-1", params=None):
+    return asyncio.run(cached_response(_request(if_none_match), user_id, "notes", params or {}, loader))
+
+
+def test_second_read_is_served_from_the_cache(cache):
+    loader = Loader([{"id": 1}])
+    first, second = _get(loader), _get(loader)
+    assert json.loads(second.body) == [{"id": 1}]
+    assert first.headers["etag"] == second.headers["etag"]
+    assert second.headers["cache-control"] == "private, no-cache"
+    assert loader.calls == 1
+    assert cache.stats["hits"] == 1
+
+
+def test_matching_if_none_match_gets_a_304(cache):
+    loader = Loader([{"id": 1}])
+    etag = _get(loader).headers["etag"]
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = _get(loader, header)
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == etag
+    assert _get(loader, '"other"').status_code == 200
+    assert cache.stats["not_modified"] == 4
+
+
+def test_bump_after_a_write_reloads_and_changes_the_etag(cache):
+    loader = Loader([{"id": 1}])
+    etag = _get(loader).headers["etag"]
+
+    loader.value = [{"id": 1}, {"id": 2}]
+    cache.bump("user-1", "notes")
+    response = _get(loader, etag)
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert loader.calls == 2
+
+
+def test_bump_is_per_user_and_bump_all_covers_everyone(cache):
+    loader = Loader([])
+    _get(loader, user_id="user-1")
+    _get(loader, user_id="user-2")
+
+    cache.bump("user-2", "notes")
+    _get(loader, user_id="user-1")
+    _get(loader, user_id="user-2")
+    assert loader.calls == 3
+
+    cache.bump_all("notes")
+    _get(loader, user_id="user-1")
+    _get(loader, user_id="user-2")
+    assert loader.calls == 5
+
+
+def test_params_are_part_of_the_key(cache):
+    loader = Loader([])
+    _get(loader, params={"limit": 10})
+    _get(loader, params={"limit": 20})
+    _get(loader, params={"limit": 10})
+    assert loader.calls == 2
+
+
+def test_entries_expire_after_the_ttl(cache):
+    cache.ttl = 0
+    loader = Loader([])
+    _get(loader)
+    _get(loader)
+    assert loader.calls == 2
+
+
+def test_oldest_entries_are_evicted_first():
+    cache = ResponseCache(max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.set(name, name)
+    assert cache.get("a") is None
+    assert cache.get("b") == "b" and cache.get("c") == "c"
@@ -0,0 +1,99 @@
+import asyncio
+import copy
+
+import pytest
+
+from app.services.session_store import ConversationSession, ConversationSessionStore
+
+
+class FakeAgent:
+    def __init__(self):
+        self.summarized = []
+
+    async def summarize_conversation(self, summary, turns):
+        self.summarized.append(turns)
+        return f"{len(turns)} earlier messages"
+
+
+class SharedBackend:
+    """The conversation_sessions row, with the versioned save of the RPC"""
+
+    def __init__(self):
+        self.row = None
+        self.saves = 0
+
+    async def load(self, session_id):
+        return copy.deepcopy(self.row) if self.row and self.row.id == session_id else None
+
+    async def save(self, session, ttl):
+        current = self.row.version if self.row else 0
+        if session.version != current:
+            return False
+        self.saves += 1
+        session.version = current + 1
+        self.row = copy.deepcopy(session)
+        return True
+
+    async def delete(self, session_id):
+        self.row = None
+
+    async def sweep(self):
+        pass
+
+
+def test_in_process_sessions_keep_their_turns():
+    store = ConversationSessionStore(FakeAgent())
+
+    async def main():
+        session = await store.get_or_create("user-1")
+        await store.append_turn(session, "hi", "hello")
+        return await store.get(session.id)
+
+    session = asyncio.run(main())
+    assert [turn["content"] for turn in session.turns] == ["hi", "hello"]
+
+
+def test_session_of_another_user_is_refused():
+    store = ConversationSessionStore(FakeAgent())
+
+    async def main():
+        session = await store.get_or_create("user-1")
+        await store.get_or_create("user-2", session.id)
+
+    with pytest.raises(PermissionError):
+        asyncio.run(main())
+
+
+def test_concurrent_workers_do_not_overwrite_each_others_turns():
+    backend = SharedBackend()
+    worker_a = ConversationSessionStore(FakeAgent(), backend=backend)
+    worker_b = ConversationSessionStore(FakeAgent(), backend=backend)
+
+    async def main():
+        first = await worker_a.get_or_create("user-1", "session-1")
+        await worker_a.append_turn(first, "one", "1")
+        # Both workers load the same version, then both save a turn
+        on_a = await worker_a.get_or_create("user-1", "session-1")
+        on_b = await worker_b.get_or_create("user-1", "session-1")
+        await worker_a.append_turn(on_a, "two", "2")
+        await worker_b.append_turn(on_b, "three", "3")
+
+    asyncio.run(main())
+    assert [turn["content"] for turn in backend.row.turns] == ["one", "1", "two", "2", "three", "3"]
+    assert backend.row.version == 3
+
+
+def test_old_turns_are_folded_into_the_summary():
+    agent = FakeAgent()
+    store = ConversationSessionStore(agent, max_recent_turns=1, token_threshold=0)
+
+    async def main():
+        session = ConversationSession(id="s", user_id="u")
+        await store.append_turn(session, "first", "a")
+        await store.append_turn(session, "second", "b")
+        return session
+
+    session = asyncio.run(main())
+    assert [turn["content"] for turn in session.turns] == ["second", "b"]
+    assert session.summary == "2 earlier messages"
+    assert session.history()[0]["role"] == "system"
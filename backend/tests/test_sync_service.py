@@ -0,0 +1,131 @@
+import asyncio
+import base64
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.services.sync_service import InvalidSyncToken, SyncService, decode_token, encode_token
+
+USER = "user-1"
+
+
+class FakeDB:
+    def __init__(self, rows=None, tombstones=()):
+        self.rows = rows or {}
+        self.tombstones = list(tombstones)
+        self.calls = []
+        self.pruned = []
+
+    async def get_changed_rows(self, table, user_id, since=None, after_id=None, limit=1000, columns="*"):
+        self.calls.append((table, since, after_id))
+        return self.rows.get(table, [])[:limit]
+
+    async def get_tombstones(self, user_id, since=None, after_id=None, limit=1000):
+        self.calls.append(("deleted", since, after_id))
+        return self.tombstones[:limit]
+
+    async def delete_old_tombstones(self, before):
+        self.pruned.append(before)
+        return True
+
+
+def _row(id, updated_at):
+    return {"id": id, "updated_at": updated_at}
+
+
+def _cursors(result):
+    return decode_token(result["next"])[0]
+
+
+def _since(db, table):
+    return next((since, after_id) for name, since, after_id in db.calls if name == table)
+
+
+def test_token_round_trips():
+    cursors = {"entries": ["2024-01-01T00:00:00+00:00", "id-1"], "deleted": ["2024-01-01T00:00:00+00:00", None]}
+    token = encode_token(cursors, 1700000000.5)
+    assert "=" not in token
+    assert decode_token(token) == (cursors, 1700000000.0)
+
+
+@pytest.mark.parametrize("token", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+    base64.urlsafe_b64encode(json.dumps({"v": 99, "i": 0, "c": {}}).encode()).decode(),
+])
+def test_bad_tokens_are_rejected(token):
+    with pytest.raises(InvalidSyncToken):
+        decode_token(token)
+
+
+def test_full_page_continues_after_the_last_updated_at_and_id():
+    rows = [_row("a", "2024-01-01T00:00:00+00:00"), _row("b", "2024-01-01T00:00:00+00:00")]
+    db = FakeDB({"entries": rows})
+    service = SyncService(db, page_size=2)
+
+    first = asyncio.run(service.changes(USER))
+    assert first["has_more"]
+    assert _cursors(first)["entries"] == ["2024-01-01T00:00:00+00:00", "b"]
+
+    # Rows sharing the watermark are resumed by id, not re-scanned from it
+    db.rows, db.calls = {}, []
+    asyncio.run(service.changes(USER, first["next"]))
+    assert _since(db, "entries") == ("2024-01-01T00:00:00+00:00", "b")
+
+
+def test_drained_table_is_rescanned_from_the_watermark_minus_the_overlap():
+    db = FakeDB({"entries": [_row("a", "2024-01-01T00:10:00+00:00")]})
+    service = SyncService(db, page_size=10, overlap_seconds=300)
+
+    first = asyncio.run(service.changes(USER))
+    assert not first["has_more"]
+    assert _cursors(first)["entries"] == ["2024-01-01T00:10:00+00:00", None]
+
+    db.rows, db.calls = {}, []
+    second = asyncio.run(service.changes(USER, first["next"]))
+    since, after_id = _since(db, "entries")
+    assert datetime.fromisoformat(since) == datetime.fromisoformat("2024-01-01T00:05:00+00:00")
+    assert after_id is None
+    # An empty page keeps the watermark instead of resetting it
+    assert _cursors(second)["entries"] == ["2024-01-01T00:10:00+00:00", None]
+
+
+def test_tombstones_are_delivered_incrementally_but_not_on_a_fresh_snapshot():
+    tombstone = {"id": 7, "table_name": "entries", "row_id": "a", "deleted_at": "2024-01-02T00:00:00+00:00"}
+    db = FakeDB(tombstones=[tombstone])
+    service = SyncService(db)
+
+    first = asyncio.run(service.changes(USER))
+    assert first["deleted"] == []
+    assert not any(name == "deleted" for name, _, _ in db.calls)
+    watermark, last_id = _cursors(first)["deleted"]
+    assert watermark and last_id is None
+
+    db.calls = []
+    second = asyncio.run(service.changes(USER, first["next"]))
+    assert second["deleted"] == [{"table": "entries", "id": "a"}]
+    assert _since(db, "deleted")[0] is not None
+    assert _cursors(second)["deleted"] == ["2024-01-02T00:00:00+00:00", None]
+
+
+def test_token_older_than_the_retention_gets_a_reset_snapshot():
+    db = FakeDB(tombstones=[{"id": 1, "table_name": "entries", "row_id": "a", "deleted_at": "2024-01-01T00:00:00+00:00"}])
+    service = SyncService(db, tombstone_retention_days=30)
+    stale = encode_token({"entries": ["2024-01-01T00:00:00+00:00", None]}, time.time() - 31 * 86400)
+
+    result = asyncio.run(service.changes(USER, stale))
+
+    assert result["reset"] and result["deleted"] == []
+    assert _since(db, "entries") == (None, None)
+
+
+def test_tombstones_are_pruned_at_most_once_an_hour():
+    db = FakeDB()
+    service = SyncService(db)
+    asyncio.run(service.changes(USER))
+    asyncio.run(service.changes(USER))
+    assert len(db.pruned) == 1
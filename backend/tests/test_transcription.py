@@ -0,0 +1,41 @@
+import io
+import wave
+
+import pytest
+
+pytest.importorskip("openai")
+
+from app.services.transcription import TranscriptionBackend, audio_duration_seconds
+
+
+def _wav(seconds: float, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def test_wav_duration_is_exact():
+    assert audio_duration_seconds(_wav(1.5), "audio/wav") == pytest.approx(1.5)
+
+
+def test_wav_is_detected_without_a_content_type():
+    assert audio_duration_seconds(_wav(2.0), None) == pytest.approx(2.0)
+
+
+def test_compressed_duration_is_estimated_from_size():
+    assert audio_duration_seconds(b"\x00" * 40000, "audio/webm;codecs=opus") == pytest.approx(10.0)
+    assert audio_duration_seconds(b"\x00" * 32000, "audio/mpeg") == pytest.approx(2.0)
+
+
+def test_unknown_or_corrupt_audio_has_no_duration():
+    assert audio_duration_seconds(b"\x00" * 1000, "application/octet-stream") is None
+    assert audio_duration_seconds(b"RIFF" + b"\x00" * 8, "audio/wav") is None
+
+
+def test_transcription_backend_requires_transcribe():
+    with pytest.raises(TypeError):
+        TranscriptionBackend()
@@ -0,0 +1,36 @@
+-- Track which model produced each embedding so rows can be re-embedded
+-- when the embedding model changes
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS embedding_model TEXT;
+
+-- Existing embeddings were all produced by text-embedding-3-small
+UPDATE entries
+SET embedding_model = 'text-embedding-3-small'
+WHERE embedding IS NOT NULL AND embedding_model IS NULL;
+
+-- Bulk write-back for the backfill job: one round trip per batch
+-- updates: [{"id": "<uuid>", "embedding": [..1536 floats..]}, ...]
+CREATE OR REPLACE FUNCTION bulk_update_embeddings(
+    updates JSONB,
+    model_name TEXT
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE entries e
+    SET
+        embedding = (u->>'embedding')::vector,
+        embedding_model = model_name
+    FROM jsonb_array_elements(updates) AS u
+    WHERE e.id = (u->>'id')::uuid;
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$;
+
+-- Only the backend (service role) may run bulk updates
+REVOKE EXECUTE ON FUNCTION bulk_update_embeddings(JSONB, TEXT) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION bulk_update_embeddings(JSONB, TEXT) TO service_role;
@@ -0,0 +1,82 @@
+-- Server-side conversation sessions for /api/agent/classify-with-context
+-- Optional shared backing for the in-process session store, so that any
+-- worker can continue a session started on another one
+CREATE TABLE IF NOT EXISTS conversation_sessions (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    summary TEXT,
+    turns JSONB NOT NULL DEFAULT '[]'::jsonb,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Create index on user_id for faster queries
+CREATE INDEX IF NOT EXISTS idx_conversation_sessions_user_id ON conversation_sessions(user_id);
+
+-- Create index on expires_at for expiry sweeps
+CREATE INDEX IF NOT EXISTS idx_conversation_sessions_expires_at ON conversation_sessions(expires_at);
+
+-- Enable Row Level Security on conversation_sessions
+ALTER TABLE conversation_sessions ENABLE ROW LEVEL SECURITY;
+
+-- Create policy: Users can view their own sessions
+CREATE POLICY "Users can view own conversation sessions" ON conversation_sessions
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- Create policy: Users can delete their own sessions
+CREATE POLICY "Users can delete own conversation sessions" ON conversation_sessions
+    FOR DELETE USING (auth.uid() = user_id);
+
+CREATE TRIGGER update_conversation_sessions_updated_at BEFORE UPDATE ON conversation_sessions
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Optimistic concurrency: every save bumps the version, and a save based on
+-- a stale version is rejected so turns written by another worker are kept
+ALTER TABLE conversation_sessions ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+-- Create (expected_version = 0) or update a session if it is still at
+-- expected_version. Returns the new version, or NULL if another writer won.
+CREATE OR REPLACE FUNCTION save_conversation_session(
+    session_id UUID,
+    owner_id UUID,
+    session_summary TEXT,
+    session_turns JSONB,
+    session_expires_at TIMESTAMPTZ,
+    expected_version INTEGER
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_version INTEGER;
+BEGIN
+    IF expected_version = 0 THEN
+        INSERT INTO conversation_sessions (id, user_id, summary, turns, expires_at, version)
+        VALUES (session_id, owner_id, session_summary, session_turns, session_expires_at, 1)
+        -- An expired row that was not swept yet may be reused
+        ON CONFLICT (id) DO UPDATE SET
+            summary = EXCLUDED.summary,
+            turns = EXCLUDED.turns,
+            expires_at = EXCLUDED.expires_at,
+            version = 1
+        WHERE conversation_sessions.user_id = owner_id
+            AND conversation_sessions.expires_at <= NOW()
+        RETURNING version INTO new_version;
+    ELSE
+        UPDATE conversation_sessions
+        SET
+            summary = session_summary,
+            turns = session_turns,
+            expires_at = session_expires_at,
+            version = version + 1
+        WHERE id = session_id AND user_id = owner_id AND version = expected_version
+        RETURNING version INTO new_version;
+    END IF;
+    RETURN new_version;
+END;
+$$;
+
+-- Only the backend (service role) may save sessions
+REVOKE EXECUTE ON FUNCTION save_conversation_session(UUID, UUID, TEXT, JSONB, TIMESTAMPTZ, INTEGER) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION save_conversation_session(UUID, UUID, TEXT, JSONB, TIMESTAMPTZ, INTEGER) TO service_role;
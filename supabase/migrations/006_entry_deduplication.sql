@@ -0,0 +1,29 @@
+-- Ingest-time deduplication of near-identical notes
+-- content_simhash: 64-bit SimHash of the normalized content (exact/near-exact prefilter)
+-- duplicate_of:    set when a duplicate is linked to its original instead of merged
+-- duplicate_count: number of duplicates merged into this entry
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS content_simhash BIGINT;
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS duplicate_of UUID REFERENCES entries(id) ON DELETE SET NULL;
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS duplicate_count INTEGER NOT NULL DEFAULT 0;
+
+-- Create index for the SimHash prefilter lookup
+CREATE INDEX IF NOT EXISTS idx_entries_user_simhash ON entries(user_id, content_simhash);
+
+-- Record a merged duplicate atomically (no read-modify-write race)
+CREATE OR REPLACE FUNCTION register_duplicate_entry(entry_id_param UUID)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_count INTEGER;
+BEGIN
+    UPDATE entries
+    SET duplicate_count = duplicate_count + 1
+    WHERE id = entry_id_param
+    RETURNING duplicate_count INTO new_count;
+    RETURN new_count;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION register_duplicate_entry(UUID) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION register_duplicate_entry(UUID) TO service_role;
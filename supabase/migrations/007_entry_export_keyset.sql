@@ -0,0 +1,3 @@
+-- Keyset pagination for entry exports: WHERE user_id = ? AND (created_at, id) > (?, ?)
+-- ORDER BY created_at, id walks this index without sorting or skipping rows
+CREATE INDEX IF NOT EXISTS idx_entries_user_created_id ON entries(user_id, created_at, id);
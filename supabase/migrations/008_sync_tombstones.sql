@@ -0,0 +1,60 @@
+-- Incremental sync for offline clients (/api/sync)
+-- Changed rows are found through updated_at (maintained by the
+-- update_*_updated_at triggers); deletes are recorded as tombstones
+
+-- Create sync_tombstones table
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    table_name TEXT NOT NULL,
+    row_id UUID NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Create index for "deleted since watermark" scans
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_user_deleted ON sync_tombstones(user_id, deleted_at, id);
+
+-- Enable Row Level Security on sync_tombstones
+ALTER TABLE sync_tombstones ENABLE ROW LEVEL SECURITY;
+
+-- Create policy: Users can view their own tombstones
+CREATE POLICY "Users can view own sync tombstones" ON sync_tombstones
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- Create indexes for "changed since watermark" scans
+CREATE INDEX IF NOT EXISTS idx_entries_user_updated ON entries(user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_reminders_updated ON reminders(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_global_context_user_updated ON global_context(user_id, updated_at, id);
+
+-- Record a tombstone for every deleted row
+-- Reminders carry no user_id; when a reminder is removed by the cascade of
+-- its entry the entry is already gone, and the entry's own tombstone tells
+-- clients to drop its reminders
+CREATE OR REPLACE FUNCTION record_sync_tombstone()
+RETURNS TRIGGER AS $$
+DECLARE
+    owner_id UUID;
+BEGIN
+    IF TG_TABLE_NAME = 'reminders' THEN
+        SELECT user_id INTO owner_id FROM entries WHERE id = OLD.entry_id;
+        IF owner_id IS NULL THEN
+            RETURN OLD;
+        END IF;
+    ELSE
+        owner_id := OLD.user_id;
+    END IF;
+
+    INSERT INTO sync_tombstones (user_id, table_name, row_id)
+    VALUES (owner_id, TG_TABLE_NAME, OLD.id);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER record_entries_tombstone AFTER DELETE ON entries
+    FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone();
+
+CREATE TRIGGER record_reminders_tombstone AFTER DELETE ON reminders
+    FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone();
+
+CREATE TRIGGER record_global_context_tombstone AFTER DELETE ON global_context
+    FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone();
@@ -0,0 +1,92 @@
+-- Background summarization: entries.summary is filled off the request path,
+-- and per-category / per-week rollup digests are folded incrementally
+
+-- Summarization attempts the model skipped; the sweep gives up on an entry
+-- after a few so it cannot block the rows behind it
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS summary_attempts SMALLINT NOT NULL DEFAULT 0;
+
+-- Partial index so the summarizer can find unsummarized rows cheaply
+CREATE INDEX IF NOT EXISTS idx_entries_summary_pending ON entries(created_at)
+    WHERE summary IS NULL;
+
+-- Create entry_rollups table
+-- scope: 'category' (scope_key = category name) or 'week' (scope_key = ISO week, e.g. '2026-W07')
+CREATE TABLE IF NOT EXISTS entry_rollups (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    scope TEXT NOT NULL CHECK (scope IN ('category', 'week')),
+    scope_key TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    last_entry_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(user_id, scope, scope_key)
+);
+
+-- Enable Row Level Security on entry_rollups
+ALTER TABLE entry_rollups ENABLE ROW LEVEL SECURITY;
+
+-- Create policy: Users can view their own rollups
+CREATE POLICY "Users can view own entry rollups" ON entry_rollups
+    FOR SELECT USING (auth.uid() = user_id);
+
+CREATE TRIGGER update_entry_rollups_updated_at BEFORE UPDATE ON entry_rollups
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Write back one user's batch in a single transaction: the summaries, the
+-- attempt counter of entries the model skipped, and the rollups folded from
+-- the new summaries. Nothing is marked summarized unless its rollups are
+-- saved too. If another worker already summarized any of these entries,
+-- nothing is written (returns -1) so no summary is folded twice.
+-- updates: [{"id": "<uuid>", "summary": "..."}, ...]
+-- rollups: [{"scope": "week", "scope_key": "2026-W07", "digest": "...",
+--            "entry_count": <new entries>, "last_entry_at": "..."}, ...]
+CREATE OR REPLACE FUNCTION apply_entry_summaries(
+    owner_id UUID,
+    updates JSONB,
+    skipped UUID[],
+    rollups JSONB
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    updated_count INTEGER;
+    ids UUID[] := ARRAY(SELECT (u->>'id')::uuid FROM jsonb_array_elements(updates) AS u);
+BEGIN
+    UPDATE entries
+    SET summary_attempts = summary_attempts + 1
+    WHERE id = ANY(skipped) AND user_id = owner_id AND summary IS NULL;
+
+    PERFORM 1 FROM entries WHERE id = ANY(ids) AND user_id = owner_id FOR UPDATE;
+    IF EXISTS (SELECT 1 FROM entries WHERE id = ANY(ids) AND summary IS NOT NULL) THEN
+        RETURN -1;
+    END IF;
+
+    UPDATE entries e
+    SET summary = u->>'summary'
+    FROM jsonb_array_elements(updates) AS u
+    WHERE e.id = (u->>'id')::uuid AND e.user_id = owner_id;
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+
+    INSERT INTO entry_rollups (user_id, scope, scope_key, digest, entry_count, last_entry_at)
+    SELECT
+        owner_id,
+        r->>'scope',
+        r->>'scope_key',
+        r->>'digest',
+        (r->>'entry_count')::integer,
+        (r->>'last_entry_at')::timestamptz
+    FROM jsonb_array_elements(rollups) AS r
+    ON CONFLICT (user_id, scope, scope_key) DO UPDATE SET
+        digest = EXCLUDED.digest,
+        entry_count = entry_rollups.entry_count + EXCLUDED.entry_count,
+        last_entry_at = GREATEST(entry_rollups.last_entry_at, EXCLUDED.last_entry_at);
+
+    RETURN updated_count;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION apply_entry_summaries(UUID, JSONB, UUID[], JSONB) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION apply_entry_summaries(UUID, JSONB, UUID[], JSONB) TO service_role;
@@ -0,0 +1,102 @@
+-- Per-user category registry
+-- Free-text categories from the classifier are canonicalized onto one row
+-- per category; centroid is the mean embedding of the entries assigned to it
+CREATE TABLE IF NOT EXISTS categories (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    canonical_name TEXT NOT NULL,
+    aliases TEXT[] NOT NULL DEFAULT '{}',
+    centroid vector(1536),
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(user_id, canonical_name)
+);
+
+-- Enable Row Level Security on categories
+ALTER TABLE categories ENABLE ROW LEVEL SECURITY;
+
+-- Create policy: Users can view their own categories
+CREATE POLICY "Users can view own categories" ON categories
+    FOR SELECT USING (auth.uid() = user_id);
+
+CREATE TRIGGER update_categories_updated_at BEFORE UPDATE ON categories
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Link entries to the registry
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS category_id UUID REFERENCES categories(id) ON DELETE SET NULL;
+
+-- Create index for category-filtered lists (newest first)
+CREATE INDEX IF NOT EXISTS idx_entries_user_category_created ON entries(user_id, category_id, created_at DESC);
+
+-- Same key as category_service.canonical_name(): punctuation other than
+-- & + - removed, whitespace collapsed, lowercased
+CREATE OR REPLACE FUNCTION canonical_category_name(name TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT LOWER(BTRIM(REGEXP_REPLACE(REGEXP_REPLACE(COALESCE(name, ''), '[^\w\s&+-]', '', 'g'), '\s+', ' ', 'g')));
+$$;
+
+-- Backfill: one category per distinct canonical name, centroid from existing embeddings
+INSERT INTO categories (user_id, name, canonical_name, centroid, entry_count)
+SELECT
+    user_id,
+    MIN(REGEXP_REPLACE(TRIM(category), '\s+', ' ', 'g')),
+    canonical_category_name(category),
+    AVG(embedding),
+    COUNT(*)
+FROM entries
+WHERE canonical_category_name(category) <> ''
+GROUP BY user_id, canonical_category_name(category)
+ON CONFLICT (user_id, canonical_name) DO NOTHING;
+
+UPDATE entries e
+SET category_id = c.id
+FROM categories c
+WHERE e.category_id IS NULL
+    AND c.user_id = e.user_id
+    AND c.canonical_name = canonical_category_name(e.category);
+
+-- Count a stored entry and fold its embedding into the running-mean centroid
+-- in one statement, so concurrent requests and workers never lose an update
+CREATE OR REPLACE FUNCTION record_category_entry(
+    category_id UUID,
+    entry_embedding vector(1536) DEFAULT NULL
+)
+RETURNS SETOF categories
+LANGUAGE sql
+AS $$
+    UPDATE categories c
+    SET
+        entry_count = c.entry_count + 1,
+        centroid = CASE
+            WHEN entry_embedding IS NULL THEN c.centroid
+            WHEN c.centroid IS NULL THEN entry_embedding
+            ELSE (
+                SELECT array_agg(old_value + (new_value - old_value) / (c.entry_count + 1) ORDER BY position)
+                FROM unnest(c.centroid::real[], entry_embedding::real[]) WITH ORDINALITY AS t(old_value, new_value, position)
+            )::vector
+        END
+    WHERE c.id = category_id
+    RETURNING c.*;
+$$;
+
+-- Add a classifier label to a category's aliases (no-op if already present)
+CREATE OR REPLACE FUNCTION add_category_alias(category_id UUID, alias TEXT)
+RETURNS SETOF categories
+LANGUAGE sql
+AS $$
+    UPDATE categories c
+    SET aliases = array_append(c.aliases, alias)
+    WHERE c.id = category_id AND NOT (alias = ANY(c.aliases))
+    RETURNING c.*;
+$$;
+
+-- Only the backend (service role) may update the registry
+REVOKE EXECUTE ON FUNCTION record_category_entry(UUID, vector) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION record_category_entry(UUID, vector) TO service_role;
+REVOKE EXECUTE ON FUNCTION add_category_alias(UUID, TEXT) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION add_category_alias(UUID, TEXT) TO service_role;
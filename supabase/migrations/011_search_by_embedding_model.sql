@@ -0,0 +1,88 @@
+-- Vectors from different embedding models live in the same vector(1536)
+-- column (smaller local models are zero-padded), but are only comparable
+-- within one model: similarity search can now be restricted to a model
+DROP FUNCTION IF EXISTS search_similar_entries(UUID, vector(1536), FLOAT, INT);
+
+CREATE OR REPLACE FUNCTION search_similar_entries(
+    user_id_param UUID,
+    query_embedding vector(1536),
+    match_threshold FLOAT DEFAULT 0.7,
+    match_count INT DEFAULT 10,
+    embedding_model_param TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    user_id UUID,
+    content TEXT,
+    summary TEXT,
+    intent intent_type,
+    category TEXT,
+    created_at TIMESTAMPTZ,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        e.id,
+        e.user_id,
+        e.content,
+        e.summary,
+        e.intent,
+        e.category,
+        e.created_at,
+        1 - (e.embedding <=> query_embedding) AS similarity
+    FROM entries e
+    WHERE 
+        e.user_id = user_id_param
+        AND e.embedding IS NOT NULL
+        AND (embedding_model_param IS NULL OR e.embedding_model = embedding_model_param)
+        AND (1 - (e.embedding <=> query_embedding)) >= match_threshold
+    ORDER BY e.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+-- Grant execute permission to authenticated users
+GRANT EXECUTE ON FUNCTION search_similar_entries(UUID, vector(1536), FLOAT, INT, TEXT) TO authenticated;
+
+-- Create index for model-filtered searches
+CREATE INDEX IF NOT EXISTS idx_entries_user_embedding_model ON entries(user_id, embedding_model);
+
+-- Category centroids are per model too; existing ones were built from text-embedding-3-small
+ALTER TABLE categories ADD COLUMN IF NOT EXISTS centroid_model TEXT;
+
+UPDATE categories
+SET centroid_model = 'text-embedding-3-small'
+WHERE centroid IS NOT NULL AND centroid_model IS NULL;
+
+-- Centroids restart from the new vector when the embedding model changes
+DROP FUNCTION IF EXISTS record_category_entry(UUID, vector);
+
+CREATE OR REPLACE FUNCTION record_category_entry(
+    category_id UUID,
+    entry_embedding vector(1536) DEFAULT NULL,
+    entry_embedding_model TEXT DEFAULT NULL
+)
+RETURNS SETOF categories
+LANGUAGE sql
+AS $$
+    UPDATE categories c
+    SET
+        entry_count = c.entry_count + 1,
+        centroid = CASE
+            WHEN entry_embedding IS NULL THEN c.centroid
+            WHEN c.centroid IS NULL OR c.centroid_model IS DISTINCT FROM entry_embedding_model THEN entry_embedding
+            ELSE (
+                SELECT array_agg(old_value + (new_value - old_value) / (c.entry_count + 1) ORDER BY position)
+                FROM unnest(c.centroid::real[], entry_embedding::real[]) WITH ORDINALITY AS t(old_value, new_value, position)
+            )::vector
+        END,
+        centroid_model = CASE WHEN entry_embedding IS NULL THEN c.centroid_model ELSE entry_embedding_model END
+    WHERE c.id = category_id
+    RETURNING c.*;
+$$;
+
+REVOKE EXECUTE ON FUNCTION record_category_entry(UUID, vector, TEXT) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION record_category_entry(UUID, vector, TEXT) TO service_role;
@@ -0,0 +1,480 @@
+-- Monthly range partitioning of entries on created_at
+-- Each month is its own table with its own indexes (including an HNSW vector
+-- index), so index builds, vacuum and search cost follow the size of the
+-- months being touched rather than the whole history. Queries filtered or
+-- ordered by created_at only visit the partitions they need. Cold months are
+-- moved to Parquet files in Storage by backend/archive_entries.py.
+--
+-- The primary key becomes (id, created_at) because a unique constraint on a
+-- partitioned table must contain the partition key; reminders reference their
+-- entry through (entry_id, entry_created_at).
+--
+-- This rewrites the entries table: run it in a maintenance window.
+
+-- Detach everything that references the old table
+ALTER TABLE reminders DROP CONSTRAINT IF EXISTS reminders_entry_id_fkey;
+ALTER TABLE entries DROP CONSTRAINT IF EXISTS entries_duplicate_of_fkey;
+DROP POLICY IF EXISTS "Users can view own reminders" ON reminders;
+DROP POLICY IF EXISTS "Users can insert own reminders" ON reminders;
+DROP POLICY IF EXISTS "Users can update own reminders" ON reminders;
+DROP POLICY IF EXISTS "Users can delete own reminders" ON reminders;
+
+ALTER TABLE entries RENAME TO entries_legacy;
+
+-- Create partitioned entries table
+CREATE TABLE entries (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    content TEXT NOT NULL,
+    summary TEXT,
+    summary_attempts SMALLINT NOT NULL DEFAULT 0,
+    intent intent_type NOT NULL,
+    category TEXT,
+    category_id UUID REFERENCES categories(id) ON DELETE SET NULL,
+    embedding vector(1536),
+    embedding_model TEXT,
+    content_simhash BIGINT,
+    duplicate_of UUID,
+    duplicate_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Catch-all for rows outside every monthly partition, so an insert never
+-- fails just because nobody created its month yet
+-- Partitions get RLS with no policies, so they can only be read through entries
+CREATE TABLE IF NOT EXISTS entries_default PARTITION OF entries DEFAULT;
+ALTER TABLE entries_default ENABLE ROW LEVEL SECURITY;
+
+-- Create one month's partition (no-op if it exists); returns its name
+-- A month that already has rows in entries_default is left there (Postgres
+-- cannot attach a range the default partition holds rows for, and moving
+-- them would cascade-delete their reminders); returns NULL with a warning
+CREATE OR REPLACE FUNCTION create_entries_partition(month_start DATE)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    first_day DATE := date_trunc('month', month_start)::date;
+    partition_name TEXT := 'entries_' || to_char(first_day, 'YYYY_MM');
+    range_start TIMESTAMPTZ := first_day::timestamp AT TIME ZONE 'UTC';
+    range_end TIMESTAMPTZ := (first_day + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC';
+BEGIN
+    IF to_regclass('public.' || partition_name) IS NULL THEN
+        IF EXISTS (
+            SELECT 1 FROM public.entries_default
+            WHERE created_at >= range_start AND created_at < range_end
+        ) THEN
+            RAISE WARNING 'entries_default holds rows for %, not creating %', to_char(first_day, 'YYYY-MM'), partition_name;
+            RETURN NULL;
+        END IF;
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.entries FOR VALUES FROM (%L) TO (%L)',
+            partition_name,
+            range_start,
+            range_end
+        );
+        EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', partition_name);
+    END IF;
+    RETURN partition_name;
+END;
+$$;
+
+-- Make sure the current month and the next `months_ahead` months exist
+CREATE OR REPLACE FUNCTION ensure_entries_partitions(months_ahead INT DEFAULT 3)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    FOR m IN 0..months_ahead LOOP
+        PERFORM create_entries_partition(
+            (date_trunc('month', NOW() AT TIME ZONE 'UTC') + make_interval(months => m))::date
+        );
+    END LOOP;
+    RETURN months_ahead + 1;
+END;
+$$;
+
+-- Partitions for every month with data, then the months ahead
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    SELECT date_trunc('month', MIN(COALESCE(created_at, updated_at, NOW())) AT TIME ZONE 'UTC')::date
+    INTO month_start
+    FROM entries_legacy;
+
+    WHILE month_start IS NOT NULL AND month_start < date_trunc('month', NOW() AT TIME ZONE 'UTC')::date LOOP
+        PERFORM create_entries_partition(month_start);
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    PERFORM ensure_entries_partitions(3);
+END;
+$$;
+
+-- Copy the data
+INSERT INTO entries (
+    id, user_id, content, summary, summary_attempts, intent, category, category_id, embedding, embedding_model,
+    content_simhash, duplicate_of, duplicate_count, created_at, updated_at
+)
+SELECT
+    id, user_id, content, summary, summary_attempts, intent, category, category_id, embedding, embedding_model,
+    content_simhash, duplicate_of, duplicate_count, COALESCE(created_at, updated_at, NOW()), updated_at
+FROM entries_legacy;
+
+-- Link reminders to their entry's partition
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS entry_created_at TIMESTAMPTZ;
+
+UPDATE reminders r
+SET entry_created_at = e.created_at
+FROM entries e
+WHERE e.id = r.entry_id;
+
+DELETE FROM reminders WHERE entry_created_at IS NULL;
+
+ALTER TABLE reminders ALTER COLUMN entry_created_at SET NOT NULL;
+ALTER TABLE reminders ADD CONSTRAINT reminders_entry_fkey
+    FOREIGN KEY (entry_id, entry_created_at) REFERENCES entries(id, created_at) ON DELETE CASCADE;
+
+DROP INDEX IF EXISTS idx_reminders_entry_id;
+CREATE INDEX IF NOT EXISTS idx_reminders_entry ON reminders(entry_id, entry_created_at);
+
+DROP TABLE entries_legacy;
+
+-- Recreate indexes (created on every partition, current and future)
+CREATE INDEX IF NOT EXISTS idx_entries_intent ON entries(intent);
+CREATE INDEX IF NOT EXISTS idx_entries_created_at ON entries(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_entries_user_created_id ON entries(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_entries_user_updated ON entries(user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_entries_user_simhash ON entries(user_id, content_simhash);
+CREATE INDEX IF NOT EXISTS idx_entries_user_category_created ON entries(user_id, category_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_entries_user_embedding_model ON entries(user_id, embedding_model);
+CREATE INDEX IF NOT EXISTS idx_entries_summary_pending ON entries(created_at)
+    WHERE summary IS NULL;
+CREATE INDEX IF NOT EXISTS idx_entries_duplicate_of ON entries(duplicate_of)
+    WHERE duplicate_of IS NOT NULL;
+
+-- Per-partition vector index: HNSW needs no training data, so it stays
+-- accurate on a month that starts empty (ivfflat lists would be fit to nothing)
+CREATE INDEX IF NOT EXISTS idx_entries_embedding ON entries
+    USING hnsw (embedding vector_cosine_ops);
+
+-- Enable Row Level Security on entries
+ALTER TABLE entries ENABLE ROW LEVEL SECURITY;
+
+-- Create policy: Users can view their own entries
+CREATE POLICY "Users can view own entries" ON entries
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- Create policy: Users can insert their own entries
+CREATE POLICY "Users can insert own entries" ON entries
+    FOR INSERT WITH CHECK (auth.uid() = user_id);
+
+-- Create policy: Users can update their own entries
+CREATE POLICY "Users can update own entries" ON entries
+    FOR UPDATE USING (auth.uid() = user_id);
+
+-- Create policy: Users can delete their own entries
+CREATE POLICY "Users can delete own entries" ON entries
+    FOR DELETE USING (auth.uid() = user_id);
+
+-- Reminder policies, matching on the full key so only one partition is probed
+CREATE POLICY "Users can view own reminders" ON reminders
+    FOR SELECT USING (
+        EXISTS (
+            SELECT 1 FROM entries
+            WHERE entries.id = reminders.entry_id
+            AND entries.created_at = reminders.entry_created_at
+            AND entries.user_id = auth.uid()
+        )
+    );
+
+CREATE POLICY "Users can insert own reminders" ON reminders
+    FOR INSERT WITH CHECK (
+        EXISTS (
+            SELECT 1 FROM entries
+            WHERE entries.id = reminders.entry_id
+            AND entries.created_at = reminders.entry_created_at
+            AND entries.user_id = auth.uid()
+        )
+    );
+
+CREATE POLICY "Users can update own reminders" ON reminders
+    FOR UPDATE USING (
+        EXISTS (
+            SELECT 1 FROM entries
+            WHERE entries.id = reminders.entry_id
+            AND entries.created_at = reminders.entry_created_at
+            AND entries.user_id = auth.uid()
+        )
+    );
+
+CREATE POLICY "Users can delete own reminders" ON reminders
+    FOR DELETE USING (
+        EXISTS (
+            SELECT 1 FROM entries
+            WHERE entries.id = reminders.entry_id
+            AND entries.created_at = reminders.entry_created_at
+            AND entries.user_id = auth.uid()
+        )
+    );
+
+-- Fill entry_created_at for callers that only know the entry id
+CREATE OR REPLACE FUNCTION set_reminder_entry_created_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.entry_created_at IS NULL THEN
+        SELECT created_at INTO NEW.entry_created_at FROM entries WHERE id = NEW.entry_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER set_reminders_entry_created_at BEFORE INSERT ON reminders
+    FOR EACH ROW EXECUTE FUNCTION set_reminder_entry_created_at();
+
+-- duplicate_of can no longer be a foreign key (it would need the original's
+-- created_at too); clear links to a deleted original instead
+CREATE OR REPLACE FUNCTION clear_duplicate_links()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE entries SET duplicate_of = NULL
+    WHERE duplicate_of = OLD.id AND user_id = OLD.user_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recreate triggers
+CREATE TRIGGER update_entries_updated_at BEFORE UPDATE ON entries
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER record_entries_tombstone AFTER DELETE ON entries
+    FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone();
+
+CREATE TRIGGER clear_entries_duplicate_links AFTER DELETE ON entries
+    FOR EACH ROW EXECUTE FUNCTION clear_duplicate_links();
+
+-- Tombstones: look reminders' owners up by the full key, and record nothing
+-- for rows removed by archival (clients keep their copies of archived notes)
+CREATE OR REPLACE FUNCTION record_sync_tombstone()
+RETURNS TRIGGER AS $$
+DECLARE
+    owner_id UUID;
+BEGIN
+    IF current_setting('app.archiving', true) = 'on' THEN
+        RETURN OLD;
+    END IF;
+
+    IF TG_TABLE_NAME = 'reminders' THEN
+        SELECT user_id INTO owner_id FROM entries
+        WHERE id = OLD.entry_id AND created_at = OLD.entry_created_at;
+        IF owner_id IS NULL THEN
+            RETURN OLD;
+        END IF;
+    ELSE
+        owner_id := OLD.user_id;
+    END IF;
+
+    INSERT INTO sync_tombstones (user_id, table_name, row_id)
+    VALUES (owner_id, TG_TABLE_NAME, OLD.id);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Similarity search with an optional lower bound on created_at; the bound is
+-- applied as a plain range predicate so older partitions are pruned at execution
+DROP FUNCTION IF EXISTS search_similar_entries(UUID, vector(1536), FLOAT, INT, TEXT);
+
+CREATE OR REPLACE FUNCTION search_similar_entries(
+    user_id_param UUID,
+    query_embedding vector(1536),
+    match_threshold FLOAT DEFAULT 0.7,
+    match_count INT DEFAULT 10,
+    embedding_model_param TEXT DEFAULT NULL,
+    created_after TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    user_id UUID,
+    content TEXT,
+    summary TEXT,
+    intent intent_type,
+    category TEXT,
+    created_at TIMESTAMPTZ,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        e.id,
+        e.user_id,
+        e.content,
+        e.summary,
+        e.intent,
+        e.category,
+        e.created_at,
+        1 - (e.embedding <=> query_embedding) AS similarity
+    FROM entries e
+    WHERE
+        e.user_id = user_id_param
+        AND e.created_at >= COALESCE(created_after, '-infinity'::timestamptz)
+        AND e.embedding IS NOT NULL
+        AND (embedding_model_param IS NULL OR e.embedding_model = embedding_model_param)
+        AND (1 - (e.embedding <=> query_embedding)) >= match_threshold
+    ORDER BY e.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+-- Grant execute permission to authenticated users
+GRANT EXECUTE ON FUNCTION search_similar_entries(UUID, vector(1536), FLOAT, INT, TEXT, TIMESTAMPTZ) TO authenticated;
+
+-- Monthly partition inventory for the archival job (entries_default is never archived)
+CREATE OR REPLACE FUNCTION list_entries_partitions()
+RETURNS TABLE (
+    partition_name TEXT,
+    month_start DATE,
+    estimated_rows BIGINT,
+    total_bytes BIGINT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    SELECT
+        c.relname::TEXT,
+        to_date(substring(c.relname FROM '(\d{4}_\d{2})$'), 'YYYY_MM'),
+        GREATEST(c.reltuples, 0)::BIGINT,
+        pg_total_relation_size(c.oid)
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'public.entries'::regclass
+    AND c.relname ~ '^entries_\d{4}_\d{2}$'
+    ORDER BY 2;
+$$;
+
+-- Content fingerprint of a partition and the reminders of its entries (an
+-- md5 over per-row md5s, so any insert, update or delete changes it), plus
+-- how many of those reminders are still pending
+CREATE OR REPLACE FUNCTION entries_partition_fingerprint(partition_name TEXT)
+RETURNS TABLE (
+    fingerprint TEXT,
+    pending_reminders BIGINT
+)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+AS $$
+BEGIN
+    IF partition_name !~ '^entries_\d{4}_\d{2}$' THEN
+        RAISE EXCEPTION 'Not an entries partition: %', partition_name;
+    END IF;
+
+    RETURN QUERY EXECUTE format(
+        'SELECT
+            md5(
+                COALESCE((SELECT string_agg(md5(e::text), '''' ORDER BY e.id) FROM public.%1$I e), '''')
+                || COALESCE((
+                    SELECT string_agg(md5(r::text), '''' ORDER BY r.id)
+                    FROM public.reminders r
+                    JOIN public.%1$I e ON r.entry_id = e.id AND r.entry_created_at = e.created_at
+                ), '''')
+            ),
+            (
+                SELECT COUNT(*)
+                FROM public.reminders r
+                JOIN public.%1$I e ON r.entry_id = e.id AND r.entry_created_at = e.created_at
+                WHERE r.status = ''PENDING''
+            )',
+        partition_name
+    );
+END;
+$$;
+
+-- Drop a partition once its rows are safely archived
+-- Refuses unless the partition still holds exactly `expected_rows` rows and
+-- its content still matches `expected_fingerprint` (taken before the archive
+-- was written), and, unless `allow_pending`, while it has pending reminders.
+-- Writes to the partition and its reminders are blocked while checking.
+CREATE OR REPLACE FUNCTION drop_entries_partition(
+    partition_name TEXT,
+    expected_rows BIGINT,
+    expected_fingerprint TEXT,
+    allow_pending BOOLEAN DEFAULT FALSE
+)
+RETURNS BIGINT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    actual_rows BIGINT;
+    current_fingerprint TEXT;
+    pending BIGINT;
+BEGIN
+    IF partition_name !~ '^entries_\d{4}_\d{2}$' THEN
+        RAISE EXCEPTION 'Not an entries partition: %', partition_name;
+    END IF;
+
+    -- EXCLUSIVE also blocks the key-share locks taken by new reminders' foreign keys
+    EXECUTE format('LOCK TABLE public.%I IN EXCLUSIVE MODE', partition_name);
+    EXECUTE format(
+        'SELECT 1 FROM public.reminders r JOIN public.%I e ON r.entry_id = e.id AND r.entry_created_at = e.created_at FOR UPDATE OF r',
+        partition_name
+    );
+
+    EXECUTE format('SELECT COUNT(*) FROM public.%I', partition_name) INTO actual_rows;
+    IF actual_rows <> expected_rows THEN
+        RAISE EXCEPTION 'Partition % has % rows, archive has %', partition_name, actual_rows, expected_rows;
+    END IF;
+    SELECT f.fingerprint, f.pending_reminders INTO current_fingerprint, pending
+    FROM entries_partition_fingerprint(partition_name) f;
+    IF current_fingerprint IS DISTINCT FROM expected_fingerprint THEN
+        RAISE EXCEPTION 'Partition % changed since it was archived', partition_name;
+    END IF;
+    IF pending > 0 AND NOT allow_pending THEN
+        RAISE EXCEPTION 'Partition % has % pending reminder(s)', partition_name, pending;
+    END IF;
+
+    PERFORM set_config('app.archiving', 'on', true);
+    EXECUTE format(
+        'DELETE FROM public.reminders r USING public.%I e WHERE r.entry_id = e.id AND r.entry_created_at = e.created_at',
+        partition_name
+    );
+    EXECUTE format('ALTER TABLE public.entries DETACH PARTITION public.%I', partition_name);
+    EXECUTE format('DROP TABLE public.%I', partition_name);
+    PERFORM set_config('app.archiving', 'off', true);
+    RETURN actual_rows;
+END;
+$$;
+
+-- Only the backend (service role) may manage partitions
+REVOKE EXECUTE ON FUNCTION create_entries_partition(DATE) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION ensure_entries_partitions(INT) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION list_entries_partitions() FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION entries_partition_fingerprint(TEXT) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION drop_entries_partition(TEXT, BIGINT, TEXT, BOOLEAN) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION ensure_entries_partitions(INT) TO service_role;
+GRANT EXECUTE ON FUNCTION list_entries_partitions() TO service_role;
+GRANT EXECUTE ON FUNCTION entries_partition_fingerprint(TEXT) TO service_role;
+GRANT EXECUTE ON FUNCTION drop_entries_partition(TEXT, BIGINT, TEXT, BOOLEAN) TO service_role;
+
+-- Keep future months ahead of the clock (pg_cron when available; the
+-- backend calls ensure_entries_partitions at startup and the archival job
+-- on every run)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule('ensure-entries-partitions', '0 3 * * *', 'SELECT ensure_entries_partitions(3)');
+    END IF;
+END;
+$$;
+
+-- Private bucket for archived months (zstd Parquet, one file per partition)
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('entry-archive', 'entry-archive', false)
+ON CONFLICT (id) DO NOTHING;